@@ -1,15 +1,33 @@
 # backend/app.py
-from flask import Flask, jsonify, request, redirect
+from flask import Flask, jsonify, request, redirect, abort, Response, stream_with_context
 from flask_cors import CORS
 from config import Config
-from models import db, DomainGroup, TransitDomain, LandingDomain
+from models import db, DomainGroup, TransitDomain, LandingDomain, RedirectHit, CheckJob, parse_keywords
 from flask_migrate import Migrate
+import atexit
 import random
-import re
+import time
 from threading import Thread
 from apscheduler.schedulers.background import BackgroundScheduler
-from checker import run_check_job
-import string # [新] 导入 string 模块用于生成随机路径
+from check_jobs import (enqueue_check, enqueue_due_check, process_check_queue, cancel_job, recent_jobs,
+                        MAX_TARGET_IDS)
+from routing import routing_table
+from redirects import UserAgentFilter, is_admin_path, MAX_WEIGHT
+from hits import hit_counter, traffic_series, group_traffic_breakdown
+from check_history import domain_history, group_check_summary
+from deletions import (delete_domains as delete_domain_rows, delete_group_rows, group_domain_total,
+                       mark_group_deleting, delete_group_in_background)
+from routing_export import snapshot_exporter
+from leader import LeaderJob
+import metrics
+import database
+from importer import BulkImporter, split_urls, iter_uploaded_urls
+from stats import build_stats, domain_counts, rebuild_counters
+from domain_search import (MAX_PER_PAGE, landing_list_query, newest_first, after_cursor, count_rows,
+                           encode_cursor, decode_cursor, row_to_dict)
+from group_domains import DEFAULT_PER_PAGE, domains_page, parse_cursor, export_lines
+from change_feed import change_version, record, versioned, parse_since, wait_for_events, sse_stream
+from datetime import datetime, timedelta
 
 # --- App Initialization ---
 app = Flask(__name__)
@@ -18,105 +36,188 @@ app.config.from_object(Config)
 
 # --- Extensions Initialization ---
 db.init_app(app)
+database.init_app(app)   # [新] SQLite WAL / busy_timeout (见 database.py)
 migrate = Migrate(app, db)
+routing_table.init_app(app)
+change_version.init_app(app)   # [新] 变更推送的共享版本号 (见 change_feed.py)
+ua_filter = UserAgentFilter(app.config['BLOCKED_USER_AGENTS'], app.config['UA_CACHE_SIZE'])
+hit_counter.max_keys = app.config['HIT_MAX_PENDING_KEYS']
 CORS(app) 
+metrics.init_app(app)   # [新] Prometheus 指标 (见 metrics.py)
 
 # --- [!!! 关键修复 !!!] ---
 # 将调度器任务的添加和启动移到全局作用域
 # 这样 Gunicorn 才能在导入时执行它
-scheduler.add_job(
-    id='DomainCheckJob', 
-    func=run_check_job, 
-    args=[app], 
-    trigger='interval', 
-    minutes=5 
+# [新] 每个 worker 都会注册任务，但只有持有数据库租约的 leader 真正执行检测
+# [新] 每次只检测 next_check_at 已到期的域名 (每个域名的间隔见 check_schedule.py)
+# [新] 定时任务只负责把到期检测放进任务队列，检测本身由 CheckQueue 的 leader 依次执行 (check_jobs.py)
+check_job = LeaderJob(
+    job_id='DomainCheckJob',
+    func=enqueue_due_check,
+    interval_seconds=app.config['CHECK_SWEEP_SECONDS'],
+    lease_seconds=app.config['SCHEDULER_LEASE_SECONDS']
 )
-scheduler.start()
-print("Scheduler started... running job every 5 minutes.")
+queue_job = LeaderJob(
+    job_id='CheckQueue',
+    func=process_check_queue,
+    interval_seconds=app.config['CHECK_QUEUE_POLL_SECONDS'],
+    lease_seconds=app.config['SCHEDULER_LEASE_SECONDS']
+)
+# [新] SCHEDULER_ENABLED=0 时不启动 (例如数据库迁移、基准测试脚本)
+if app.config['SCHEDULER_ENABLED']:
+    scheduler.add_job(
+        id='LeaderHeartbeat',
+        func=check_job.heartbeat,
+        args=[app],
+        trigger='interval',
+        seconds=app.config['SCHEDULER_TICK_SECONDS'],
+        next_run_time=datetime.now()
+    )
+    scheduler.add_job(
+        id='DomainCheckJob', 
+        func=check_job.tick, 
+        args=[app], 
+        trigger='interval', 
+        seconds=app.config['SCHEDULER_TICK_SECONDS']
+    )
+    # [新] 检测任务队列
+    scheduler.add_job(
+        id='CheckQueueHeartbeat',
+        func=queue_job.heartbeat,
+        args=[app],
+        trigger='interval',
+        seconds=app.config['SCHEDULER_TICK_SECONDS'],
+        next_run_time=datetime.now()
+    )
+    scheduler.add_job(
+        id='CheckQueue',
+        func=queue_job.tick,
+        args=[app],
+        trigger='interval',
+        seconds=app.config['CHECK_QUEUE_POLL_SECONDS'],
+        max_instances=1
+    )
+    # [新] 每个 worker 把自己进程内的跳转计数写入数据库 (不需要选主)
+    if app.config['HIT_COUNTING']:
+        scheduler.add_job(
+            id='HitFlush',
+            func=hit_counter.flush,
+            args=[app, app.config['HIT_RETENTION_DAYS']],
+            trigger='interval',
+            seconds=app.config['HIT_FLUSH_SECONDS']
+        )
+        atexit.register(hit_counter.flush, app)
+    # [新] 路由版本号变化时重新生成 nginx 快照 (文件锁保证只有一个 worker 在写)
+    if app.config['NGINX_SNAPSHOT_DIR']:
+        scheduler.add_job(
+            id='RoutingSnapshot',
+            func=snapshot_exporter.export_if_stale,
+            args=[app],
+            trigger='interval',
+            seconds=app.config['ROUTING_SYNC_INTERVAL'],
+            next_run_time=datetime.now()
+        )
+    scheduler.start()
+    print(f"Scheduler started... checking due domains every {app.config['CHECK_SWEEP_SECONDS']} seconds (leader only).")
 # --- [!!! 修复结束 !!!] ---
 
 
-# --- [新] 辅助函数：生成随机路径 ---
-def generate_random_path(length=6):
-    """生成一个 5-8 位的随机字母和数字路径"""
-    if length < 5: length = 5
-    if length > 8: length = 8
-    chars = string.ascii_letters + string.digits
-    path = ''.join(random.choice(chars) for _ in range(length))
-    # 以 / 开头
-    return f"/{path}"
-
 # --- API Endpoints ---
 
+def live_group_or_404(group_id):
+    """[新] 查找组；后台删除中的组 (deleting_at) 视为不存在"""
+    group = db.session.get(DomainGroup, group_id)
+    if group is None or group.deleting_at is not None:
+        abort(404)
+    return group
+
 @app.route('/')
 def index():
     return "Backend is running!"
 
 @app.route('/api/stats', methods=['GET'])
+@versioned
 def get_stats():
-    """获取仪表盘统计数据"""
-    total_domains = LandingDomain.query.count()
-    safe_domains = LandingDomain.query.filter_by(status='safe').count()
-    unsafe_domains = LandingDomain.query.filter_by(status='unsafe').count()
-    
-    return jsonify({
-        'total': total_domains,
-        'safe': safe_domains,
-        'unsafe': unsafe_domains
-    })
+    """
+    获取仪表盘统计数据
+    [新] 一次分组聚合 (或计数器模式下直接读计数器)，?by_group=1 返回各组明细
+    [新] ETag = 全局变更版本号，没有变化时返回 304
+    """
+    by_group = request.args.get('by_group', '0') == '1'
+    return jsonify(build_stats(by_group=by_group))
 
 @app.route('/api/domains', methods=['GET'])
 def get_all_domains():
-    """获取所有落地域名（用于全局搜索或总览）"""
+    """
+    获取所有落地域名（用于全局搜索或总览）
+    - 传 cursor 参数 (第一页为空字符串) 使用键集分页，返回 next_cursor；默认不统计总数
+    - 不传 cursor 时保持原来的 page/per_page 分页
+    - count=exact|estimate|none 控制总数的计算方式
+    """
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), MAX_PER_PAGE)
     status_filter = request.args.get('status')
-    search_query = request.args.get('search')
-
-    query = LandingDomain.query
-
-    if status_filter:
-        query = query.filter_by(status=status_filter)
-    if search_query:
-        query = query.filter(LandingDomain.url.like(f'%{search_query}%'))
-        
-    pagination = query.order_by(LandingDomain.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
-    domains = pagination.items
-    
-    domain_list = []
-    for d in domains:
-        domain_list.append({
-            'id': d.id, 
-            'url': d.url, 
-            'status': d.status, 
-            'last_checked': d.last_checked_at.isoformat() if d.last_checked_at else None,
-            'group': { 'name': d.group.name } if d.group else { 'name': 'N/A' }
+    search_query = (request.args.get('search') or '').strip()
+    cursor = request.args.get('cursor')
+    count_mode = request.args.get('count', 'none' if cursor is not None else 'exact')
+    if count_mode not in ('exact', 'estimate', 'none'):
+        return jsonify({'error': 'count must be exact, estimate or none'}), 400
+
+    query = landing_list_query(status_filter, search_query)
+
+    if cursor is not None:
+        page_query = newest_first(query)
+        if cursor:
+            try:
+                page_query = after_cursor(page_query, decode_cursor(cursor))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        # 多取一行用来判断是否还有下一页
+        rows = page_query.limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        total = count_rows(query, count_mode, status_filter, search_query)
+        return jsonify({
+            'domains': [row_to_dict(row) for row in rows],
+            'next_cursor': encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+            'total': total,
         })
 
+    page = max(page, 1)
+    rows = newest_first(query).limit(per_page).offset((page - 1) * per_page).all()
+    total = count_rows(query, count_mode, status_filter, search_query)
     return jsonify({
-        'domains': domain_list,
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'domains': [row_to_dict(row) for row in rows],
+        'total': total,
+        'pages': -(-total // per_page) if total is not None else None,
         'current_page': page
     })
 
 @app.route('/api/domains', methods=['DELETE'])
 def delete_domains():
-    """批量删除落地域名"""
-    data = request.get_json()
+    """批量删除落地域名 ([新] 分批删除，见 deletions.py)"""
+    data = request.get_json(silent=True)
     if not data or 'ids' not in data:
         return jsonify({'error': 'Missing domain ids'}), 400
+    try:
+        ids_to_delete = _parse_id_list(data, 'ids', limit=None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    ids_to_delete = data['ids']
-    LandingDomain.query.filter(LandingDomain.id.in_(ids_to_delete)).delete(synchronize_session=False)
-    db.session.commit()
-    return jsonify({'message': 'Domains deleted successfully.'})
+    # 返回被删除的 (组, URL)，用于更新跳转路由表
+    removed = delete_domain_rows('landing', ids_to_delete, app.config['DELETE_CHUNK_SIZE'])
+    routing_table.remove_landings(removed)
+    routing_table.publish()
+    return jsonify({'message': 'Domains deleted successfully.', 'deleted': len(removed)})
 
 @app.route('/api/groups', methods=['GET'])
+@versioned
 def get_groups():
-    """获取所有域名组的列表"""
-    groups = DomainGroup.query.order_by(DomainGroup.created_at.desc()).all()
-    return jsonify([group.to_dict() for group in groups])
+    """获取所有域名组的列表 ([新] 支持 ETag / If-None-Match)"""
+    groups = DomainGroup.query.filter(DomainGroup.deleting_at.is_(None)).order_by(DomainGroup.created_at.desc()).all()
+    # [新] 一次分组查询得到所有组的域名数量，避免逐组加载全部子记录
+    counts = domain_counts()
+    return jsonify([group.to_dict(counts.get(group.id, {})) for group in groups])
 
 @app.route('/api/groups', methods=['POST'])
 def create_group():
@@ -128,89 +229,124 @@ def create_group():
         return jsonify({'error': 'Group name already exists'}), 400
     new_group = DomainGroup(name=data['name'])
     db.session.add(new_group)
+    db.session.flush()
+    record('group', new_group.id, action='created')
     db.session.commit()
     return jsonify(new_group.to_dict()), 201
 
 @app.route('/api/groups/<int:group_id>', methods=['GET'])
 def get_group_details(group_id):
-    """获取单个组的详细信息及其所有域名"""
-    group = DomainGroup.query.get_or_404(group_id)
-    transit_domains = [td.to_dict() for td in group.transit_domains]
-    landing_domains = [ld.to_dict() for ld in group.landing_domains]
+    """
+    获取单个组的详细信息
+    [新] 只返回两类域名各自的第一页 (per_page，默认 50)，后续页通过
+    GET /api/groups/<id>/transit_domains|landing_domains?cursor=... 获取；整组导出见 /export
+    """
+    group = live_group_or_404(group_id)
+    per_page = min(max(request.args.get('per_page', DEFAULT_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+    transit_domains, transit_next = domains_page('transit', group_id, per_page=per_page)
+    landing_domains, landing_next = domains_page('landing', group_id, per_page=per_page)
     return jsonify({
-        'group': group.to_dict(),
+        'group': group.to_dict(domain_counts([group_id]).get(group_id, {})),
         'transit_domains': transit_domains,
-        'landing_domains': landing_domains
+        'landing_domains': landing_domains,
+        'transit_next_cursor': transit_next,
+        'landing_next_cursor': landing_next,
     })
 
-@app.route('/api/groups/<int:group_id>', methods=['DELETE'])
-def delete_group(group_id):
-    """删除一个组（及其所有关联域名）"""
-    group = DomainGroup.query.get_or_404(group_id)
-    db.session.delete(group)
+def _group_domains_page(group_id, kind):
+    """[新] 组内中转 / 落地域名的键集分页 (按 id 升序)，可用 status 过滤"""
+    live_group_or_404(group_id)
+    per_page = min(max(request.args.get('per_page', DEFAULT_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+    status_filter = request.args.get('status') or None
+    try:
+        cursor = parse_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    domains, next_cursor = domains_page(kind, group_id, status_filter, cursor, per_page)
+    statuses = domain_counts([group_id]).get(group_id, {}).get(kind, {})
+    total = statuses.get(status_filter, 0) if status_filter else sum(statuses.values())
+    return jsonify({'domains': domains, 'next_cursor': next_cursor, 'total': total})
+
+@app.route('/api/groups/<int:group_id>/transit_domains', methods=['GET'])
+def get_group_transit_domains(group_id):
+    return _group_domains_page(group_id, 'transit')
+
+@app.route('/api/groups/<int:group_id>/landing_domains', methods=['GET'])
+def get_group_landing_domains(group_id):
+    return _group_domains_page(group_id, 'landing')
+
+@app.route('/api/groups/<int:group_id>/export', methods=['GET'])
+def export_group(group_id):
+    """
+    [新] 整组导出为 NDJSON (逐行流式输出，见 group_domains.export_lines)
+    - kind=transit|landing|all (默认 all)，status 可选
+    """
+    group = live_group_or_404(group_id)
+    kind = request.args.get('kind', 'all')
+    if kind not in ('transit', 'landing', 'all'):
+        return jsonify({'error': 'kind must be transit, landing or all'}), 400
+    kinds = ['transit', 'landing'] if kind == 'all' else [kind]
+    lines = export_lines(group, kinds, request.args.get('status') or None)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': f'attachment; filename=group-{group_id}.ndjson',
+    })
+
+@app.route('/api/groups/<int:group_id>', methods=['PATCH'])
+def update_group(group_id):
+    """[新] 修改组设置 (目前支持自定义危险关键词)"""
+    group = live_group_or_404(group_id)
+    data = request.get_json()
+    if not data or 'danger_keywords' not in data:
+        return jsonify({'error': 'Nothing to update'}), 400
+
+    keywords = data['danger_keywords']
+    if isinstance(keywords, list):
+        keywords = '\n'.join(str(k) for k in keywords)
+    # 空列表/空字符串 = 恢复使用默认关键词
+    group.danger_keywords = '\n'.join(parse_keywords(keywords)) or None
+    record('group', group.id, action='updated')
     db.session.commit()
-    return jsonify({'message': f'Group "{group.name}" deleted successfully.'})
+    return jsonify(group.to_dict())
 
-# --- [新] 辅助函数：处理中转域名添加 ---
+@app.route('/api/groups/<int:group_id>', methods=['DELETE'])
+def delete_group(group_id):
+    """
+    删除一个组（及其所有关联域名）
+    [新] 分批的集合式删除 (deletions.py)；组内域名超过 DELETE_BACKGROUND_THRESHOLD 或 ?background=1 时
+         标记后在后台删除，立即返回 202
+    """
+    group = live_group_or_404(group_id)
+    name = group.name
+    background = request.args.get('background') == '1' or \
+        group_domain_total(group_id) > app.config['DELETE_BACKGROUND_THRESHOLD']
+    if background:
+        mark_group_deleting(group)
+        routing_table.remove_group(group_id)
+        routing_table.publish()
+        delete_group_in_background(app, group_id)
+        return jsonify({'message': f'Group "{name}" is being deleted in the background.', 'background': True}), 202
+
+    delete_group_rows(group_id, app.config['DELETE_CHUNK_SIZE'])
+    routing_table.remove_group(group_id)
+    routing_table.publish()
+    return jsonify({'message': f'Group "{name}" deleted successfully.', 'background': False})
+
+# --- [新] 辅助函数：处理中转域名添加 (批量导入，见 importer.py) ---
 def process_and_add_transit_domains(urls_input, group_id, path_type, custom_path):
-    if isinstance(urls_input, str):
-        urls_to_add = [url.strip() for url in re.split(r'[\s,;\n]+', urls_input)]
-    elif isinstance(urls_input, list):
-        urls_to_add = [url.strip() for url in urls_input]
-    else:
-        return 0, 0
-
-    added_count = 0
-    skipped_count = 0
-
-    for url in urls_to_add:
-        if not url:
-            continue
-        
-        path = "/go" # 默认路径
-        if path_type == 'custom':
-            if not custom_path:
-                custom_path = "/custom" # 备用自定义路径
-            path = custom_path if custom_path.startswith('/') else f"/{custom_path}"
-        elif path_type == 'random':
-            path = generate_random_path(random.randint(5, 8))
-
-        # 检查 "域名+路径" 组合是否已存在
-        exists = TransitDomain.query.filter_by(url=url, path=path).first()
-        
-        if not exists:
-            new_domain = TransitDomain(url=url, group_id=group_id, path=path)
-            db.session.add(new_domain)
-            added_count += 1
-        else:
-            skipped_count += 1
-            
-    db.session.commit()
-    return added_count, skipped_count
+    importer = BulkImporter(TransitDomain, group_id, path_type, custom_path)
+    return importer.add_all(split_urls(urls_input))
 
 # --- 辅助函数：处理落地域名添加 ---
 def process_and_add_landing_domains(urls_input, group_id, DomainModel):
-    if isinstance(urls_input, str):
-        urls_to_add = [url.strip() for url in re.split(r'[\s,;\n]+', urls_input)]
-    elif isinstance(urls_input, list):
-        urls_to_add = [url.strip() for url in urls_input]
-    else:
-        return 0
-
-    added_count = 0
-    for url in urls_to_add:
-        if url and not DomainModel.query.filter_by(url=url).first():
-            new_domain = DomainModel(url=url, group_id=group_id)
-            db.session.add(new_domain)
-            added_count += 1
-    db.session.commit()
+    importer = BulkImporter(DomainModel, group_id)
+    added_count, _ = importer.add_all(split_urls(urls_input))
     return added_count
 
 # --- 批量添加 API ---
 @app.route('/api/groups/<int:group_id>/landing_domains', methods=['POST'])
 def add_landing_domains_to_group(group_id):
     """批量添加落地域名到指定组"""
-    group = DomainGroup.query.get_or_404(group_id)
+    group = live_group_or_404(group_id)
     data = request.get_json()
     if not data or 'urls' not in data:
         return jsonify({'error': 'Missing urls'}), 400
@@ -221,7 +357,7 @@ def add_landing_domains_to_group(group_id):
 @app.route('/api/groups/<int:group_id>/transit_domains', methods=['POST'])
 def add_transit_domains_to_group(group_id):
     """批量添加中转域名到指定组（支持自定义路径）"""
-    group = DomainGroup.query.get_or_404(group_id)
+    group = live_group_or_404(group_id)
     data = request.get_json()
     if not data or 'urls' not in data:
         return jsonify({'error': 'Missing urls'}), 400
@@ -239,29 +375,75 @@ def add_transit_domains_to_group(group_id):
         
     return jsonify({'message': message}), 201
 
+# --- [新] 流式上传导入 API (CSV 或每行一个的文本文件) ---
+def _import_from_upload(importer):
+    """
+    从 multipart 文件字段 'file' 或原始请求体逐行读取并导入
+    不需要把整个列表放进一个 JSON 请求体
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        is_csv = upload.mimetype == 'text/csv' or (upload.filename or '').lower().endswith('.csv')
+    else:
+        stream = request.stream
+        is_csv = request.mimetype == 'text/csv'
+    for url in iter_uploaded_urls(stream, is_csv):
+        importer.add(url)
+    return importer.finish()
+
+@app.route('/api/groups/<int:group_id>/landing_domains/import', methods=['POST'])
+def import_landing_domains(group_id):
+    """流式批量导入落地域名"""
+    group = live_group_or_404(group_id)
+    added_count, skipped_count = _import_from_upload(BulkImporter(LandingDomain, group.id))
+    return jsonify({
+        'message': f'Successfully added {added_count} landing domains.',
+        'added': added_count,
+        'skipped': skipped_count
+    }), 201
+
+@app.route('/api/groups/<int:group_id>/transit_domains/import', methods=['POST'])
+def import_transit_domains(group_id):
+    """流式批量导入中转域名 (路径参数通过 query string 传入: ?path_type=random)"""
+    group = live_group_or_404(group_id)
+    importer = BulkImporter(
+        TransitDomain, group.id,
+        request.args.get('path_type', 'default'),
+        request.args.get('custom_path', '')
+    )
+    added_count, skipped_count = _import_from_upload(importer)
+    return jsonify({
+        'message': f"成功添加 {added_count} 个新中转域名。",
+        'added': added_count,
+        'skipped': skipped_count
+    }), 201
+
 # --- [新] 核心跳转逻辑（动态路径） ---
 @app.route('/<path:path>')
 def dynamic_redirect_to_landing(path):
     """
     这是新的核心动态跳转路由。
     它会匹配所有路径，例如 /go, /aB3xZ7, /my/custom/path
+    [新] 按结果记录跳转延迟 (metrics.observe_redirect)
     """
-    
+    start = time.perf_counter()
+    outcome, response = _redirect_response(path)
+    metrics.observe_redirect('flask', outcome, time.perf_counter() - start)
+    return response
+
+def _redirect_response(path):
+    """返回 (结果, 响应)，结果是 redirect_request_seconds 的 outcome 标签"""
     # 1. [安全] 过滤掉对后台管理页面的访问
     #    (这是 Nginx 规则 1 的第二层保险)
-    admin_paths = ['api', 'assets', 'all-domains', 'group', 'favicon.ico']
-    if path == '/' or any(path.startswith(p) for p in admin_paths):
+    #    [新] api/assets/all-domains/group/favicon.ico 前缀合并成一个预编译正则
+    if is_admin_path(path):
         # 如果 Nginx 配置错误，Flask 会在这里捕获并拒绝
-        return "Not Found (Admin Endpoint)", 404
+        return 'admin_path', ("Not Found (Admin Endpoint)", 404)
 
-    # 2. [防爬虫] User-Agent 过滤
-    user_agent = request.headers.get('User-Agent', '').lower()
-    blocked_uas = [
-        'bot', 'spider', 'crawler', 'python-requests', 'curl', 
-        'wget', 'httpclient', 'java', 'go-http-client'
-    ]
-    if any(ua in user_agent for ua in blocked_uas):
-        return "Not Found (Bot)", 404
+    # 2. [防爬虫] User-Agent 过滤 (关键词见 Config.BLOCKED_USER_AGENTS，一次正则匹配 + LRU 缓存)
+    if ua_filter.is_blocked(request.headers.get('User-Agent', '')):
+        return 'bot_blocked', ("Not Found (Bot)", 404)
 
     # 3. 获取域名和路径
     transit_url = request.host
@@ -270,86 +452,280 @@ def dynamic_redirect_to_landing(path):
     
     transit_path = f"/{path}"
 
-    # 4. 查找有效且健康的 "域名+路径" 组合
-    transit_domain = TransitDomain.query.filter_by(
-        url=transit_url, 
-        path=transit_path,
-        status='safe'  # [新] 只使用健康的中转链接
-    ).first()
+    # 4. 从内存路由表查找有效且健康的 "域名+路径" 组合 (不访问数据库)
+    found = routing_table.lookup(transit_url, transit_path)
 
-    if not transit_domain:
+    if found is None:
         # 找不到，或者中转链接本身不健康
-        return "Invalid or unhealthy transit link.", 404
-
-    # 5. 查找该组所有“安全”的落地域名
-    group_id = transit_domain.group_id
-    safe_landing_domains = LandingDomain.query.filter_by(
-        group_id=group_id,
-        status='safe'
-    ).all()
+        return 'invalid_link', ("Invalid or unhealthy transit link.", 404)
+    transit_route, safe_landings = found
+
+    # 5. 该组所有“安全”的落地域名
+    if not safe_landings:
+        return 'no_healthy_landing', ("No healthy landing page available.", 404)
+
+    # 6. [新] 按权重随机选择一个 (O(1) 别名表)；粘性模式下按访客一致性哈希
+    if app.config['REDIRECT_STICKY']:
+        visitor = request.cookies.get(app.config['STICKY_COOKIE']) or \
+            request.headers.get('X-Real-IP') or request.remote_addr or ''
+        chosen = safe_landings.pick_sticky(visitor)
+    else:
+        chosen = safe_landings.pick()
 
-    if not safe_landing_domains:
-        return "No healthy landing page available.", 404
-
-    # 6. 从健康列表中随机选择一个
-    chosen_domain = random.choice(safe_landing_domains)
+    # [新] 流量统计: 只在进程内计数，后台批量写入 (见 hits.py)
+    if app.config['HIT_COUNTING']:
+        hit_counter.record(transit_route, chosen.id)
 
     # 7. [防红优化] 返回 JS/Meta 重定向页面
-    html = f"""
-    <html>
-        <head>
-            <title>Loading...</title>
-            <meta http-equiv="refresh" content="0;url={chosen_domain.url}" />
-        </head>
-        <body>
-            <p>Loading, please wait...</p>
-            <script type="text/javascript">
-                window.location.href = "{chosen_domain.url}";
-            </script>
-        </body>
-    </html>
-    """
-    return html
+    #    [新] 页面在路由表更新时已按落地 URL 渲染好 (见 redirects.render_redirect_page)
+    return 'success', app.response_class(chosen.body, mimetype='text/html')
+
+# --- [新] Prometheus 指标 ---
+@app.route('/metrics')
+def get_metrics():
+    """所有 worker 汇总后的指标 + 从数据库读取的域名数量 / 检测队列长度 (只在内部网络抓取，nginx 不转发)"""
+    if not metrics.enabled():
+        return "Not Found", 404
+    body, content_type = metrics.render(app)
+    return app.response_class(body, content_type=content_type)
+
+# --- [新] 修改落地域名权重 ---
+@app.route('/api/landing_domains/<int:domain_id>', methods=['PATCH'])
+def update_landing_domain(domain_id):
+    """{'weight': 0-100}，0 表示不再分配流量 (仍然参与检测)"""
+    domain = LandingDomain.query.get_or_404(domain_id)
+    data = request.get_json() or {}
+    weight = data.get('weight')
+    if not isinstance(weight, int) or isinstance(weight, bool) or not 0 <= weight <= MAX_WEIGHT:
+        return jsonify({'error': f'weight must be an integer between 0 and {MAX_WEIGHT}'}), 400
+
+    domain.weight = weight
+    record('domains', domain.group_id, changes=[
+        {'kind': 'landing', 'id': domain.id, 'group_id': domain.group_id, 'weight': weight}])
+    db.session.commit()
+    if domain.status == 'safe':
+        routing_table.set_landing_weight(domain.group_id, domain.url, weight)
+        routing_table.publish()
+    return jsonify(domain.to_dict())
+
+# --- [新] 流量统计 API ---
+MAX_TRAFFIC_MINUTES = 7 * 24 * 60
+
+def _traffic_window():
+    """?minutes=60 (时间窗口) &bucket=1 (每个点多少分钟，默认让序列不超过 120 个点)"""
+    minutes = min(max(request.args.get('minutes', 60, type=int), 1), MAX_TRAFFIC_MINUTES)
+    bucket = request.args.get('bucket', type=int) or max(1, -(-minutes // 120))
+    since = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=minutes - 1)
+    return minutes, max(bucket, 1), since
+
+def _traffic_response(column, value, **extra):
+    minutes, bucket, since = _traffic_window()
+    series, total = traffic_series(column, value, since, bucket)
+    return jsonify({'minutes': minutes, 'bucket_minutes': bucket, 'total': total, 'series': series, **extra})
+
+@app.route('/api/groups/<int:group_id>/traffic', methods=['GET'])
+def get_group_traffic(group_id):
+    group = live_group_or_404(group_id)
+    _, _, since = _traffic_window()
+    return _traffic_response(RedirectHit.group_id, group.id, **group_traffic_breakdown(group.id, since))
+
+@app.route('/api/landing_domains/<int:domain_id>/traffic', methods=['GET'])
+def get_landing_traffic(domain_id):
+    # 已删除的域名仍然可以查询历史流量
+    return _traffic_response(RedirectHit.landing_id, domain_id)
+
+@app.route('/api/transit_domains/<int:domain_id>/traffic', methods=['GET'])
+def get_transit_traffic(domain_id):
+    return _traffic_response(RedirectHit.transit_id, domain_id)
+
+# --- [新] 检测历史 API (check_history.py) ---
+MAX_HISTORY_HOURS = 365 * 24
+
+def _history_window():
+    """?hours=24 (时间窗口) &bucket=1 (每个点多少小时，默认让序列不超过 120 个点)"""
+    hours = min(max(request.args.get('hours', 24, type=int), 1), MAX_HISTORY_HOURS)
+    bucket = request.args.get('bucket', type=int) or max(1, -(-hours // 120))
+    return hours, max(bucket, 1), datetime.utcnow() - timedelta(hours=hours)
+
+def _history_response(kind, domain_id):
+    hours, bucket, since = _history_window()
+    summary, series, recent = domain_history(kind, domain_id, since, bucket)
+    return jsonify({'hours': hours, 'bucket_hours': bucket, 'summary': summary, 'series': series, 'recent': recent})
+
+@app.route('/api/landing_domains/<int:domain_id>/checks', methods=['GET'])
+def get_landing_checks(domain_id):
+    """落地域名的可用率 / 延迟历史和最近的检测明细"""
+    return _history_response('landing', domain_id)
+
+@app.route('/api/transit_domains/<int:domain_id>/checks', methods=['GET'])
+def get_transit_checks(domain_id):
+    return _history_response('transit', domain_id)
+
+@app.route('/api/groups/<int:group_id>/check_summary', methods=['GET'])
+def get_group_check_summary(group_id):
+    """组内每个域名的可用率和平均延迟 (?hours=24)"""
+    group = live_group_or_404(group_id)
+    hours, _, since = _history_window()
+    return jsonify({'hours': hours, **group_check_summary(group.id, since)})
 
 # --- 手动触发检测 API ---
+def _parse_id_list(data, name, limit=MAX_TARGET_IDS):
+    ids = data.get(name) or []
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError(f"'{name}' must be a list of integer ids.")
+    if limit is not None and len(ids) > limit:
+        raise ValueError(f"At most {limit} ids in '{name}'.")
+    return sorted(set(ids))
+
 @app.route('/api/tasks/run_check', methods=['POST'])
 def trigger_check_job():
-    """手动触发一次健康检测"""
-    Thread(target=run_check_job, args=[app]).start()
-    return jsonify({'message': 'Health check job triggered.'})
+    """
+    手动触发一次健康检测
+    [新] 不再每次都启动新线程，而是排进检测任务队列 (check_jobs.py):
+         相同目标 (或全量检测) 已在排队/执行时直接返回那个任务
+    请求体 (可选): {"group_id": 3} 只检测一个组，
+                   {"landing_ids": [...], "transit_ids": [...]} 只检测指定域名，为空时检测全部
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        if data.get('group_id') is not None:
+            group_id = data['group_id']
+            group = db.session.get(DomainGroup, group_id) if isinstance(group_id, int) else None
+            if group is None or group.deleting_at is not None:
+                return jsonify({'error': 'Group not found'}), 404
+            job, joined = enqueue_check('group', group_id=group_id)
+        elif 'landing_ids' in data or 'transit_ids' in data:
+            landing_ids = _parse_id_list(data, 'landing_ids')
+            transit_ids = _parse_id_list(data, 'transit_ids')
+            if not landing_ids and not transit_ids:
+                return jsonify({'error': 'No domain ids given.'}), 400
+            job, joined = enqueue_check('domains', landing_ids=landing_ids, transit_ids=transit_ids)
+        else:
+            job, joined = enqueue_check('all')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # 没有调度器 (SCHEDULER_ENABLED=0) 时没有 leader 处理队列，在后台线程中执行
+    if not app.config['SCHEDULER_ENABLED'] and not joined:
+        Thread(target=process_check_queue, args=[app], daemon=True).start()
+
+    message = 'Joined a health check job that is already queued or running.' if joined else 'Health check job queued.'
+    return jsonify({'message': message, 'joined': joined, 'job': job.to_dict()}), 202
+
+# --- [新] 检测任务进度 / 取消 API ---
+@app.route('/api/tasks/check_jobs', methods=['GET'])
+def list_check_jobs():
+    """最近的检测任务 (?limit=20)"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    return jsonify([job.to_dict() for job in recent_jobs(limit)])
+
+@app.route('/api/tasks/check_jobs/<int:job_id>', methods=['GET'])
+def get_check_job(job_id):
+    """任务进度: checked/total、unsafe 数量、预计剩余秒数"""
+    job = db.session.get(CheckJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Check job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/tasks/check_jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_check_job(job_id):
+    """取消任务: 排队中的立即取消，执行中的在下一次写进度时停止 (已提交的结果保留)"""
+    job = db.session.get(CheckJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Check job not found'}), 404
+    if job.status not in ('queued', 'running'):
+        return jsonify({'error': f'Check job is already {job.status}.'}), 409
+    return jsonify(cancel_job(job).to_dict())
 
 # --- [新] 删除中转域名 API ---
 @app.route('/api/transit_domains/<int:domain_id>', methods=['DELETE'])
 def delete_transit_domain(domain_id):
     """删除单个中转域名"""
-    domain = TransitDomain.query.get_or_404(domain_id)
-    db.session.delete(domain)
-    db.session.commit()
+    TransitDomain.query.get_or_404(domain_id)
+    _delete_transits([domain_id])
     return jsonify({'message': 'Transit domain deleted successfully.'})
 
+@app.route('/api/transit_domains', methods=['DELETE'])
+def delete_transit_domains():
+    """[新] 批量删除中转域名 (与 DELETE /api/domains 对应)"""
+    data = request.get_json(silent=True)
+    if not data or 'ids' not in data:
+        return jsonify({'error': 'Missing domain ids'}), 400
+    try:
+        ids_to_delete = _parse_id_list(data, 'ids', limit=None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    removed = _delete_transits(ids_to_delete)
+    return jsonify({'message': 'Transit domains deleted successfully.', 'deleted': len(removed)})
+
+def _delete_transits(ids):
+    removed = delete_domain_rows('transit', ids, app.config['DELETE_CHUNK_SIZE'])
+    for url, path in removed:
+        routing_table.remove_transit(url, path)
+    routing_table.publish()
+    return removed
+
 # --- [新] 调度器控制 API ---
+# [新] 暂停状态保存在数据库中，对所有 worker 生效
 @app.route('/api/scheduler/pause', methods=['POST'])
 def pause_scheduler():
     """暂停自动检测任务"""
-    scheduler.pause_job('DomainCheckJob')
+    check_job.set_paused(True)
     return jsonify({'status': 'paused'})
 
 @app.route('/api/scheduler/resume', methods=['POST'])
 def resume_scheduler():
     """恢复自动检测任务"""
-    scheduler.resume_job('DomainCheckJob')
+    check_job.set_paused(False)
     return jsonify({'status': 'running'})
 
 @app.route('/api/scheduler/status', methods=['GET'])
 def get_scheduler_status():
-    """获取自动检测任务的状态"""
-    job = scheduler.get_job('DomainCheckJob')
-    if not job:
+    """获取自动检测任务的集群状态 (来自数据库，而不是当前 worker)"""
+    state = check_job.state()
+    if not state:
         return jsonify({'status': 'not_found'})
-    if job.next_run_time is None:
-        return jsonify({'status': 'paused'})
-    else:
-        return jsonify({'status': 'running', 'next_run': job.next_run_time.isoformat()})
+    result = state.to_dict()
+    result['status'] = 'paused' if state.paused else 'running'
+    if not state.paused:
+        result['next_run'] = result['next_run_at']
+    return jsonify(result)
+
+# --- [新] 变更推送 API (change_feed.py) ---
+def _since_param():
+    """从 ?since= 或 SSE 重连时浏览器带的 Last-Event-ID 读取客户端已处理到的事件 id"""
+    return parse_since(request.args.get('since', request.headers.get('Last-Event-ID')))
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+    长轮询: 返回 since 之后的事件 {'version', 'events', 'reset'}；没有新事件时最多等待 wait 秒
+    不传 since 时只返回当前版本号 (客户端从这里开始)
+    """
+    try:
+        since = _since_param()
+    except ValueError:
+        return jsonify({'error': 'since must be a non-negative integer'}), 400
+    if since is None:
+        return jsonify({'version': change_version.read(), 'events': [], 'reset': False})
+    wait = min(max(request.args.get('wait', 0, type=float), 0), app.config['CHANGE_LONG_POLL_SECONDS'])
+    events, version, reset = wait_for_events(since, wait, app.config['CHANGE_POLL_SECONDS'])
+    return jsonify({'version': version, 'events': events, 'reset': reset})
+
+@app.route('/api/changes/stream', methods=['GET'])
+def stream_changes():
+    """SSE: 每个事件一条 data (JSON)；连接保持 CHANGE_STREAM_MAX_SECONDS 后关闭，浏览器带 Last-Event-ID 自动重连"""
+    try:
+        since = _since_param()
+    except ValueError:
+        return jsonify({'error': 'since must be a non-negative integer'}), 400
+    config = app.config
+    stream = sse_stream(since, config['CHANGE_STREAM_MAX_SECONDS'], config['CHANGE_POLL_SECONDS'],
+                        config['CHANGE_HEARTBEAT_SECONDS'])
+    return Response(stream_with_context(stream), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',   # nginx 不缓冲，事件立即送达
+    })
 
 # --- [新] 跳转测试 API ---
 @app.route('/api/test_redirect', methods=['POST'])
@@ -394,6 +770,23 @@ def test_redirect():
         'group_name': transit_domain.group.name
     })
 
+# --- [新] 命令行: flask rebuild-counters ---
+@app.cli.command('rebuild-counters')
+def rebuild_counters_command():
+    """从域名表重新计算统计计数器 (开启 STATS_COUNTER_MODE 前执行一次)"""
+    rows = rebuild_counters()
+    print(f"Rebuilt {rows} counter rows.")
+
+# --- [新] 命令行: flask export-routing ---
+@app.cli.command('export-routing')
+def export_routing_command():
+    """立即生成 nginx 路由快照 (写到 NGINX_SNAPSHOT_DIR)"""
+    directory = app.config['NGINX_SNAPSHOT_DIR']
+    if not directory:
+        print("NGINX_SNAPSHOT_DIR is not set.")
+        return
+    snapshot_exporter.export(app, directory, routing_table._read_version())
+
 # --- Main Execution ---
 if __name__ == '__main__':
     # [!!! 关键修复 !!!] ---
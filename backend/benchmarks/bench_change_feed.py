@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_change_feed.py
+"""
+仪表盘刷新的基准: 每次完整查询 /api/stats + /api/groups (旧的定时刷新) vs 带 If-None-Match 的重新验证 (数据没变时 304)
+另外测一次变更从提交到长轮询 (/api/changes) 收到的延迟
+用法: python benchmarks/bench_change_feed.py [--groups 1000 --landing 50 --transit 20 --rounds 50]
+默认使用临时 SQLite 数据库，也可以通过 DATABASE_URL 指定
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench_change_feed.db')
+    os.environ.setdefault('CHANGE_VERSION_FILE', os.path.join(workdir, 'changes.version'))
+    os.environ.setdefault('ROUTING_VERSION_FILE', os.path.join(workdir, 'routing.version'))
+
+from benchmarks.loadgen import percentile  # noqa: E402
+
+DASHBOARD_URLS = ('/api/stats', '/api/groups')
+
+
+def timed_rounds(client, rounds, conditional):
+    latencies, statuses = [], {}
+    etags = {}
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for url in DASHBOARD_URLS:
+            headers = {'If-None-Match': etags[url]} if conditional and url in etags else {}
+            response = client.get(url, headers=headers)
+            etags[url] = response.headers.get('ETag', '').strip('"')
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {'p50_ms': round(percentile(latencies, 50), 2), 'p99_ms': round(percentile(latencies, 99), 2),
+            'statuses': statuses}
+
+
+def push_latency(app, client):
+    """提交一个变更后，已在等待的长轮询多久收到"""
+    from models import db, DomainGroup
+    from change_feed import record
+    since = client.get('/api/changes').get_json()['version']
+    committed = {}
+
+    def change():
+        time.sleep(0.5)
+        with app.app_context():
+            group_id = db.session.query(db.func.min(DomainGroup.id)).scalar()
+            record('group', group_id, action='updated')
+            db.session.commit()
+        committed['at'] = time.perf_counter()
+
+    thread = threading.Thread(target=change)
+    thread.start()
+    client.get(f'/api/changes?since={since}&wait=10')
+    received = time.perf_counter()
+    thread.join()
+    return round((received - committed['at']) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--groups', type=int, default=1000)
+    parser.add_argument('--landing', type=int, default=50)
+    parser.add_argument('--transit', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    from app import app
+    from models import db, DomainGroup
+    from benchmarks.seed import seed_fleet
+
+    with app.app_context():
+        db.create_all()
+        if DomainGroup.query.count() == 0:
+            seed_fleet(args.groups, args.landing, args.transit)
+
+    client = app.test_client()
+    results = {'benchmark': 'change_feed', 'groups': args.groups, 'landing': args.landing,
+               'transit': args.transit, 'rounds': args.rounds}
+    results['full_refresh'] = timed_rounds(client, args.rounds, conditional=False)
+    results['conditional_refresh'] = timed_rounds(client, args.rounds, conditional=True)
+    results['long_poll_delivery_ms'] = push_latency(app, client)
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
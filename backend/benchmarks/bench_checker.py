@@ -0,0 +1,67 @@
+# backend/benchmarks/bench_checker.py
+"""
+检测器基准测试: 逐个检测 (旧实现) vs CheckEngine 并发检测
+用法: python benchmarks/bench_checker.py [--urls 200] [--timeout 2]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checker import CheckEngine, check_domain_safety  # noqa: E402
+from benchmarks.fake_farm import FakeFarm  # noqa: E402
+
+# 每 20 个 URL 的构成: 14 正常, 2 慢, 2 失败, 1 挂起, 1 含关键词
+MIX = ['ok'] * 14 + ['slow'] * 2 + ['fail'] * 2 + ['hang'] + ['bad']
+EXPECTED = {'ok': 'safe', 'slow': 'safe', 'fail': 'unsafe', 'hang': 'unsafe', 'bad': 'unsafe'}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=200)
+    parser.add_argument('--hosts', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--skip-sequential', action='store_true')
+    args = parser.parse_args()
+
+    with FakeFarm() as farm:
+        kinds = [MIX[i % len(MIX)] for i in range(args.urls)]
+        urls = [farm.url(kind, host=1 + i % args.hosts, n=i) for i, kind in enumerate(kinds)]
+        expected = [EXPECTED[k] for k in kinds]
+        results = {}
+
+        if not args.skip_sequential:
+            start = time.perf_counter()
+            sequential = [check_domain_safety(url, timeout=args.timeout) for url in urls]
+            results['sequential_seconds'] = round(time.perf_counter() - start, 3)
+            assert sequential == expected, 'sequential verdicts differ from expected'
+
+        engine = CheckEngine(args.concurrency, args.per_host, args.timeout)
+        start = time.perf_counter()
+        concurrent = [None] * len(urls)
+        for i, result in engine.run(urls):
+            concurrent[i] = result.status
+        results['concurrent_seconds'] = round(time.perf_counter() - start, 3)
+        assert concurrent == expected, 'concurrent verdicts differ from expected'
+
+        results.update({
+            'benchmark': 'checker',
+            'urls': args.urls,
+            'hosts': args.hosts,
+            'timeout': args.timeout,
+            'concurrency': args.concurrency,
+            'per_host_limit': args.per_host,
+            'throughput_per_second': round(args.urls / results['concurrent_seconds'], 1),
+        })
+        if 'sequential_seconds' in results:
+            results['speedup'] = round(results['sequential_seconds'] / results['concurrent_seconds'], 1)
+        print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+# backend/benchmarks/bench_concurrency.py
+"""
+数据库并发基准: 跳转侧的读取和检测器 / 跳转统计的写入同时进行
+  reader  x N: 每 20ms 一次跳转侧读取: 大多是按 (域名, 路径) 查中转 + 组内健康落地 (/api/test_redirect 的查询)，
+               每 20 次中各有一次路由表重建查询和 /api/stats 聚合
+  checker x 1: 每 50ms 一次 _flush_results (200 个域名的状态 + 检测历史，检测器真实的写入路径)
+  hits    x 1: 每 200ms 一次跳转计数 upsert (500 行)
+每个角色是独立的进程 (与 gunicorn worker 一样各自持有连接)，记录每次操作的耗时和 database is locked 错误数。
+SQLite 上依次测试 rollback (旧的默认: DELETE 日志 + synchronous=FULL) 和 wal (database.py 的默认设置)；
+DATABASE_URL 指向 PostgreSQL 时只测试 postgresql 一种。
+用法: python benchmarks/bench_concurrency.py [--readers 4 --duration 10]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_concurrency.db')
+os.environ.setdefault('ROUTING_VERSION_FILE', os.path.join(tempfile.mkdtemp(), 'routing.version'))
+
+from benchmarks.loadgen import percentile  # noqa: E402
+
+SQLITE_MODES = {
+    'rollback': {'SQLITE_WAL': '0', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'wal': {'SQLITE_WAL': '1', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+}
+ROLE_INTERVALS = {'reader': 0.02, 'checker': 0.05, 'hits': 0.2}
+
+
+def _summary(latencies, locked, seconds):
+    latencies = sorted(latencies)
+    return {
+        'ops': len(latencies),
+        'ops_per_second': round(len(latencies) / seconds, 1),
+        'locked_errors': locked,
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+    }
+
+
+def run_role(role, duration):
+    """子进程: 执行 duration 秒某个角色的操作，输出 JSON"""
+    from sqlalchemy.exc import OperationalError
+    from app import app
+    from models import db, LandingDomain, TransitDomain, RedirectHit, upsert_increment
+    from routing import safe_transits_query, safe_landings_query
+    from stats import build_stats
+    from checker import _flush_results, ProbeResult
+    from check_history import history_row
+
+    rng = random.Random(os.getpid())
+    latencies, locked = [], 0
+    with app.app_context():
+        landing = db.session.query(LandingDomain.id, LandingDomain.url, LandingDomain.group_id, LandingDomain.status,
+                                   LandingDomain.weight).all()
+        db.session.commit()
+
+        transits = db.session.query(TransitDomain.url, TransitDomain.path).all()
+        db.session.commit()
+
+        def reader_op(n):
+            if n % 20 == 0:
+                safe_transits_query().all()
+                safe_landings_query().all()
+            elif n % 20 == 10:
+                build_stats()
+            else:
+                url, path = rng.choice(transits)
+                transit = TransitDomain.query.filter_by(url=url, path=path).first()
+                LandingDomain.query.filter_by(group_id=transit.group_id, status='safe').all()
+            db.session.commit()
+
+        def checker_op(n):
+            now = datetime.utcnow()
+            batch, history = [], []
+            for row in rng.sample(landing, 200):
+                status = 'unsafe' if rng.random() < 0.05 else 'safe'
+                batch.append((row, {'id': row.id, 'status': status, 'last_checked_at': now,
+                                    'next_check_at': now + timedelta(minutes=5), 'check_streak': 1,
+                                    'flap_count': 0}))
+                history.append(history_row('landing', row.id, row.group_id,
+                                           ProbeResult(status, 200, 40, 1000, None, None), now))
+            _flush_results(batch, [], history)
+
+        def hits_op(n):
+            minute = datetime.utcnow().replace(second=0, microsecond=0)
+            rows = [{'minute': minute, 'transit_id': rng.randrange(1, 2000), 'landing_id': row.id,
+                     'group_id': row.group_id, 'hits': 1} for row in rng.sample(landing, 500)]
+            upsert_increment(RedirectHit, ('minute', 'transit_id', 'landing_id'), 'hits', rows)
+            db.session.commit()
+
+        op = {'reader': reader_op, 'checker': checker_op, 'hits': hits_op}[role]
+        interval = ROLE_INTERVALS[role]
+        start = time.perf_counter()
+        n = 0
+        while time.perf_counter() - start < duration:
+            began = time.perf_counter()
+            try:
+                op(n)
+                latencies.append((time.perf_counter() - began) * 1000)
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' not in str(e):
+                    raise
+                locked += 1
+            n += 1
+            if interval:
+                time.sleep(interval)
+    print(json.dumps(_summary(latencies, locked, duration)))
+
+
+def prepare_database(groups, landing, transit):
+    from app import app
+    from models import db, DomainGroup
+    from benchmarks.seed import seed_fleet
+
+    with app.app_context():
+        db.create_all()
+        if DomainGroup.query.count() == 0:
+            seed_fleet(groups, landing, transit)
+        dialect = db.session.get_bind().dialect.name
+        db.session.remove()
+        db.engine.dispose()   # 切换 journal_mode 时不能有其他连接
+        return dialect
+
+
+def set_journal_mode(mode):
+    """journal_mode 保存在数据库文件里，切换模式前由父进程单独设置"""
+    import sqlite3
+    path = os.environ['DATABASE_URL'].split('sqlite:///', 1)[1]
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {'WAL' if mode == 'wal' else 'DELETE'}")
+    conn.close()
+
+
+def run_mode(env_overrides, readers, duration):
+    env = dict(os.environ, **env_overrides)
+    roles = ['reader'] * readers + ['checker', 'hits']
+    processes = [
+        (role, subprocess.Popen([sys.executable, os.path.abspath(__file__), '--role', role,
+                                 '--duration', str(duration)], env=env, stdout=subprocess.PIPE, text=True))
+        for role in roles
+    ]
+    results = {}
+    for role, process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"{role} process failed")
+        results.setdefault(role, []).append(json.loads(output.strip().splitlines()[-1]))
+    merged = {}
+    for role, items in results.items():
+        merged[role] = {
+            'processes': len(items),
+            'ops_per_second': round(sum(i['ops_per_second'] for i in items), 1),
+            'locked_errors': sum(i['locked_errors'] for i in items),
+            'p50_ms': max(i['p50_ms'] or 0 for i in items),
+            'p99_ms': max(i['p99_ms'] or 0 for i in items),
+            'max_ms': max(i['max_ms'] or 0 for i in items),
+        }
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--groups', type=int, default=300)
+    parser.add_argument('--landing', type=int, default=50)
+    parser.add_argument('--transit', type=int, default=20)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--role', choices=sorted(ROLE_INTERVALS))
+    args = parser.parse_args()
+
+    if args.role:
+        run_role(args.role, args.duration)
+        return
+
+    dialect = prepare_database(args.groups, args.landing, args.transit)
+    results = {'benchmark': 'db_concurrency', 'database': dialect, 'readers': args.readers,
+               'duration': args.duration}
+    if dialect == 'sqlite':
+        for mode, env in SQLITE_MODES.items():
+            set_journal_mode(mode)
+            results[mode] = run_mode(env, args.readers, args.duration)
+    else:
+        results[dialect] = run_mode({}, args.readers, args.duration)
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_conditional.py
+"""
+变化感知探测基准测试: 同一批页面连续检测多轮
+  full:        每轮都下载并扫描整个页面 (旧行为)
+  conditional: 带上上一轮的 Validator，支持 ETag 的页面走 304，其余页面比较摘要后跳过扫描
+用法: python benchmarks/bench_conditional.py [--urls 400] [--rounds 3] [--static 0.5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checker import CheckEngine  # noqa: E402
+from benchmarks.fake_farm import FakeFarm  # noqa: E402
+
+
+def run_rounds(engine, urls, rounds, conditional):
+    validators = [None] * len(urls)
+    totals = {'seconds': 0.0, 'bytes_read': 0, 'not_modified': 0, 'hash_reused': 0}
+    verdicts = None
+    for _ in range(rounds):
+        verdicts = [None] * len(urls)
+        start = time.perf_counter()
+        for i, result in engine.run(urls, validators=validators if conditional else None):
+            verdicts[i] = result.status
+            validators[i] = result.validator or validators[i]
+            totals['bytes_read'] += result.bytes_read
+            totals['not_modified'] += result.reused == '304'
+            totals['hash_reused'] += result.reused == 'hash'
+        totals['seconds'] += time.perf_counter() - start
+    totals['seconds'] = round(totals['seconds'], 3)
+    return totals, verdicts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=400)
+    parser.add_argument('--hosts', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--static', type=float, default=0.5, help='支持条件请求的页面比例')
+    parser.add_argument('--bad', type=float, default=0.1, help='含危险关键词的页面比例')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=2)
+    args = parser.parse_args()
+
+    with FakeFarm() as farm:
+        urls, expected = [], []
+        for i in range(args.urls):
+            static = i % 100 < args.static * 100
+            bad = i * 7 % 100 < args.bad * 100
+            if static:
+                kind = 'staticbad' if bad else 'static'
+            else:
+                kind = 'bad' if bad else 'ok'
+            urls.append(farm.url(kind, host=1 + i % args.hosts, n=i))
+            expected.append('unsafe' if bad else 'safe')
+
+        results = {'benchmark': 'conditional', 'urls': args.urls, 'rounds': args.rounds,
+                   'static_share': args.static, 'bad_share': args.bad}
+        for name, conditional in (('full', False), ('conditional', True)):
+            engine = CheckEngine(args.concurrency, 4, args.timeout)
+            totals, verdicts = run_rounds(engine, urls, args.rounds, conditional)
+            assert verdicts == expected, f'{name}: verdicts differ from expected'
+            results[name] = totals
+        results['bytes_saved'] = round(1 - results['conditional']['bytes_read'] / results['full']['bytes_read'], 3)
+        print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
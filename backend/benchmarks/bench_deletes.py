@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_deletes.py
+"""
+删除大组的基准: 旧的 ORM 级联 (加载全部域名后逐条删除，一个事务) vs deletions.py 的分批集合式删除
+删除的同时，另一个线程每 20ms 写一条检测结果，记录它等待写锁的最长时间 (SQLite 上体现为其他写入被阻塞多久)
+chunked_background 为后台删除的方式 (每批之间暂停 DELETE_BACKGROUND_PAUSE_MS)
+用法: python benchmarks/bench_deletes.py [--landing 50000 --transit 2000 --chunk 1000]
+默认使用临时 SQLite 数据库，也可以通过 DATABASE_URL 指定
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_deletes.db')
+
+
+def legacy_delete_group(group):
+    """旧实现: 通过 relationship 加载全部子记录，逐条 DELETE"""
+    from models import db
+    for domain in list(group.transit_domains) + list(group.landing_domains):
+        db.session.delete(domain)
+    db.session.delete(group)
+    db.session.commit()
+
+
+class Writer(threading.Thread):
+    """并发写入者: 记录每次写入 (含等待锁) 的耗时"""
+
+    def __init__(self, app):
+        super().__init__(daemon=True)
+        self.app = app
+        self.stop = threading.Event()
+        self.latencies = []
+
+    def run(self):
+        from models import db, CheckResult
+        with self.app.app_context():
+            while not self.stop.is_set():
+                start = time.perf_counter()
+                db.session.add(CheckResult(kind='landing', domain_id=0, group_id=0,
+                                           checked_at=datetime.utcnow(), status='safe'))
+                db.session.commit()
+                self.latencies.append(time.perf_counter() - start)
+                time.sleep(0.02)
+
+
+def timed_delete(app, func):
+    writer = Writer(app)
+    writer.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    writer.stop.set()
+    writer.join()
+    return {
+        'seconds': round(seconds, 3),
+        'writer_writes': len(writer.latencies),
+        'writer_max_wait_ms': round(max(writer.latencies) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--landing', type=int, default=50000)
+    parser.add_argument('--transit', type=int, default=2000)
+    parser.add_argument('--chunk', type=int, default=1000)
+    args = parser.parse_args()
+
+    from app import app
+    from models import db, DomainGroup
+    from deletions import delete_group_rows
+    from benchmarks.seed import seed_fleet
+
+    with app.app_context():
+        db.create_all()
+        seed_fleet(3, args.landing, args.transit)
+        legacy_id, chunked_id, paused_id = [
+            g for g, in db.session.query(DomainGroup.id).order_by(DomainGroup.id.desc()).limit(3)]
+
+        results = {'benchmark': 'group_delete', 'landing': args.landing, 'transit': args.transit, 'chunk': args.chunk}
+        results['legacy_orm'] = timed_delete(app, lambda: legacy_delete_group(db.session.get(DomainGroup, legacy_id)))
+        results['chunked'] = timed_delete(app, lambda: delete_group_rows(chunked_id, args.chunk))
+        # 后台删除的方式: 每批之间暂停，其他写入者不再排队等锁
+        results['chunked_background'] = timed_delete(app, lambda: delete_group_rows(
+            paused_id, args.chunk, app.config['DELETE_BACKGROUND_PAUSE_MS'] / 1000))
+        assert db.session.get(DomainGroup, chunked_id) is None
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
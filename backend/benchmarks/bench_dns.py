@@ -0,0 +1,74 @@
+# backend/benchmarks/bench_dns.py
+"""
+DNS 预解析基准测试: 本地桩 DNS (带上游延迟) + 本地假站点，连续检测多轮
+  no_cache: 每次建立连接都重新解析 (缓存 TTL 为 0，等同于没有缓存)
+  cached:   检测前并发预解析，按 TTL 缓存，多轮之间复用
+另有一部分域名不存在 (NXDOMAIN)，预解析后不再发起 HTTP 请求
+用法: python benchmarks/bench_dns.py [--urls 300] [--rounds 3] [--dns-delay 0.05]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checker import CheckEngine  # noqa: E402
+from dns_resolver import DnsResolver  # noqa: E402
+from benchmarks.fake_farm import FakeFarm  # noqa: E402
+from benchmarks.stub_dns import StubDns  # noqa: E402
+
+
+def run_rounds(engine, urls, rounds):
+    start = time.perf_counter()
+    verdicts = None
+    for _ in range(rounds):
+        verdicts = [None] * len(urls)
+        for i, result in engine.run(urls):
+            verdicts[i] = result.status
+    return round(time.perf_counter() - start, 3), verdicts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=300)
+    parser.add_argument('--hosts', type=int, default=100)
+    parser.add_argument('--missing', type=float, default=0.1, help='不存在的域名比例')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--dns-delay', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=2)
+    args = parser.parse_args()
+
+    missing_every = max(1, round(1 / args.missing)) if args.missing else 0
+    records = {f'site{h}.bench.test': f'127.0.0.{1 + h % 250}' for h in range(args.hosts)}
+    expected = []
+    with FakeFarm() as farm, StubDns(records, delay=args.dns_delay) as dns:
+        urls = []
+        for i in range(args.urls):
+            if missing_every and i % missing_every == missing_every - 1:
+                urls.append(f'http://missing{i}.bench.test:{farm.port}/ok/{i}')
+                expected.append('unsafe')
+            else:
+                urls.append(f'http://site{i % args.hosts}.bench.test:{farm.port}/ok/{i}')
+                expected.append('safe')
+
+        results = {'benchmark': 'dns', 'urls': args.urls, 'hosts': args.hosts, 'rounds': args.rounds,
+                   'dns_delay': args.dns_delay}
+        for name, resolver in (
+            ('no_cache', DnsResolver(nameservers=[dns.address], min_ttl=0, max_ttl=0, negative_ttl=0)),
+            ('cached', DnsResolver(nameservers=[dns.address])),
+        ):
+            engine = CheckEngine(args.concurrency, 4, args.timeout, resolver=resolver)
+            before = dns.queries
+            seconds, verdicts = run_rounds(engine, urls, args.rounds)
+            assert verdicts == expected, f'{name}: verdicts differ from expected'
+            results[name] = {'seconds': seconds, 'dns_queries': dns.queries - before, 'stats': resolver.stats()}
+
+        results['speedup'] = round(results['no_cache']['seconds'] / results['cached']['seconds'], 1)
+        print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
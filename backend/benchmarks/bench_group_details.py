@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_group_details.py
+"""
+大组详情页的基准: 旧的 GET /api/groups/<id> (一次返回全部域名) vs 分页接口的第一页 vs NDJSON 流式导出
+记录每种方式的耗时、响应大小和 Python 内存峰值 (tracemalloc)
+用法: python benchmarks/bench_group_details.py [--landing 50000 --transit 2000]
+默认使用临时 SQLite 数据库，也可以通过 DATABASE_URL 指定
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_group_details.db')
+
+
+def legacy_group_details(group_id):
+    """旧实现: 通过 relationship 加载全部子记录，整体序列化为一个 JSON (group.to_dict() 中再加载一次)"""
+    from models import db, DomainGroup
+    group = db.session.get(DomainGroup, group_id)
+    body = json.dumps({
+        'group': group.to_dict(),
+        'transit_domains': [td.to_dict() for td in group.transit_domains],
+        'landing_domains': [ld.to_dict() for ld in group.landing_domains],
+    })
+    return len(body)
+
+
+def measure(app, func):
+    from models import db
+    with app.app_context():
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = func()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        db.session.remove()
+    return {'seconds': round(seconds, 3), 'bytes': size, 'peak_mb': round(peak / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--landing', type=int, default=50000)
+    parser.add_argument('--transit', type=int, default=2000)
+    args = parser.parse_args()
+
+    from app import app
+    from models import db, DomainGroup
+    from benchmarks.seed import seed_fleet
+
+    with app.app_context():
+        db.create_all()
+        seed_fleet(1, args.landing, args.transit)
+        group_id = db.session.query(db.func.max(DomainGroup.id)).scalar()
+
+    client = app.test_client()
+
+    def first_page():
+        return len(client.get(f'/api/groups/{group_id}').data)
+
+    def streamed_export():
+        response = client.get(f'/api/groups/{group_id}/export', buffered=False)
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return size
+
+    results = {'benchmark': 'group_details', 'landing': args.landing, 'transit': args.transit}
+    results['legacy_full'] = measure(app, lambda: legacy_group_details(group_id))
+    results['first_page'] = measure(app, first_page)
+    results['ndjson_export'] = measure(app, streamed_export)
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_groups.py
+"""
+GET /api/groups 回归基准: 分组聚合计数 vs 旧的逐组 len(relationship) 懒加载
+用法: python benchmarks/bench_groups.py [--groups 300 --landing 200 --transit 50]
+默认使用临时 SQLite 数据库，也可以通过 DATABASE_URL 指定
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_groups.db')
+
+
+def legacy_groups_payload(groups):
+    """旧实现: 每个组加载全部子记录来计数"""
+    return [{
+        'id': g.id,
+        'transit_domains_count': len(g.transit_domains),
+        'landing_domains_count': len(g.landing_domains),
+    } for g in groups]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--groups', type=int, default=300)
+    parser.add_argument('--landing', type=int, default=200)
+    parser.add_argument('--transit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from app import app
+    from models import db, DomainGroup
+    from benchmarks.seed import seed_fleet
+
+    with app.app_context():
+        db.create_all()
+        if DomainGroup.query.count() == 0:
+            seed_fleet(args.groups, args.landing, args.transit)
+
+        client = app.test_client()
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get('/api/groups')
+            timings.append(time.perf_counter() - start)
+        new_payload = response.get_json()
+
+        db.session.expire_all()
+        start = time.perf_counter()
+        legacy = legacy_groups_payload(DomainGroup.query.order_by(DomainGroup.created_at.desc()).all())
+        legacy_seconds = time.perf_counter() - start
+
+        for old, new in zip(legacy, new_payload):
+            assert old['id'] == new['id']
+            assert old['transit_domains_count'] == new['transit_domains_count']
+            assert old['landing_domains_count'] == new['landing_domains_count']
+
+        best = min(timings)
+        print(json.dumps({
+            'benchmark': 'groups_listing',
+            'groups': len(new_payload),
+            'endpoint_best_seconds': round(best, 4),
+            'legacy_lazy_load_seconds': round(legacy_seconds, 4),
+            'speedup': round(legacy_seconds / best, 1),
+        }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_hits.py
+"""
+跳转流量统计的开销基准
+- hit_counter.record() 单次耗时 (跳转热路径上新增的全部工作)
+- 通过 Flask 测试客户端对比跳转接口开启/关闭计数的耗时
+- 一次 flush 写入数据库的耗时
+用法: python benchmarks/bench_hits.py [--calls 500000 --requests 5000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_hits.db')
+
+
+def time_requests(client, n, headers):
+    start = time.perf_counter()
+    for _ in range(n):
+        response = client.get('/go', headers=headers)
+    assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=500000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--transits', type=int, default=50)
+    parser.add_argument('--landing', type=int, default=20)
+    args = parser.parse_args()
+
+    from app import app
+    from models import db, DomainGroup, LandingDomain, TransitDomain, RedirectHit
+    from routing import routing_table
+    from hits import HitCounter, hit_counter
+
+    # 1. record() 本身
+    counter = HitCounter()
+    routes = [(t, 1) for t in range(args.transits)]
+    start = time.perf_counter()
+    for i in range(args.calls):
+        counter.record(routes[i % args.transits], i % args.landing)
+    record_ns = (time.perf_counter() - start) / args.calls * 1e9
+
+    with app.app_context():
+        db.create_all()
+        group = DomainGroup(name=f'bench-hits-{time.time()}')
+        db.session.add(group)
+        db.session.commit()
+        db.session.add_all([LandingDomain(url=f'https://hit{group.id}-{i}.example', group_id=group.id, status='safe')
+                            for i in range(args.landing)])
+        db.session.add(TransitDomain(url=f'hits{group.id}.example', path='/go', group_id=group.id, status='safe'))
+        db.session.commit()
+        host = f'hits{group.id}.example'
+        routing_table.rebuild()
+
+    # 2. 跳转接口 开启 / 关闭 计数
+    client = app.test_client()
+    headers = {'Host': host, 'User-Agent': 'Mozilla/5.0'}
+    time_requests(client, 200, headers)   # 预热
+    timings = {False: [], True: []}
+    for _ in range(3):   # 交替测量，各取最好成绩，减小噪声
+        for enabled in (False, True):
+            app.config['HIT_COUNTING'] = enabled
+            timings[enabled].append(time_requests(client, args.requests, headers))
+    off, on = min(timings[False]), min(timings[True])
+
+    # 3. flush
+    hit_counter._restore(counter._drain())
+    keys = hit_counter.pending()
+    start = time.perf_counter()
+    hit_counter.flush(app)
+    flush_seconds = time.perf_counter() - start
+    with app.app_context():
+        stored = db.session.query(db.func.sum(RedirectHit.hits)).scalar()
+
+    print(json.dumps({
+        'benchmark': 'redirect_hit_counting',
+        'record_ns_per_call': round(record_ns, 1),
+        'redirect_us_counting_off': round(off * 1e6, 1),
+        'redirect_us_counting_on': round(on * 1e6, 1),
+        'overhead_us_per_redirect': round((on - off) * 1e6, 2),
+        'flush_keys': keys,
+        'flush_seconds': round(flush_seconds, 4),
+        'stored_hits': stored,
+    }))
+
+
+if __name__ == '__main__':
+    main()
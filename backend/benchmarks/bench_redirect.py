@@ -0,0 +1,105 @@
+# backend/benchmarks/bench_redirect.py
+"""
+跳转热路径的 CPU 基准: 旧的 any() 过滤 + 每次 f-string 拼页面 vs 预编译过滤器 + 预渲染页面
+只测纯 CPU 部分 (不含 Flask 请求开销)，输入是真实比例的 UA 混合
+用法: python benchmarks/bench_redirect.py [--requests 200000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+USER_AGENTS = [
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.4 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'curl/8.5.0',
+    'python-requests/2.31.0',
+]
+PATHS = ['go', 'aB3xZ7', 'my/custom/path', 'api/stats', 'favicon.ico']
+LEGACY_BLOCKED_UAS = [
+    'bot', 'spider', 'crawler', 'python-requests', 'curl',
+    'wget', 'httpclient', 'java', 'go-http-client'
+]
+
+
+def legacy_handle(path, user_agent, landing_urls):
+    """原来的实现 (app.py dynamic_redirect_to_landing 的 CPU 部分)"""
+    admin_paths = ['api', 'assets', 'all-domains', 'group', 'favicon.ico']
+    if path == '/' or any(path.startswith(p) for p in admin_paths):
+        return None
+    user_agent = user_agent.lower()
+    if any(ua in user_agent for ua in LEGACY_BLOCKED_UAS):
+        return None
+    chosen_url = random.choice(landing_urls)
+    html = f"""
+    <html>
+        <head>
+            <title>Loading...</title>
+            <meta http-equiv="refresh" content="0;url={chosen_url}" />
+        </head>
+        <body>
+            <p>Loading, please wait...</p>
+            <script type="text/javascript">
+                window.location.href = "{chosen_url}";
+            </script>
+        </body>
+    </html>
+    """
+    return html.encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--landing', type=int, default=20)
+    args = parser.parse_args()
+
+    from redirects import UserAgentFilter, is_admin_path, landing_page
+
+    rng = random.Random(7)
+    workload = [(rng.choice(PATHS), rng.choice(USER_AGENTS)) for _ in range(args.requests)]
+    landing_urls = [f'https://lp{i}.example.com/?from=bench' for i in range(args.landing)]
+    pages = tuple(landing_page(i, url) for i, url in enumerate(landing_urls))
+    ua_filter = UserAgentFilter(LEGACY_BLOCKED_UAS)
+
+    def new_handle(path, user_agent):
+        if is_admin_path(path) or ua_filter.is_blocked(user_agent):
+            return None
+        return random.choice(pages).body
+
+    # 两种实现的放行/拒绝判定必须一致
+    for path, ua in workload[:1000]:
+        assert (legacy_handle(path, ua, landing_urls) is None) == (new_handle(path, ua) is None), (path, ua)
+
+    start = time.perf_counter()
+    for path, ua in workload:
+        legacy_handle(path, ua, landing_urls)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for path, ua in workload:
+        new_handle(path, ua)
+    new_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        'benchmark': 'redirect_hot_path',
+        'requests': args.requests,
+        'legacy_us_per_request': round(legacy_seconds / args.requests * 1e6, 3),
+        'new_us_per_request': round(new_seconds / args.requests * 1e6, 3),
+        'speedup': round(legacy_seconds / new_seconds, 1),
+        'ua_cache': ua_filter.is_blocked.cache_info()._asdict(),
+    }))
+
+
+if __name__ == '__main__':
+    main()
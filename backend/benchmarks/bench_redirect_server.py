@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_redirect_server.py
+"""
+跳转压测: Gunicorn (app.py) vs 独立异步跳转服务 (redirect_server.py)
+两个场景:
+  1. 只有跳转流量
+  2. 同时有慢管理请求 (默认 /api/domains 精确计数 + 子串搜索) 压在 Gunicorn 上，
+     看跳转延迟是否被拖慢 (部署时管理 API 仍然由 Gunicorn 处理，跳转交给独立服务)
+用法: python benchmarks/bench_redirect_server.py [--workers 4 --concurrency 50 --duration 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_redirect_server.db')
+os.environ.setdefault('ROUTING_VERSION_FILE', os.path.join(tempfile.mkdtemp(), 'routing.version'))
+
+from benchmarks.loadgen import run_load  # noqa: E402
+
+ADMIN_PATH = '/api/domains?page=20&per_page=50&search=bench&count=exact'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'port {port} did not open')
+
+
+def prepare_database(groups, landing, transit):
+    """建表并生成数据，返回一个健康的中转链接 (host, path)"""
+    from app import app
+    from models import db, TransitDomain
+    from domain_search import ensure_search_index
+    from benchmarks.seed import seed_fleet
+
+    with app.app_context():
+        db.create_all()
+        ensure_search_index()
+        if TransitDomain.query.count() == 0:
+            seed_fleet(groups, landing, transit)
+        return db.session.query(TransitDomain.url, TransitDomain.path).filter_by(status='safe').first()
+
+
+async def measure(port, host, path, concurrency, duration, admin_port=None, admin_concurrency=0):
+    redirect = run_load(f'http://127.0.0.1:{port}{path}', concurrency, duration, {'Host': host})
+    if not admin_concurrency:
+        return {'redirect': await redirect}
+    admin = run_load(f'http://127.0.0.1:{admin_port}{ADMIN_PATH}', admin_concurrency, duration)
+    redirect_stats, admin_stats = await asyncio.gather(redirect, admin)
+    return {'redirect': redirect_stats, 'admin': admin_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4, help='Gunicorn worker 数 / 跳转服务进程数')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--admin-concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--landing', type=int, default=2000)
+    parser.add_argument('--transit', type=int, default=20)
+    args = parser.parse_args()
+
+    host, path = prepare_database(args.groups, args.landing, args.transit)
+    env = dict(os.environ, HIT_COUNTING='1')
+    gunicorn_port, redirect_port = free_port(), free_port()
+    processes = [
+        subprocess.Popen(['gunicorn', '--workers', str(args.workers), '--bind', f'127.0.0.1:{gunicorn_port}',
+                          '--log-level', 'warning', 'app:app'], cwd=BACKEND_DIR, env=env),
+        subprocess.Popen([sys.executable, 'redirect_server.py', '--host', '127.0.0.1', '--port', str(redirect_port),
+                          '--workers', str(args.workers)], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL),
+    ]
+    try:
+        wait_for_port(gunicorn_port)
+        wait_for_port(redirect_port)
+        # 预热 (路由表加载)
+        asyncio.run(measure(gunicorn_port, host, path, args.workers, 1))
+        asyncio.run(measure(redirect_port, host, path, args.workers, 1))
+
+        results = {}
+        for name, port in (('gunicorn', gunicorn_port), ('redirect_server', redirect_port)):
+            results[name] = {
+                'redirect_only': asyncio.run(measure(port, host, path, args.concurrency, args.duration)),
+                'with_admin_load': asyncio.run(measure(
+                    port, host, path, args.concurrency, args.duration,
+                    admin_port=gunicorn_port, admin_concurrency=args.admin_concurrency)),
+            }
+        print(json.dumps({
+            'benchmark': 'redirect_server_vs_gunicorn',
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'admin_concurrency': args.admin_concurrency,
+            'admin_path': ADMIN_PATH,
+            'results': results,
+        }, indent=2))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# backend/benchmarks/fake_farm.py
+"""
+本地假站点集群 (用于检测器基准测试)
+路径决定行为:
+  /ok     正常页面
+  /slow   延迟 SLOW_SECONDS 后返回正常页面
+  /fail   返回 500
+  /hang   挂起 HANG_SECONDS (超过检测超时)
+  /bad    页面包含危险关键词
+  /static     正常页面，带 ETag / Last-Modified，支持条件请求 (304)
+  /staticbad  同上，页面包含危险关键词
+任何 127.0.0.x 地址都指向本机，可以用来模拟很多不同的主机。
+"""
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SLOW_SECONDS = 0.5
+HANG_SECONDS = 30
+
+OK_BODY = b'<html><body>' + b'<p>welcome to our site</p>' * 200 + b'</body></html>'
+BAD_BODY = b'<html><body>' + b'<p>welcome</p>' * 200 + b'<h1>phishing warning</h1></body></html>'
+LAST_MODIFIED = 'Mon, 05 Oct 2026 08:00:00 GMT'
+
+
+class FarmHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, body, headers=()):
+        self.send_response(code)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_static(self, body):
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        headers = (('ETag', etag), ('Last-Modified', LAST_MODIFIED))
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, b'', headers)
+        else:
+            self._send(200, body, headers)
+
+    def do_GET(self):
+        kind = self.path.strip('/').split('/')[0].split('?')[0]
+        if kind == 'slow':
+            time.sleep(SLOW_SECONDS)
+            self._send(200, OK_BODY)
+        elif kind == 'fail':
+            self._send(500, b'error')
+        elif kind == 'hang':
+            time.sleep(HANG_SECONDS)
+            self._send(200, OK_BODY)
+        elif kind == 'bad':
+            self._send(200, BAD_BODY)
+        elif kind == 'static':
+            self._send_static(OK_BODY)
+        elif kind == 'staticbad':
+            self._send_static(BAD_BODY)
+        else:
+            self._send(200, OK_BODY)
+
+
+class FarmServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+
+class FakeFarm:
+    """在后台线程中运行假站点，用法: with FakeFarm() as farm: farm.url('ok', host=3)"""
+
+    def __init__(self, port=0):
+        self.server = FarmServer(('0.0.0.0', port), FarmHandler)
+        self.port = self.server.server_address[1]
+
+    def url(self, kind, host=1, n=0):
+        return f"http://127.0.0.{host}:{self.port}/{kind}/{n}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,163 @@
+# backend/benchmarks/loadgen.py
+"""
+简单的 HTTP/1.1 压测客户端 (asyncio + 原始 socket，不依赖第三方库)
+- 每个并发连接循环发送同一个请求，服务器返回 Connection: close 时自动重连
+- [新] run_mix: 按权重随机混合多种请求 (不同 Host / 路径 / User-Agent)，按标签分别统计
+- 统计吞吐量和延迟分位数
+用法 (命令行): python benchmarks/loadgen.py http://127.0.0.1:5001/go --host-header go.example --concurrency 50 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p90_ms': ms(percentile(latencies, 90)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+        'statuses': dict(Counter(statuses)),
+    }
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    length, close = None, False
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value.strip())
+        elif name == 'connection' and value.strip().lower() == 'close':
+            close = True
+    if length is None:
+        await reader.read()   # 没有 Content-Length: 读到连接关闭
+        close = True
+    else:
+        await reader.readexactly(length)
+    return status, close
+
+
+async def _worker(host, port, pick, deadline, results, errors):
+    """pick() 返回 (标签, 请求字节)；results[标签] = (延迟列表, 状态码列表)"""
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            label, request = pick()
+            start = time.perf_counter()
+            writer.write(request)
+            status, close = await _read_response(reader)
+            latencies, statuses = results.setdefault(label, ([], []))
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+            if close:
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors[0] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+def build_request(target, headers, default_host, keep_alive=True):
+    headers = dict(headers or {})
+    headers.setdefault('Host', default_host)
+    headers.setdefault('User-Agent', 'Mozilla/5.0 (loadgen)')
+    headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    return (f'GET {target} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers.items()) + '\r\n').encode()
+
+
+async def run_load(url, concurrency=50, duration=10.0, headers=None, keep_alive=True):
+    """对 url 施加 duration 秒的压力，返回统计结果 (dict)"""
+    parts = urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    request = build_request(target, headers, parts.netloc, keep_alive)
+
+    results, errors = {}, [0]
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _worker(parts.hostname, parts.port or 80, lambda: ('all', request), deadline, results, errors)
+        for _ in range(concurrency)
+    ))
+    latencies, statuses = results.get('all', ([], []))
+    return summarize(latencies, statuses, errors[0], time.monotonic() - started)
+
+
+async def run_mix(base_url, mix, concurrency=50, duration=10.0, seed=1):
+    """
+    [新] 按权重混合多种请求施加压力
+    mix: [(标签, 权重, 路径, 请求头), ...]，同一标签可以有多项 (例如很多个不同的中转域名)
+    返回 {'all': 总体统计, 'by_label': {标签: 统计}}
+    """
+    parts = urlsplit(base_url)
+    labels = [item[0] for item in mix]
+    requests = [build_request(path, headers, parts.netloc) for _, _, path, headers in mix]
+    weights = [item[1] for item in mix]
+    rng = random.Random(seed)
+    order = rng.choices(range(len(mix)), weights=weights, k=min(100000, max(1000, len(mix) * 10)))
+    position = [0]
+
+    def pick():
+        # 预先按权重抽好的顺序循环使用，压测时不再做随机数计算
+        index = order[position[0] % len(order)]
+        position[0] += 1
+        return labels[index], requests[index]
+
+    results, errors = {}, [0]
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _worker(parts.hostname, parts.port or 80, pick, deadline, results, errors)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.monotonic() - started
+    all_latencies = [v for latencies, _ in results.values() for v in latencies]
+    all_statuses = [v for _, statuses in results.values() for v in statuses]
+    return {
+        'all': summarize(all_latencies, all_statuses, errors[0], elapsed),
+        'by_label': {label: summarize(latencies, statuses, 0, elapsed)
+                     for label, (latencies, statuses) in sorted(results.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('url')
+    parser.add_argument('--host-header')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    headers = {'Host': args.host_header} if args.host_header else None
+    print(json.dumps(asyncio.run(run_load(args.url, args.concurrency, args.duration, headers))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# backend/benchmarks/seed.py
+"""
+生成大规模测试数据 (组 / 落地域名 / 中转域名)
+用法: DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/seed.py --groups 100 --landing 50 --transit 20
+      DATABASE_URL=postgresql://... python benchmarks/seed.py --preset large   # 1000 组 / 5 万落地 / 2 万中转
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+STATUSES = ['safe'] * 8 + ['unsafe', 'pending']
+
+# [新] 预设规模: (组数, 每组落地域名数, 每组中转域名数)
+PRESETS = {
+    'small': (50, 40, 10),
+    'medium': (300, 50, 20),
+    'large': (1000, 50, 20),
+}
+
+
+def seed_fleet(groups, landing_per_group, transit_per_group, batch_size=5000, seed=42):
+    """在当前 app context 中批量插入数据，返回各表行数"""
+    from models import db, DomainGroup, LandingDomain, TransitDomain
+
+    rng = random.Random(seed)
+    start_id = (db.session.query(db.func.max(DomainGroup.id)).scalar() or 0) + 1
+    now = datetime.utcnow()
+
+    db.session.execute(db.insert(DomainGroup), [
+        {'id': start_id + g, 'name': f'bench-group-{start_id + g}', 'created_at': now - timedelta(minutes=g)}
+        for g in range(groups)
+    ])
+
+    def insert_batches(model, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                db.session.execute(db.insert(model), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(model), batch)
+
+    insert_batches(LandingDomain, (
+        {
+            'url': f'https://lp{i}-g{start_id + g}.bench.example',
+            'group_id': start_id + g,
+            'status': rng.choice(STATUSES),
+            'created_at': now - timedelta(seconds=g * landing_per_group + i),
+        }
+        for g in range(groups) for i in range(landing_per_group)
+    ))
+    insert_batches(TransitDomain, (
+        {
+            'url': f'go{i}-g{start_id + g}.bench.example',
+            'path': '/go',
+            'group_id': start_id + g,
+            'status': rng.choice(STATUSES),
+            'created_at': now - timedelta(seconds=g * transit_per_group + i),
+        }
+        for g in range(groups) for i in range(transit_per_group)
+    ))
+    db.session.commit()
+    _sync_sequences()
+    return {
+        'groups': DomainGroup.query.count(),
+        'landing_domains': LandingDomain.query.count(),
+        'transit_domains': TransitDomain.query.count(),
+    }
+
+
+def _sync_sequences():
+    """[新] PostgreSQL: 组 ID 是显式插入的，把序列推进到最大 ID，之后正常创建组不会主键冲突"""
+    from models import db
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    db.session.execute(db.text(
+        "SELECT setval(pg_get_serial_sequence('domain_group', 'id'), (SELECT MAX(id) FROM domain_group))"))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--preset', choices=sorted(PRESETS), help='预设规模 (覆盖下面三个参数)')
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--landing', type=int, default=50, help='每组落地域名数')
+    parser.add_argument('--transit', type=int, default=20, help='每组中转域名数')
+    args = parser.parse_args()
+    if args.preset:
+        args.groups, args.landing, args.transit = PRESETS[args.preset]
+
+    from app import app
+    from models import db
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        counts = seed_fleet(args.groups, args.landing, args.transit)
+        counts['seconds'] = round(time.perf_counter() - start, 2)
+        counts['database'] = app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0]
+        print(json.dumps(counts))
+
+
+if __name__ == '__main__':
+    main()
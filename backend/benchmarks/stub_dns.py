@@ -0,0 +1,109 @@
+# backend/benchmarks/stub_dns.py
+"""
+本地 DNS 桩服务器 (用于 DNS 预解析的测试 / 基准测试)
+- records 中的主机名返回 A / AAAA 记录 (值是一个地址或地址列表，按地址类型分配；TTL 可配置)，
+  存在但没有所查类型的记录时返回 NOERROR + 空应答，其他主机名返回 NXDOMAIN + SOA (否定 TTL)
+- truncated 中的主机名返回带 TC 标志的空应答
+- delay 模拟上游解析延迟；queries 统计收到的查询数
+用法: with StubDns({'a.test': '127.0.0.2'}, delay=0.02) as dns: DnsResolver(nameservers=[dns.address])
+"""
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dns_resolver import TYPE_A, TYPE_AAAA, TYPE_SOA, _skip_name
+
+SOA_RDATA = (b'\x02ns\x04test\x00' + b'\x05admin\x04test\x00'
+             + struct.pack('>IIIII', 1, 3600, 600, 86400, 3600))
+
+
+class StubDns:
+
+    def __init__(self, records=None, ttl=300, negative_ttl=60, delay=0.0, port=0, truncated=()):
+        self.records = dict(records or {})
+        self.truncated = set(truncated)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.delay = delay
+        self.queries = 0
+        self._lock = threading.Lock()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', port))
+        self.address = self.sock.getsockname()
+        self._pool = ThreadPoolExecutor(max_workers=64)
+        self._running = False
+
+    def __enter__(self):
+        self._running = True
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._running = False
+        self.sock.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _serve(self):
+        while self._running:
+            try:
+                data, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            with self._lock:
+                self.queries += 1
+            self._pool.submit(self._answer, data, client)
+
+    def _answer(self, data, client):
+        if self.delay:
+            time.sleep(self.delay)
+        query_id = struct.unpack('>H', data[:2])[0]
+        end = _skip_name(data, 12)
+        question = data[12:end + 4]
+        qtype = struct.unpack('>H', data[end:end + 2])[0]
+        name = _decode_name(data[12:end]).lower()
+
+        address = self.records.get(name)
+        packed = [_pack_address(item, qtype) for item in _addresses(address)]
+        packed = [item for item in packed if item is not None]
+        if name in self.truncated:
+            response = struct.pack('>HHHHHH', query_id, 0x8380, 1, 0, 0, 0) + question
+        elif packed:
+            answer = b''.join(b'\xc0\x0c' + struct.pack('>HHIH', qtype, 1, self.ttl, len(item)) + item
+                             for item in packed)
+            header = struct.pack('>HHHHHH', query_id, 0x8180, 1, len(packed), 0, 0)
+            response = header + question + answer
+        else:
+            rcode = 0 if address is not None else 3   # 存在但没有这种记录: NOERROR + 空应答
+            authority = (b'\xc0\x0c' + struct.pack('>HHIH', TYPE_SOA, 1, self.negative_ttl, len(SOA_RDATA))
+                         + SOA_RDATA)
+            header = struct.pack('>HHHHHH', query_id, 0x8180 | rcode, 1, 0, 1, 0)
+            response = header + question + authority
+        try:
+            self.sock.sendto(response, client)
+        except OSError:
+            pass
+
+
+def _addresses(address):
+    if address is None:
+        return []
+    return [address] if isinstance(address, str) else list(address)
+
+
+def _pack_address(address, qtype):
+    """地址类型与查询类型一致时返回 rdata，否则返回 None"""
+    family = socket.AF_INET6 if ':' in address else socket.AF_INET
+    if (family, qtype) not in ((socket.AF_INET, TYPE_A), (socket.AF_INET6, TYPE_AAAA)):
+        return None
+    return socket.inet_pton(family, address)
+
+
+def _decode_name(data):
+    labels, offset = [], 0
+    while data[offset]:
+        length = data[offset]
+        labels.append(data[offset + 1:offset + 1 + length].decode('ascii'))
+        offset += 1 + length
+    return '.'.join(labels)
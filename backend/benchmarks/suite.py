@@ -0,0 +1,323 @@
+# backend/benchmarks/suite.py
+"""
+基准测试套件: 一次跑完下面的场景，输出一份机器可读的 JSON (吞吐量 + p50/p99 延迟)，可与上一次结果对比
+  1. seed       按预设规模生成数据 (已有数据时跳过)；DATABASE_URL 可指向 SQLite 或 PostgreSQL
+  2. redirect   访客跳转流量: 健康链接 (手机 / 桌面 UA)、爬虫 UA、失效 / 未知链接、后台路径混合，
+                分别压 Gunicorn (app.py) 和独立跳转服务 (redirect_server.py)
+  3. dashboard  仪表盘轮询的管理接口混合 (stats / groups / scheduler status / 组详情 / 域名分页 ...)，压 Gunicorn
+  4. checker    run_check_job 对本地假站点 (fake_farm.py) 做一轮完整检测 (含数据库写入)，冷 / 热各一次
+用法:
+  python benchmarks/suite.py --preset large --output results.json
+  python benchmarks/suite.py --preset small --compare results.json --max-regression 0.2
+对比时任何场景的 p99 变慢或吞吐量下降超过 --max-regression (比例) 就以非零状态退出。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_suite.db')
+os.environ.setdefault('ROUTING_VERSION_FILE', os.path.join(tempfile.mkdtemp(), 'routing.version'))
+
+from benchmarks.loadgen import run_mix, percentile  # noqa: E402
+from benchmarks.seed import PRESETS  # noqa: E402
+from benchmarks.bench_redirect_server import free_port, wait_for_port  # noqa: E402
+
+BROWSER_UAS = [
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.4 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 13; M2012K11AC) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/116.0.0.0 Mobile Safari/537.36 MicroMessenger/8.0.44',
+]
+BOT_UAS = [
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'curl/8.5.0',
+    'python-requests/2.31.0',
+    'Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)',
+]
+# 跳转流量构成 (权重): 健康链接 80%，爬虫 8%，失效 / 未知链接 7%，后台路径 5%
+REDIRECT_MIX = {'healthy': 80, 'bot': 8, 'invalid': 7, 'admin_path': 5}
+MIX_LINKS = 500   # 跳转混合中使用多少个不同的中转链接
+
+
+# --- 数据 ---
+
+def prepare_database(preset):
+    """建表、生成数据 (已有数据时跳过)，返回数据规模和压测用的样本"""
+    from app import app
+    from models import db, DomainGroup, LandingDomain, TransitDomain
+    from domain_search import ensure_search_index
+    from stats import rebuild_counters
+    from benchmarks.seed import seed_fleet
+
+    with app.app_context():
+        db.create_all()
+        ensure_search_index()
+        seed_seconds = None
+        if DomainGroup.query.count() == 0:
+            start = time.perf_counter()
+            seed_fleet(*PRESETS[preset])
+            seed_seconds = round(time.perf_counter() - start, 2)
+        if app.config['STATS_COUNTER_MODE']:
+            rebuild_counters()
+
+        rng = random.Random(7)
+        links = db.session.query(TransitDomain.url, TransitDomain.path, TransitDomain.status).all()
+        healthy = [(u, p) for u, p, status in links if status == 'safe']
+        unhealthy = [(u, p) for u, p, status in links if status != 'safe']
+        sample = {
+            'healthy': rng.sample(healthy, min(MIX_LINKS, len(healthy))),
+            'unhealthy': rng.sample(unhealthy, min(MIX_LINKS // 5, len(unhealthy))),
+            'group_ids': [g for g, in db.session.query(DomainGroup.id).limit(200)],
+            'landing_ids': [i for i, in db.session.query(LandingDomain.id).limit(200)],
+        }
+        fleet = {
+            'database': db.session.get_bind().dialect.name,
+            'groups': DomainGroup.query.count(),
+            'landing_domains': LandingDomain.query.count(),
+            'transit_domains': TransitDomain.query.count(),
+            'seed_seconds': seed_seconds,
+        }
+        return fleet, sample
+
+
+def redirect_mix(sample):
+    """[(标签, 权重, 路径, 请求头), ...]，每类的权重平均分给该类的各个请求"""
+    rng = random.Random(11)
+    mix = []
+
+    def add(label, entries):
+        for path, headers in entries:
+            mix.append((label, REDIRECT_MIX[label] / len(entries), path, headers))
+
+    add('healthy', [(path, {'Host': host, 'User-Agent': rng.choice(BROWSER_UAS)})
+                    for host, path in sample['healthy']])
+    add('bot', [(path, {'Host': host, 'User-Agent': rng.choice(BOT_UAS)})
+                for host, path in sample['healthy'][:50]])
+    invalid = [(path, {'Host': host, 'User-Agent': rng.choice(BROWSER_UAS)}) for host, path in sample['unhealthy']]
+    invalid += [(f'/x{i}', {'Host': f'unknown{i}.example', 'User-Agent': rng.choice(BROWSER_UAS)}) for i in range(50)]
+    add('invalid', invalid)
+    add('admin_path', [(path, {'Host': 'admin.example', 'User-Agent': rng.choice(BROWSER_UAS)})
+                       for path in ('/favicon.ico', '/assets/index.js', '/group/1', '/all-domains')])
+    return mix
+
+
+def dashboard_mix(sample):
+    """仪表盘 / 组详情 / 全部域名页面轮询的接口 (权重大致按页面打开频率)"""
+    rng = random.Random(13)
+    groups = sample['group_ids'] or [1]
+    landings = sample['landing_ids'] or [1]
+    mix = [
+        ('stats', 10, '/api/stats', {}),
+        ('groups', 10, '/api/groups', {}),
+        ('scheduler_status', 10, '/api/scheduler/status', {}),
+        ('check_jobs', 5, '/api/tasks/check_jobs', {}),
+        ('domains_page', 6, '/api/domains?cursor=&per_page=50&count=estimate', {}),
+        ('domains_search', 2, '/api/domains?cursor=&per_page=50&search=lp1&count=estimate', {}),
+    ]
+    for group_id in rng.sample(groups, min(20, len(groups))):
+        mix.append(('group_details', 4 / 20, f'/api/groups/{group_id}', {}))
+        mix.append(('group_check_summary', 2 / 20, f'/api/groups/{group_id}/check_summary', {}))
+        mix.append(('group_traffic', 2 / 20, f'/api/groups/{group_id}/traffic', {}))
+    for landing_id in rng.sample(landings, min(20, len(landings))):
+        mix.append(('landing_checks', 1 / 20, f'/api/landing_domains/{landing_id}/checks', {}))
+    return mix
+
+
+# --- 场景 ---
+
+def start_servers(workers):
+    env = dict(os.environ, HIT_COUNTING='1')
+    gunicorn_port, redirect_port = free_port(), free_port()
+    processes = [
+        subprocess.Popen(['gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{gunicorn_port}',
+                          '--log-level', 'warning', 'app:app'], cwd=BACKEND_DIR, env=env,
+                         stdout=subprocess.DEVNULL),
+        subprocess.Popen([sys.executable, 'redirect_server.py', '--host', '127.0.0.1', '--port', str(redirect_port),
+                          '--workers', str(workers)], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL),
+    ]
+    wait_for_port(gunicorn_port)
+    wait_for_port(redirect_port)
+    return processes, gunicorn_port, redirect_port
+
+
+def load_scenarios(sample, args):
+    processes, gunicorn_port, redirect_port = start_servers(args.workers)
+    try:
+        redirects = redirect_mix(sample)
+        admin = dashboard_mix(sample)
+        # 预热 (路由表加载、连接池)
+        asyncio.run(run_mix(f'http://127.0.0.1:{gunicorn_port}', redirects + admin, args.workers, 1))
+        asyncio.run(run_mix(f'http://127.0.0.1:{redirect_port}', redirects, args.workers, 1))
+        return {
+            'redirect_gunicorn': asyncio.run(run_mix(
+                f'http://127.0.0.1:{gunicorn_port}', redirects, args.concurrency, args.duration)),
+            'redirect_server': asyncio.run(run_mix(
+                f'http://127.0.0.1:{redirect_port}', redirects, args.concurrency, args.duration)),
+            'dashboard': asyncio.run(run_mix(
+                f'http://127.0.0.1:{gunicorn_port}', admin, args.admin_concurrency, args.duration)),
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def checker_scenario(urls):
+    """在独立的临时数据库中运行 (检测会改写域名状态)，返回子进程输出的 JSON"""
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(workdir, 'checker.db'),
+               ROUTING_VERSION_FILE=os.path.join(workdir, 'routing.version'),
+               CHECK_TIMEOUT='2', CHECK_HISTORY='1')
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--checker-child', str(urls)],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_checker_child(urls):
+    """子进程: 假站点上的 urls 个落地 / 中转域名，run_check_job 冷 / 热各跑一轮"""
+    from app import app
+    from models import db, DomainGroup, LandingDomain, TransitDomain, CheckResult
+    from checker import run_check_job
+    from benchmarks.fake_farm import FakeFarm
+    from benchmarks.bench_checker import MIX
+
+    with FakeFarm() as farm, app.app_context():
+        db.create_all()
+        group = DomainGroup(name='bench-checker')
+        db.session.add(group)
+        db.session.commit()
+        landing = [{'url': farm.url(MIX[i % len(MIX)], host=1 + i % 50, n=i), 'group_id': group.id}
+                   for i in range(urls * 3 // 4)]
+        transit = [{'url': f'127.0.0.{1 + i % 50}:{farm.port}', 'path': f'/{MIX[i % len(MIX)]}/{i}',
+                    'group_id': group.id} for i in range(urls - len(landing))]
+        db.session.execute(db.insert(LandingDomain), landing)
+        db.session.execute(db.insert(TransitDomain), transit)
+        db.session.commit()
+
+        result = {'urls': urls}
+        for run in ('cold', 'warm'):
+            start = time.perf_counter()
+            checked, unsafe, _ = run_check_job(app)
+            seconds = time.perf_counter() - start
+            latencies = sorted(ms for ms, in db.session.query(CheckResult.latency_ms).filter(
+                CheckResult.latency_ms.isnot(None)))
+            db.session.execute(db.delete(CheckResult))
+            db.session.commit()
+            result[run] = {
+                'checked': checked,
+                'unsafe': unsafe,
+                'seconds': round(seconds, 3),
+                'domains_per_second': round(checked / seconds, 1),
+                'probe_p50_ms': percentile(latencies, 50),
+                'probe_p99_ms': percentile(latencies, 99),
+            }
+    print(json.dumps(result))
+
+
+# --- 结果对比 ---
+
+def _headline(results):
+    """{场景: (吞吐量, p99)}，用于对比"""
+    headline = {}
+    for name, data in results['scenarios'].items():
+        if name == 'checker':
+            headline['checker_cold'] = (data['cold']['domains_per_second'], data['cold']['probe_p99_ms'])
+            continue
+        headline[name] = (data['all']['rps'], data['all']['p99_ms'])
+    return headline
+
+
+def compare(current, baseline, max_regression):
+    """返回 (对比表, 是否有回归)"""
+    rows, regressed = {}, False
+    old = _headline(baseline)
+    for name, (rps, p99) in _headline(current).items():
+        if name not in old:
+            continue
+        old_rps, old_p99 = old[name]
+        row = {'rps': rps, 'baseline_rps': old_rps, 'p99_ms': p99, 'baseline_p99_ms': old_p99}
+        if old_rps and rps is not None:
+            row['rps_change'] = round(rps / old_rps - 1, 3)
+            regressed |= row['rps_change'] < -max_regression
+        if old_p99 and p99 is not None:
+            row['p99_change'] = round(p99 / old_p99 - 1, 3)
+            regressed |= row['p99_change'] > max_regression
+        rows[name] = row
+    return rows, regressed
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='large', help='数据规模 (见 seed.py)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=50, help='跳转压测的并发连接数')
+    parser.add_argument('--admin-concurrency', type=int, default=8, help='管理接口压测的并发连接数')
+    parser.add_argument('--duration', type=float, default=10, help='每个压测场景的秒数')
+    parser.add_argument('--checker-urls', type=int, default=400)
+    parser.add_argument('--skip', action='append', default=[], choices=['load', 'checker'])
+    parser.add_argument('--output', help='结果写到这个文件 (同时打印到标准输出)')
+    parser.add_argument('--compare', help='与之前的结果文件对比')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    parser.add_argument('--checker-child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.checker_child:
+        run_checker_child(args.checker_child)
+        return
+
+    fleet, sample = prepare_database(args.preset)
+    scenarios = {}
+    if 'load' not in args.skip:
+        scenarios.update(load_scenarios(sample, args))
+    if 'checker' not in args.skip:
+        scenarios['checker'] = checker_scenario(args.checker_urls)
+
+    results = {
+        'benchmark': 'suite',
+        'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'preset': args.preset,
+        'fleet': fleet,
+        'settings': {'workers': args.workers, 'concurrency': args.concurrency,
+                     'admin_concurrency': args.admin_concurrency, 'duration': args.duration},
+        'scenarios': scenarios,
+    }
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            results['comparison'], regressed = compare(results, json.load(f), args.max_regression)
+        exit_code = 1 if regressed else 0
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
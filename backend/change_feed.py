@@ -0,0 +1,232 @@
+# backend/change_feed.py
+"""
+[新] 变更推送 (取代仪表盘 / 组详情页的定时刷新)
+- record(): 在调用方的事务里写一行 change_event (检测结果批次的状态变化和计数增量、域名增删、
+  组 / 检测任务 / 调度器的变化)；事务提交后把最新事件 id 写入共享版本号文件 (CHANGE_VERSION_FILE)
+- 全局变更版本号 = 最新事件 id:
+    读接口的 ETag (versioned) 只读版本号文件，没变时直接返回 304，不执行查询
+    SSE (sse_stream) / 长轮询 (wait_for_events) 每隔 CHANGE_POLL_SECONDS 读一次版本号文件，变化后才查询新事件
+- 客户端落后于保留期 (事件已被清理) 时收到 reset，需要重新加载全部数据
+- 事件 id 必须按提交顺序递增，否则客户端读到 11 之后再也收不到晚提交的 10:
+    事件在事务提交前 (before_commit) 才插入，PostgreSQL 上先取一个事务级 advisory lock，
+    写事件的事务按取得 id 的顺序提交 (SQLite 的单写锁本身就保证这一点)
+- leader 定期清理过期事件，并把版本号文件与数据库对齐 (进程在提交后、写文件前退出的情况)
+"""
+import fcntl
+import functools
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from flask import request, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, ChangeEvent
+
+MAX_EVENTS = 500            # 一次最多返回多少个事件
+PRUNE_INTERVAL_SECONDS = 60
+COMMIT_LOCK_KEY = 0x63686733   # PostgreSQL advisory lock: 分配事件 id 到提交之间持有
+_next_prune = 0.0
+
+
+class ChangeVersion:
+    """共享版本号文件 (与 routing.RoutingTable 的版本号文件相同的加锁方式)，内容是最新事件 id"""
+
+    def __init__(self):
+        self.path = None
+
+    def init_app(self, app):
+        self.path = app.config['CHANGE_VERSION_FILE']
+
+    def read(self):
+        """没有配置文件路径时直接查询数据库 (需要 app context)"""
+        if not self.path:
+            return latest_event_id()
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return 0
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            raw = os.read(fd, 32)
+        finally:
+            os.close(fd)
+        return int(raw) if raw.strip() else 0
+
+    def advance(self, version):
+        """只前进不后退 (多个进程并发提交时写入顺序不定)"""
+        if not self.path:
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 32)
+            if version > (int(raw) if raw.strip() else 0):
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, str(version).encode())
+        finally:
+            os.close(fd)
+
+
+# 每个进程一个实例
+change_version = ChangeVersion()
+
+
+def latest_event_id():
+    return db.session.query(db.func.max(ChangeEvent.id)).scalar() or 0
+
+
+# --- 写入 ---
+
+def record(type, group_id=None, **payload):
+    """在当前事务中记录一个变更事件 (由调用方提交；提交时才写入并分配 id)"""
+    change = ChangeEvent(type=type, group_id=group_id, payload=json.dumps(payload) if payload else None)
+    db.session.connection()   # 确保事务已开始，回滚时 after_rollback 会丢弃未写入的事件
+    db.session.info.setdefault('pending_changes', []).append(change)
+
+
+@event.listens_for(Session, 'before_commit')
+def _insert_before_commit(session):
+    """
+    事务的最后一步才插入事件: 之后只剩提交，持有 advisory lock 的时间很短，
+    也不会在持锁时再去等待其他事务的行锁 (不会死锁)
+    """
+    changes = session.info.pop('pending_changes', None)
+    if not changes:
+        return
+    if db.engine.dialect.name == 'postgresql':
+        session.execute(db.text('SELECT pg_advisory_xact_lock(:key)'), {'key': COMMIT_LOCK_KEY})
+    session.add_all(changes)
+    session.flush()
+    session.info['change_version'] = max(session.info.get('change_version', 0), changes[-1].id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_after_commit(session):
+    version = session.info.pop('change_version', None)
+    if version:
+        change_version.advance(version)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('pending_changes', None)
+    session.info.pop('change_version', None)
+
+
+def maintain(config):
+    """[leader] 清理过期事件；版本号文件落后于数据库时补上 (每分钟最多一次)"""
+    global _next_prune
+    now = time.monotonic()
+    if now < _next_prune:
+        return
+    _next_prune = now + PRUNE_INTERVAL_SECONDS
+    cutoff = datetime.utcnow() - timedelta(hours=config['CHANGE_EVENT_RETENTION_HOURS'])
+    db.session.execute(db.delete(ChangeEvent).where(ChangeEvent.created_at < cutoff))
+    db.session.commit()
+    change_version.advance(latest_event_id())
+    db.session.commit()
+
+
+# --- 读取 ---
+
+def events_since(since):
+    """
+    返回 (事件列表, 最新版本号, 是否需要重新加载)
+    since 之后的事件已被清理 (客户端离线超过保留期) 时 reset=True
+    """
+    rows = ChangeEvent.query.filter(ChangeEvent.id > since).order_by(ChangeEvent.id).limit(MAX_EVENTS).all()
+    events = [row.to_dict() for row in rows]
+    version = max(change_version.read(), events[-1]['id'] if events else 0)
+    reset = False
+    if since < version and (not events or events[0]['id'] != since + 1):
+        # id 可能有空洞 (回滚的事务)，只有最早保留的事件也晚于 since 时才说明中间的事件被清理了
+        oldest = db.session.query(db.func.min(ChangeEvent.id)).scalar()
+        reset = oldest is None or oldest > since + 1
+    db.session.commit()
+    if reset:
+        return [], version, True
+    if len(events) == MAX_EVENTS:
+        version = events[-1]['id']   # 还有更多，客户端从这里继续取
+    return events, version, False
+
+
+def _poll_version():
+    """等待循环中读取版本号 (没有版本号文件时查询数据库，随即结束事务，不长期占用连接)"""
+    version = change_version.read()
+    db.session.commit()
+    return version
+
+
+def wait_for_events(since, timeout, poll_seconds):
+    """长轮询: 最多等待 timeout 秒直到有新事件；等待期间只读版本号文件"""
+    deadline = time.monotonic() + timeout
+    while _poll_version() <= since and time.monotonic() < deadline:
+        time.sleep(poll_seconds)
+    return events_since(since)
+
+
+def _sse(data, event_id=None):
+    lines = f'id: {event_id}\n' if event_id is not None else ''
+    return lines + f'data: {json.dumps(data)}\n\n'
+
+
+def sse_stream(since, max_seconds, poll_seconds, heartbeat_seconds):
+    """
+    SSE 生成器: 每个事件一条消息 (id = 事件 id，浏览器重连时通过 Last-Event-ID 接着读)
+    连接最长保持 max_seconds，之后由浏览器自动重连 (不长期占用 worker 线程)；空闲时定期发送注释行保活
+    """
+    yield 'retry: 3000\n\n'
+    if since is None:
+        since = _poll_version()
+        yield _sse({'type': 'hello', 'version': since}, since)
+    start = time.monotonic()
+    last_sent = start
+    while time.monotonic() - start < max_seconds:
+        if _poll_version() > since:
+            events, version, reset = events_since(since)
+            if reset:
+                yield _sse({'type': 'reset', 'version': version}, version)
+            for item in events:
+                yield _sse(item, item['id'])
+            since = version
+            last_sent = time.monotonic()
+            if len(events) == MAX_EVENTS:
+                continue
+        elif time.monotonic() - last_sent >= heartbeat_seconds:
+            yield ': ping\n\n'
+            last_sent = time.monotonic()
+        time.sleep(poll_seconds)
+
+
+def parse_since(value):
+    """空值返回 None；格式错误时抛出 ValueError"""
+    if value is None or value == '':
+        return None
+    since = int(value)
+    if since < 0:
+        raise ValueError('since must be >= 0')
+    return since
+
+
+# --- ETag ---
+
+def versioned(view):
+    """
+    读接口的 ETag = 全局变更版本号: If-None-Match 命中时直接返回 304，不执行视图里的查询
+    (只用于内容完全由事件覆盖的数据，例如计数和组列表；last_checked_at 这类每次检测都变的字段不适用)
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = f'v{change_version.read()}'
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'   # 浏览器每次都带 If-None-Match 重新验证
+        return response
+    return wrapper
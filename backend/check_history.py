@@ -0,0 +1,226 @@
+# backend/check_history.py
+"""
+[新] 检测历史
+- check_result: 每次探测一行 (状态、HTTP 状态码、延迟、读取字节数、命中的关键词)，由 run_check_job 分批写入
+- check_rollup: 压缩后的汇总。compact_check_history() 把超过 CHECK_HISTORY_RAW_HOURS 的明细
+  按小时汇总，超过 CHECK_HISTORY_HOURLY_DAYS 的小时汇总再按天汇总，超过 CHECK_HISTORY_DAILY_DAYS 的删除，
+  所以表的大小只和域名数量成正比，不会随时间无限增长
+- 查询接口把三种数据合并成同一个时间序列 (可用率 + 平均延迟)
+压缩每次按一个时间窗口 (一小时 / 一天) 在数据库里 GROUP BY，不需要日期函数，SQLite 和 PostgreSQL 通用。
+"""
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from models import db, CheckResult, CheckRollup, upsert_increment
+
+ROLLUP_KEY = ('period', 'kind', 'domain_id', 'bucket')
+ROLLUP_COUNTS = ('checks', 'unsafe', 'latency_ms_sum', 'latency_samples')
+MAX_WINDOWS_PER_RUN = 48          # 每次压缩最多处理多少个窗口 (积压时分几次完成)
+COMPACT_INTERVAL_SECONDS = 3600
+RECENT_LIMIT = 50
+
+_EPOCH = datetime(1970, 1, 1)
+_next_compaction = 0
+
+
+def history_row(kind, domain_id, group_id, result, checked_at):
+    """一个 ProbeResult 对应的 check_result 行"""
+    return {
+        'kind': kind,
+        'domain_id': domain_id,
+        'group_id': group_id,
+        'checked_at': checked_at,
+        'status': result.status,
+        'http_code': result.http_code,
+        'latency_ms': result.latency_ms,
+        'bytes_read': result.bytes_read,
+        'keyword': result.keyword[:100] if result.keyword else None,
+        'error': result.error[:50] if result.error else None,
+    }
+
+
+def _floor(moment, step):
+    return _EPOCH + (moment - _EPOCH) // step * step
+
+
+# --- 压缩 ---
+
+def _raw_window_rows(start, end):
+    """明细 -> 小时汇总"""
+    query = db.session.query(
+        CheckResult.kind, CheckResult.domain_id, func.max(CheckResult.group_id),
+        func.count(CheckResult.id),
+        func.sum(case((CheckResult.status == 'unsafe', 1), else_=0)),
+        func.coalesce(func.sum(CheckResult.latency_ms), 0),
+        func.count(CheckResult.latency_ms),
+    ).filter(
+        CheckResult.checked_at >= start, CheckResult.checked_at < end
+    ).group_by(CheckResult.kind, CheckResult.domain_id)
+    return query, db.delete(CheckResult).where(CheckResult.checked_at >= start, CheckResult.checked_at < end)
+
+
+def _hourly_window_rows(start, end):
+    """小时汇总 -> 天汇总"""
+    in_window = (CheckRollup.period == 'hour', CheckRollup.bucket >= start, CheckRollup.bucket < end)
+    query = db.session.query(
+        CheckRollup.kind, CheckRollup.domain_id, func.max(CheckRollup.group_id),
+        func.sum(CheckRollup.checks), func.sum(CheckRollup.unsafe),
+        func.sum(CheckRollup.latency_ms_sum), func.sum(CheckRollup.latency_samples),
+    ).filter(*in_window).group_by(CheckRollup.kind, CheckRollup.domain_id)
+    return query, db.delete(CheckRollup).where(*in_window)
+
+
+def _compact(oldest, cutoff, step, period, window, budget):
+    """
+    把 cutoff 之前的数据按 step 分窗口汇总成 period 行，返回处理的窗口数
+    oldest(after): 返回 after 之后 (含) 最早的一条数据的时间，跳过没有数据的时间段
+    """
+    done = 0
+    first = oldest(None)
+    while first is not None and done < budget:
+        start = _floor(first, step)
+        if start >= cutoff:
+            break
+        end = start + step
+        query, delete = window(start, end)
+        rows = [
+            dict(zip(('kind', 'domain_id', 'group_id') + ROLLUP_COUNTS, row), period=period, bucket=start)
+            for row in query
+        ]
+        upsert_increment(CheckRollup, ROLLUP_KEY, ROLLUP_COUNTS, rows)
+        db.session.execute(delete)
+        db.session.commit()   # 一个窗口一个事务: 汇总和删除要么都生效，要么都不生效
+        done += 1
+        first = oldest(end)
+    return done
+
+
+def _oldest_result(after):
+    query = db.session.query(func.min(CheckResult.checked_at))
+    if after is not None:
+        query = query.filter(CheckResult.checked_at >= after)
+    return query.scalar()
+
+
+def _oldest_hourly(after):
+    query = db.session.query(func.min(CheckRollup.bucket)).filter(CheckRollup.period == 'hour')
+    if after is not None:
+        query = query.filter(CheckRollup.bucket >= after)
+    return query.scalar()
+
+
+def compact_check_history(raw_hours, hourly_days, daily_days, now=None):
+    """执行一次压缩 (只能在一个进程中运行，见 maybe_compact)，返回处理的窗口数"""
+    now = now or datetime.utcnow()
+    budget = MAX_WINDOWS_PER_RUN
+
+    raw_cutoff = _floor(now - timedelta(hours=raw_hours), timedelta(hours=1))
+    done = _compact(_oldest_result, raw_cutoff, timedelta(hours=1), 'hour', _raw_window_rows, budget)
+
+    hourly_cutoff = _floor(now - timedelta(days=hourly_days), timedelta(days=1))
+    done += _compact(_oldest_hourly, hourly_cutoff, timedelta(days=1), 'day', _hourly_window_rows, budget - done)
+
+    db.session.execute(db.delete(CheckRollup).where(
+        CheckRollup.period == 'day', CheckRollup.bucket < now - timedelta(days=daily_days)))
+    db.session.commit()
+    return done
+
+
+def maybe_compact(config):
+    """检测队列的 leader 每轮调用；每小时最多真正压缩一次"""
+    global _next_compaction
+    if not config['CHECK_HISTORY'] or time.monotonic() < _next_compaction:
+        return
+    _next_compaction = time.monotonic() + COMPACT_INTERVAL_SECONDS
+    start = time.monotonic()
+    windows = compact_check_history(config['CHECK_HISTORY_RAW_HOURS'], config['CHECK_HISTORY_HOURLY_DAYS'],
+                                    config['CHECK_HISTORY_DAILY_DAYS'])
+    if windows:
+        print(f"[{datetime.now()}] Compacted {windows} check history windows in {time.monotonic() - start:.2f}s")
+    if windows >= MAX_WINDOWS_PER_RUN:
+        _next_compaction = 0   # 还有积压，下一轮继续
+
+
+# --- 查询 ---
+
+def domain_results_query(kind, domain_id, since):
+    return CheckResult.query.filter(
+        CheckResult.kind == kind, CheckResult.domain_id == domain_id, CheckResult.checked_at >= since)
+
+
+def domain_rollups_query(kind, domain_id, since):
+    return CheckRollup.query.filter(
+        CheckRollup.period.in_(('hour', 'day')), CheckRollup.kind == kind,
+        CheckRollup.domain_id == domain_id, CheckRollup.bucket >= since)
+
+
+def _summarize(checks, unsafe, latency_sum, samples):
+    return {
+        'checks': checks,
+        'unsafe': unsafe,
+        'uptime': round(1 - unsafe / checks, 4) if checks else None,
+        'avg_latency_ms': round(latency_sum / samples) if samples else None,
+    }
+
+
+def domain_history(kind, domain_id, since, bucket_hours):
+    """
+    一个域名的检测历史: (汇总, 时间序列, 最近的明细)
+    时间序列每个点 bucket_hours 小时；已压缩成天汇总的部分落在当天起始时间所在的点上
+    """
+    step = timedelta(hours=bucket_hours)
+    buckets = {}
+
+    def add(moment, checks, unsafe, latency_sum, samples):
+        totals = buckets.setdefault(_floor(moment, step), [0, 0, 0, 0])
+        totals[0] += checks
+        totals[1] += unsafe
+        totals[2] += latency_sum
+        totals[3] += samples
+
+    for rollup in domain_rollups_query(kind, domain_id, since):
+        add(rollup.bucket, rollup.checks, rollup.unsafe, rollup.latency_ms_sum, rollup.latency_samples)
+    raw = domain_results_query(kind, domain_id, since).order_by(CheckResult.checked_at.desc()).all()
+    for row in raw:
+        add(row.checked_at, 1, int(row.status == 'unsafe'), row.latency_ms or 0, int(row.latency_ms is not None))
+
+    series = [dict(t=start.isoformat(), **_summarize(*totals)) for start, totals in sorted(buckets.items())]
+    summary = _summarize(*(sum(totals[i] for totals in buckets.values()) for i in range(4)))
+    return summary, series, [row.to_dict() for row in raw[:RECENT_LIMIT]]
+
+
+def group_raw_summary_query(group_id, since):
+    return db.session.query(
+        CheckResult.kind, CheckResult.domain_id,
+        func.count(CheckResult.id),
+        func.sum(case((CheckResult.status == 'unsafe', 1), else_=0)),
+        func.coalesce(func.sum(CheckResult.latency_ms), 0),
+        func.count(CheckResult.latency_ms),
+    ).filter(
+        CheckResult.group_id == group_id, CheckResult.checked_at >= since
+    ).group_by(CheckResult.kind, CheckResult.domain_id)
+
+
+def group_rollup_summary_query(group_id, since):
+    return db.session.query(
+        CheckRollup.kind, CheckRollup.domain_id,
+        CheckRollup.checks, CheckRollup.unsafe, CheckRollup.latency_ms_sum, CheckRollup.latency_samples,
+    ).filter(
+        CheckRollup.period.in_(('hour', 'day')), CheckRollup.group_id == group_id,
+        CheckRollup.bucket >= since)
+
+
+def group_check_summary(group_id, since):
+    """组内每个域名在 since 之后的可用率和平均延迟: {'landing': {id: {...}}, 'transit': {...}}"""
+    totals = {}
+    rows = list(group_raw_summary_query(group_id, since)) + list(group_rollup_summary_query(group_id, since))
+    for kind, domain_id, checks, unsafe, latency_sum, samples in rows:
+        entry = totals.setdefault((kind, domain_id), [0, 0, 0, 0])
+        entry[0] += checks
+        entry[1] += unsafe or 0
+        entry[2] += latency_sum or 0
+        entry[3] += samples or 0
+    result = {'landing': {}, 'transit': {}}
+    for (kind, domain_id), entry in totals.items():
+        result.setdefault(kind, {})[domain_id] = _summarize(*entry)
+    return result
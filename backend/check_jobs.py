@@ -0,0 +1,235 @@
+# backend/check_jobs.py
+"""
+[新] 健康检测任务队列
+- enqueue_check(): 手动触发 / 定时到期检测都只是插入一行 check_job；
+  已有相同目标 (或覆盖它的全量检测) 在排队/执行时直接加入那个任务，不会重复探测
+- process_check_queue(): 由 leader 进程 (LeaderJob 'CheckQueue') 定期调用，按顺序逐个执行，
+  所以手动检测和定时检测不会同时运行、互相覆盖提交
+- 执行中把进度 (已检测/总数) 写回数据库，任何 worker 都能查询进度和预计剩余时间；
+  cancel_job() 只设置标记，执行进程在下一次写进度时停止
+- [新] 检测历史的压缩 (check_history.maybe_compact) 也在这里执行，保证同一时间只有一个进程在压缩
+- [新] 中途中断的后台删除组 (deletions.resume_group_deletions) 也由这里接着删完
+- [新] 任务状态变化 (排队 / 开始 / 结束 / 取消) 写入变更事件 (change_feed.py)；过期事件也在这里清理
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import db, CheckJob
+from checker import run_check_job
+from leader import worker_id
+from check_history import maybe_compact
+from deletions import resume_group_deletions
+from metrics import record_sweep
+from change_feed import record, maintain as maintain_change_feed
+
+ACTIVE_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('done', 'cancelled', 'failed')
+MAX_TARGET_IDS = 10000          # 按 ID 检测时每类最多多少个
+PROGRESS_INTERVAL_SECONDS = 1   # 进度最多每秒写一次数据库
+
+
+def target_key(kind, group_id=None, landing_ids=(), transit_ids=()):
+    if kind == 'group':
+        return f'group:{group_id}'
+    if kind == 'domains':
+        ids = json.dumps([sorted(landing_ids), sorted(transit_ids)])
+        return 'domains:' + hashlib.sha1(ids.encode()).hexdigest()
+    return kind
+
+
+def _covering_keys(kind, key):
+    """哪些正在排队/执行的任务已经包含了这次要检测的域名 ('all' 包含一切)"""
+    return [key] if kind == 'all' else [key, 'all']
+
+
+def active_jobs_query(keys):
+    return CheckJob.query.filter(
+        CheckJob.target_key.in_(keys), CheckJob.status.in_(ACTIVE_STATUSES)
+    ).order_by(CheckJob.id.asc())
+
+
+def _active_job(keys):
+    return active_jobs_query(keys).first()
+
+
+def next_queued_query():
+    return db.session.query(CheckJob.id).filter(
+        CheckJob.status == 'queued'
+    ).order_by(CheckJob.created_at.asc(), CheckJob.id.asc()).limit(1)
+
+
+def enqueue_check(kind, group_id=None, landing_ids=(), transit_ids=()):
+    """
+    排队一个检测任务，返回 (任务, 是否加入了已有任务)
+    kind: 'due' (到期的域名), 'all', 'group', 'domains'
+    """
+    key = target_key(kind, group_id, landing_ids, transit_ids)
+    keys = _covering_keys(kind, key)
+    existing = _active_job(keys)
+    if existing is not None:
+        return existing, True
+
+    job = CheckJob(
+        kind=kind,
+        group_id=group_id if kind == 'group' else None,
+        landing_ids=json.dumps(sorted(landing_ids)) if kind == 'domains' else None,
+        transit_ids=json.dumps(sorted(transit_ids)) if kind == 'domains' else None,
+        target_key=key,
+    )
+    db.session.add(job)
+    try:
+        db.session.flush()
+        record('check_job', job.group_id, id=job.id, kind=kind, status='queued')
+        db.session.commit()
+    except IntegrityError:
+        # 另一个 worker 同时插入了相同目标的任务 (部分唯一索引)
+        db.session.rollback()
+        existing = _active_job(keys)
+        if existing is not None:
+            return existing, True
+        raise
+    return job, False
+
+
+def enqueue_due_check(app):
+    """[新] 定时任务入口 (DomainCheckJob): 排队一次到期域名检测，实际执行见 process_check_queue"""
+    with app.app_context():
+        job, joined = enqueue_check('due')
+        if joined:
+            print(f"[{datetime.now()}] Due check skipped, job {job.id} ({job.kind}) is still {job.status}.")
+
+
+def cancel_job(job):
+    """排队中的任务直接取消；执行中的任务设置标记，由执行进程停止"""
+    if job.status == 'queued':
+        db.session.execute(
+            db.update(CheckJob)
+            .where(CheckJob.id == job.id, CheckJob.status == 'queued')
+            .values(status='cancelled', cancel_requested=True, finished_at=datetime.utcnow())
+        )
+        record('check_job', job.group_id, id=job.id, kind=job.kind, status='cancelled')
+    elif job.status == 'running':
+        job.cancel_requested = True
+        record('check_job', job.group_id, id=job.id, kind=job.kind, status='cancelling')
+    db.session.commit()
+    db.session.refresh(job)
+    return job
+
+
+class JobProgress:
+    """run_check_job 的进度回调: 定期写回已检测数量，并读取取消标记"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last_write = 0
+
+    def start(self, total):
+        self._write(total=total, checked=0, unsafe=0)
+
+    def update(self, checked, unsafe):
+        """返回 False 表示任务已被取消"""
+        now = time.monotonic()
+        if now - self._last_write < PROGRESS_INTERVAL_SECONDS:
+            return True
+        self._write(checked=checked, unsafe=unsafe)
+        return not db.session.query(CheckJob.cancel_requested).filter_by(id=self.job_id).scalar()
+
+    def record_stats(self, stats):
+        """[新] 本次检测的附加统计 (例如 DNS 解析命中率)，通过任务 API 返回"""
+        self._write(stats=json.dumps(stats))
+
+    def _write(self, **values):
+        self._last_write = time.monotonic()
+        db.session.execute(
+            db.update(CheckJob).where(CheckJob.id == self.job_id)
+            .values(heartbeat_at=datetime.utcnow(), **values)
+        )
+        db.session.commit()
+
+
+def _claim_next():
+    """原子地把最早排队的任务标记为 running，返回任务 ID，没有任务返回 None"""
+    while True:
+        job_id = next_queued_query().scalar()
+        if job_id is None:
+            return None
+        now = datetime.utcnow()
+        result = db.session.execute(
+            db.update(CheckJob)
+            .where(CheckJob.id == job_id, CheckJob.status == 'queued')
+            .values(status='running', started_at=now, heartbeat_at=now, worker=worker_id())
+        )
+        if result.rowcount == 1:
+            record('check_job', id=job_id, status='running')
+        db.session.commit()
+        if result.rowcount == 1:
+            return job_id
+
+
+def _expire_jobs(stale_seconds, retention_days):
+    """执行进程已退出的 running 任务标记为 failed；删除过期的已结束任务"""
+    now = datetime.utcnow()
+    db.session.execute(
+        db.update(CheckJob)
+        .where(CheckJob.status == 'running', CheckJob.heartbeat_at < now - timedelta(seconds=stale_seconds))
+        .values(status='failed', error='Worker stopped while the job was running.', finished_at=now)
+    )
+    db.session.execute(
+        db.delete(CheckJob)
+        .where(CheckJob.status.in_(FINISHED_STATUSES), CheckJob.created_at < now - timedelta(days=retention_days))
+    )
+    db.session.commit()
+
+
+def _run_job(app, job_id):
+    job = db.session.get(CheckJob, job_id)
+    kind, group_id = job.kind, job.group_id
+    landing_ids = json.loads(job.landing_ids) if job.landing_ids else None
+    transit_ids = json.loads(job.transit_ids) if job.transit_ids else None
+    db.session.commit()
+
+    status, error, checked, unsafe = 'done', None, 0, 0
+    start = time.monotonic()
+    try:
+        checked, unsafe, cancelled = run_check_job(
+            app, due_only=kind == 'due', group_id=group_id,
+            landing_ids=landing_ids, transit_ids=transit_ids, progress=JobProgress(job_id))
+        if cancelled:
+            status = 'cancelled'
+    except Exception as e:
+        db.session.rollback()
+        status, error = 'failed', str(e)
+        print(f"[{datetime.now()}] Check job {job_id} failed: {e}")
+
+    record_sweep(kind, status, time.monotonic() - start)
+    values = {'status': status, 'error': error, 'finished_at': datetime.utcnow(), 'heartbeat_at': datetime.utcnow()}
+    if status != 'failed':
+        values.update(checked=checked, unsafe=unsafe)
+    db.session.execute(db.update(CheckJob).where(CheckJob.id == job_id).values(**values))
+    record('check_job', group_id, id=job_id, kind=kind, status=status)
+    db.session.commit()
+
+
+def process_check_queue(app):
+    """
+    依次执行所有排队的任务 (LeaderJob 'CheckQueue' 的 func)
+    SCHEDULER_ENABLED=0 时由手动触发接口在后台线程中调用
+    """
+    with app.app_context():
+        config = app.config
+        _expire_jobs(config['CHECK_JOB_STALE_SECONDS'], config['CHECK_JOB_RETENTION_DAYS'])
+        # [新] 检测历史压缩也只在队列 leader 中运行 (每小时一次)
+        maybe_compact(config)
+        resume_group_deletions(config)
+        maintain_change_feed(config)
+        while True:
+            job_id = _claim_next()
+            if job_id is None:
+                return
+            _run_job(app, job_id)
+
+
+def recent_jobs(limit):
+    return CheckJob.query.order_by(CheckJob.created_at.desc(), CheckJob.id.desc()).limit(limit).all()
@@ -0,0 +1,67 @@
+# backend/check_schedule.py
+import math
+import random
+from datetime import timedelta
+
+
+class CheckSchedulePolicy:
+    """
+    [新] 自适应检测间隔
+    每个域名保存自己的 next_check_at，数据库按 next_check_at 排序就是一个优先队列:
+    - 状态刚翻转 / 经常翻转 (flap) 的域名: 很快复查
+    - 长期稳定的 safe 域名: 间隔逐步翻倍，直到上限
+    - unsafe 域名: 定期做恢复探测，间隔同样逐步退避
+    - 有跳转流量的 safe 域名: 按最近流量的数量级缩短间隔 (出问题时影响的访客更多)
+    每个间隔都加上随机抖动，避免大量域名挤在同一时刻被探测。
+    """
+
+    STABLE_STEP = 3        # 连续多少次结果相同，间隔翻一倍
+    FLAP_CAP = 5           # flap 计数上限
+    FLAP_DECAY_STEP = 4    # 连续多少次结果相同，flap 计数减一
+    JITTER = 0.1           # ±10% 随机抖动
+
+    def __init__(self, min_seconds, base_seconds, max_seconds, unsafe_base_seconds, unsafe_max_seconds):
+        self.min_seconds = min_seconds
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.unsafe_base_seconds = unsafe_base_seconds
+        self.unsafe_max_seconds = unsafe_max_seconds
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            min_seconds=config['CHECK_MIN_INTERVAL_SECONDS'],
+            base_seconds=config['CHECK_INTERVAL_MINUTES'] * 60,
+            max_seconds=config['CHECK_MAX_INTERVAL_SECONDS'],
+            unsafe_base_seconds=config['CHECK_UNSAFE_RECOVERY_SECONDS'],
+            unsafe_max_seconds=config['CHECK_UNSAFE_MAX_INTERVAL_SECONDS'],
+        )
+
+    def next_check(self, old_status, new_status, streak, flaps, checked_at, hits=0):
+        """
+        根据本次结果计算 (next_check_at, check_streak, flap_count)
+        streak: 之前连续相同结果的次数, flaps: 之前的翻转计数
+        hits: 最近一小时的跳转次数 (hits.recent_hits)
+        """
+        streak = streak or 0
+        flaps = flaps or 0
+
+        if old_status != 'pending' and old_status != new_status:
+            # 状态翻转: 立即进入最短间隔
+            flaps = min(flaps + 1, self.FLAP_CAP)
+            streak = 0
+            delay = self.min_seconds
+        else:
+            streak += 1
+            if flaps and streak % self.FLAP_DECAY_STEP == 0:
+                flaps -= 1
+            backoff = 2 ** min(streak // self.STABLE_STEP, 16)
+            if new_status == 'unsafe':
+                delay = min(self.unsafe_base_seconds * backoff, self.unsafe_max_seconds)
+            else:
+                delay = min(self.base_seconds * backoff, self.max_seconds)
+                # 最近翻转过的域名缩短间隔；每多一个数量级的流量再缩短一些 (9 次/小时减半，99 次三分之一...)
+                delay = max(delay / (1 + flaps) / (1 + math.log10(1 + hits)), self.min_seconds)
+
+        delay *= random.uniform(1 - self.JITTER, 1 + self.JITTER)
+        return checked_at + timedelta(seconds=delay), streak, flaps
@@ -0,0 +1,70 @@
+# backend/check_validators.py
+"""
+[新] 变化感知探测: 每个域名上一次探测的缓存验证信息 (check_validator 表)
+- 探测时带上 ETag / Last-Modified 发条件请求；304 时不下载页面，沿用上次的关键词结论
+- 服务器不支持条件请求时，比较页面开头 (上次扫描过的部分) 的 sha1，相同就不再扫描这部分
+- HTTP 状态码和跳转链每次都照常检查，只有关键词结论会被沿用
+- 关键词集合或最大扫描字节数变化后，旧的摘要不再使用
+"""
+import hashlib
+from collections import namedtuple
+from datetime import datetime
+from models import db, CheckValidator, upsert_replace
+
+LOAD_CHUNK = 500   # 按 ID 加载时每次 IN 的数量
+
+# 探测用的验证信息 (checker.probe_domain 的 validator 参数 / ProbeResult.validator)
+Validator = namedtuple('Validator', ['etag', 'last_modified', 'final_url', 'content_hash', 'hashed_bytes', 'keyword'])
+
+
+def keywords_key(keywords):
+    """关键词集合的摘要 (与顺序无关)"""
+    return hashlib.sha1('\n'.join(sorted(keywords)).encode('utf-8')).hexdigest()
+
+
+def validators_query(kind, domain_ids):
+    return db.session.query(CheckValidator).filter(
+        CheckValidator.kind == kind, CheckValidator.domain_id.in_(domain_ids))
+
+
+def load_validators(kind, keys, max_bytes):
+    """
+    keys: {domain_id: 当前的 keywords_key}
+    返回 {domain_id: Validator}，关键词变化过的域名不返回
+    """
+    found = {}
+    ids = list(keys)
+    for start in range(0, len(ids), LOAD_CHUNK):
+        for row in validators_query(kind, ids[start:start + LOAD_CHUNK]):
+            if row.keywords_key != keys[row.domain_id]:
+                continue
+            content_hash = row.content_hash if row.hashed_bytes <= max_bytes else None
+            found[row.domain_id] = Validator(row.etag, row.last_modified, row.final_url, content_hash,
+                                             row.hashed_bytes, row.keyword)
+    return found
+
+
+def validator_row(kind, domain_id, group_id, key, validator):
+    return {
+        'kind': kind,
+        'domain_id': domain_id,
+        'group_id': group_id,
+        'etag': validator.etag[:255] if validator.etag else None,
+        'last_modified': validator.last_modified[:64] if validator.last_modified else None,
+        'final_url': validator.final_url,
+        'content_hash': validator.content_hash,
+        'hashed_bytes': validator.hashed_bytes,
+        'keyword': validator.keyword[:100] if validator.keyword else None,
+        'keywords_key': key,
+        'updated_at': datetime.utcnow(),
+    }
+
+
+def save_validators(rows):
+    """在调用方的事务中写入 (不提交)"""
+    upsert_replace(CheckValidator, ('kind', 'domain_id'), rows)
+
+
+def delete_validators(kind, domain_ids):
+    db.session.execute(db.delete(CheckValidator).where(
+        CheckValidator.kind == kind, CheckValidator.domain_id.in_(domain_ids)))
@@ -1,7 +1,27 @@
 # backend/checker.py
+import hashlib
+import re
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 import requests
-from models import db, LandingDomain, TransitDomain # [新] 导入 TransitDomain
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from requests.utils import get_encoding_from_headers
+from models import db, DomainGroup, LandingDomain, TransitDomain, RedirectHit, CheckResult, parse_keywords # [新] 导入 TransitDomain
+from datetime import datetime, timedelta
+from sqlalchemy import or_, bindparam
+from routing import routing_table
+from check_schedule import CheckSchedulePolicy
+from stats import CounterDeltas
+from change_feed import record
+from hits import recent_hits
+from check_history import history_row
+from dns_resolver import DnsResolver, ResolvingAdapter
+from check_validators import Validator, keywords_key, load_validators, validator_row, save_validators
+from metrics import record_probe
 
 # 定义危险关键词
 DANGER_KEYWORDS = [
@@ -9,76 +29,600 @@ DANGER_KEYWORDS = [
     '危险', '欺诈', '钓鱼', '恶意软件', '停止访问'
 ]
 
-def check_domain_safety(url):
+CHECK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024   # 每个页面最多读取的字节数
+SCAN_CHUNK_SIZE = 16 * 1024
+
+# 与 UTF-8 扫描结果相同的编码 (关键词字节一致或无法表示中文)，不需要额外的模式
+_UTF8_COMPATIBLE = {'utf-8', 'utf8', 'ascii', 'us-ascii', 'iso-8859-1', 'latin-1', 'latin1'}
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)[\s"\'/;>]', re.IGNORECASE)
+
+
+class KeywordMatcher:
     """
-    [新] 这是一个通用函数，检测任何 URL 的安全性
-    返回: 'safe', 'unsafe'
+    [新] 多关键词单次扫描匹配器
+    所有关键词编码成字节后编译成一个正则 (按长度降序的交替式)，直接在原始字节流上匹配，
+    不需要解码/小写化整个页面。ASCII 字母不区分大小写，与原来的 .lower() 行为一致。
+    """
+
+    def __init__(self, keywords, encoding=None):
+        encodings = ['utf-8']
+        if encoding and encoding.lower() not in _UTF8_COMPATIBLE:
+            encodings.append(encoding)
+
+        self._keywords = {}
+        for keyword in keywords:
+            keyword = keyword.strip().lower()
+            if not keyword:
+                continue
+            for enc in encodings:
+                try:
+                    self._keywords[keyword.encode(enc)] = keyword
+                except (UnicodeEncodeError, LookupError):
+                    continue
+
+        patterns = sorted(self._keywords, key=len, reverse=True)
+        self._regex = re.compile(b'|'.join(re.escape(p) for p in patterns), re.IGNORECASE) if patterns else None
+        # 跨块匹配时需要保留的上一块尾部长度
+        self.overlap = max((len(p) for p in patterns), default=1) - 1
+
+    def search(self, data):
+        """返回命中的关键词，没有命中返回 None"""
+        if self._regex is None:
+            return None
+        match = self._regex.search(data)
+        if match is None:
+            return None
+        found = match.group(0)
+        return self._keywords.get(found, self._keywords.get(found.lower(), found.decode('utf-8', 'replace')))
+
+
+@lru_cache(maxsize=256)
+def get_matcher(keywords, encoding=None):
+    """按 (关键词元组, 页面编码) 缓存编译好的匹配器，每组自定义关键词只编译一次"""
+    return KeywordMatcher(keywords, encoding)
+
+
+_CHARSET_SNIFF_BYTES = 4096   # 在页面开头多少字节内查找 <meta charset>
+
+
+def _is_utf8_compatible(encoding):
+    return not encoding or encoding.lower() in _UTF8_COMPATIBLE
+
+
+def scan_response_body(response, keywords, max_bytes=DEFAULT_MAX_BODY_BYTES):
+    """
+    流式读取响应体 (最多 max_bytes 字节)，逐块匹配关键词，命中即停止读取
+    返回命中的关键词或 None
+    """
+    return _scan_body(response, keywords, max_bytes).keyword
+
+
+# [新] _scan_body 的结果: content_hash 为开头 hashed_bytes 字节的 sha1；reused 表示沿用了上次对开头部分的结论
+BodyScan = namedtuple('BodyScan', ['keyword', 'read', 'content_hash', 'hashed_bytes', 'reused'])
+
+
+def _scan_body(response, keywords, max_bytes, known=None):
+    """
+    返回 BodyScan
+    [新] known: 上次的 Validator。页面开头 known.hashed_bytes 字节的摘要与上次相同时这部分不再扫描:
+         上次在其中命中过关键词就直接沿用 (不再继续下载)，否则只扫描后面新增的内容
     """
+    encoding = get_encoding_from_headers(response.headers)
+    if _is_utf8_compatible(encoding):
+        encoding = None
+    matcher = get_matcher(keywords, encoding)
+    # 响应头没有声明非 UTF-8 编码时，在页面开头查找 <meta charset>
+    head = b'' if encoding is None else None
+    tail = b''
+    read = 0
+    hasher = hashlib.sha1()
+    reused = False
+    # 还在与上次摘要比较的开头部分 (比较完之前不扫描)
+    held = b'' if known is not None and known.content_hash and known.hashed_bytes else None
+    for chunk in response.iter_content(chunk_size=SCAN_CHUNK_SIZE):
+        if not chunk:
+            continue
+        if read + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - read]
+        start = read
+        read += len(chunk)
+
+        window = tail + chunk
+        if head is not None:
+            head += chunk
+            meta = _META_CHARSET.search(head)
+            if meta:
+                declared = meta.group(1).decode('ascii')
+                if not _is_utf8_compatible(declared):
+                    # 换成包含该编码的匹配器，并重新扫描已读取的开头部分
+                    matcher = get_matcher(keywords, declared)
+                    window = head
+                head = None
+            elif len(head) >= _CHARSET_SNIFF_BYTES:
+                head = None
+
+        if held is not None:
+            cut = known.hashed_bytes - start
+            if cut > len(chunk):
+                hasher.update(chunk)
+                held += chunk
+                continue
+            hasher.update(chunk[:cut])
+            same = hasher.hexdigest() == known.content_hash
+            hasher.update(chunk[cut:])
+            prefix, held = held + chunk[:cut], None
+            if same:
+                if known.keyword:
+                    return BodyScan(known.keyword, read, known.content_hash, known.hashed_bytes, True)
+                reused = True
+                window = (prefix[-matcher.overlap:] if matcher.overlap else b'') + chunk[cut:]
+            else:
+                window = prefix + chunk[cut:]
+        else:
+            hasher.update(chunk)
+
+        found = matcher.search(window)
+        if found is not None:
+            return BodyScan(found, read, hasher.hexdigest(), read, reused)
+        tail = window[-matcher.overlap:] if matcher.overlap else b''
+        if read >= max_bytes:
+            break
+    if held is not None:
+        # 页面比上次摘要覆盖的部分还短: 内容肯定变了，扫描已读取的全部内容
+        found = matcher.search(held)
+        return BodyScan(found, read, hasher.hexdigest(), read, False)
+    return BodyScan(None, read, hasher.hexdigest(), read, reused)
+
+
+# [新] 一次探测的完整结果 (写入检测历史，见 check_history.py)
+# http_code / latency_ms 在没有拿到响应 (超时、连接失败) 时为 None；latency_ms 为收到响应头的耗时
+# [新] validator: 这次得到的缓存验证信息 (见 check_validators.py)，没有拿到页面时为 None
+#      reused: 关键词结论沿用了上次的结果 ('304' / 'hash')，否则为 None
+ProbeResult = namedtuple('ProbeResult', ['status', 'http_code', 'latency_ms', 'bytes_read', 'keyword', 'error',
+                                         'validator', 'reused'], defaults=(None, None))
+
+
+def _conditional_headers(validator):
+    if validator is None or not (validator.etag or validator.last_modified):
+        return CHECK_HEADERS
+    headers = dict(CHECK_HEADERS)
+    if validator.etag:
+        headers['If-None-Match'] = validator.etag
+    if validator.last_modified:
+        headers['If-Modified-Since'] = validator.last_modified
+    return headers
+
+
+def probe_domain(url, session=None, timeout=5, keywords=None, max_bytes=DEFAULT_MAX_BODY_BYTES, validator=None):
+    """
+    [新] 探测一个 URL，返回 ProbeResult
+    [新] validator: 上次的 Validator，有则发条件请求 / 比较页面摘要，页面没变时沿用上次的关键词结论
+    """
+    if not url.startswith('http://') and not url.startswith('https://'):
+        url = 'http://' + url
+    start = time.monotonic()
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        if not url.startswith('http://') and not url.startswith('https://'):
-            url = 'http://' + url
-            
-        response = requests.get(url, headers=headers, timeout=5, allow_redirects=True)
-        
-        if response.status_code >= 400:
-            return 'unsafe' 
-
-        content = response.text.lower()
-        for keyword in DANGER_KEYWORDS:
-            if keyword in content:
-                return 'unsafe' 
-        
-        return 'safe'
+        getter = session.get if session is not None else requests.get
+        headers = _conditional_headers(validator)
+        with getter(url, headers=headers, timeout=timeout, allow_redirects=True, stream=True) as response:
+            latency_ms = int((time.monotonic() - start) * 1000)
+            if response.status_code == 304 and headers is not CHECK_HEADERS:
+                if response.url != validator.final_url:
+                    # 跳转链变了，304 对应的不是上次扫描的页面: 不带条件重新请求
+                    return probe_domain(url, session, timeout, keywords, max_bytes)
+                current = validator._replace(etag=response.headers.get('ETag') or validator.etag,
+                                             last_modified=response.headers.get('Last-Modified') or validator.last_modified)
+                status = 'unsafe' if validator.keyword else 'safe'
+                return ProbeResult(status, 304, latency_ms, 0, validator.keyword, None, current, '304')
+            if response.status_code >= 400:
+                return ProbeResult('unsafe', response.status_code, latency_ms, 0, None, None)
+
+            known = validator if validator is not None and response.url == validator.final_url else None
+            scan = _scan_body(response, keywords or tuple(DANGER_KEYWORDS), max_bytes, known)
+            status = 'unsafe' if scan.keyword is not None else 'safe'
+            current = Validator(response.headers.get('ETag'), response.headers.get('Last-Modified'), response.url,
+                                scan.content_hash, scan.hashed_bytes, scan.keyword)
+            return ProbeResult(status, response.status_code, latency_ms, scan.read, scan.keyword, None,
+                               current, 'hash' if scan.reused else None)
 
     except requests.exceptions.Timeout:
-        return 'unsafe'
+        return ProbeResult('unsafe', None, None, 0, None, 'timeout')
     except requests.exceptions.RequestException as e:
         print(f"Error checking {url}: {e}")
-        return 'unsafe'
+        return ProbeResult('unsafe', None, None, 0, None, type(e).__name__)
+
+
+def check_domain_safety(url, session=None, timeout=5, keywords=None, max_bytes=DEFAULT_MAX_BODY_BYTES):
+    """
+    [新] 这是一个通用函数，检测任何 URL 的安全性
+    keywords: 该组的危险关键词元组，为空时使用 DANGER_KEYWORDS
+    返回: 'safe', 'unsafe'
+    """
+    return probe_domain(url, session, timeout, keywords, max_bytes).status
+
+
+NXDOMAIN_RESULT = ProbeResult('unsafe', None, None, 0, None, 'nxdomain')
+NO_ADDRESS_RESULT = ProbeResult('unsafe', None, None, 0, None, 'no address')   # [新] 域名存在但没有 A / AAAA 记录
+
+
+def _hostname(url):
+    return (urlsplit(url if '://' in url else 'http://' + url).hostname or '').lower()
+
+
+class CheckEngine:
+    """
+    [新] 并发检测引擎 (有界线程池)
+    - concurrency: 全局最大并发探测数
+    - per_host_limit: 同一主机的最大并发数 (很多中转链接共用同一个域名)
+    - 每个线程复用一个带连接池的 requests.Session
+    - [新] resolver: DnsResolver，探测前先并发解析所有主机名，不存在的域名不再发起 HTTP 请求，
+      连接时直接使用缓存的地址 (见 dns_resolver.py)
+    """
+
+    def __init__(self, concurrency=32, per_host_limit=4, timeout=5, max_bytes=DEFAULT_MAX_BODY_BYTES, resolver=None):
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.resolver = resolver
+        self._local = threading.local()
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            if self.resolver is not None:
+                adapter = ResolvingAdapter(self.resolver, pool_connections=self.concurrency,
+                                           pool_maxsize=self.per_host_limit)
+            else:
+                adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.per_host_limit)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def _host_slot(self, url):
+        host = _hostname(url)
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+        return slot
+
+    def check(self, url, keywords=None, validator=None):
+        """[新] 返回 ProbeResult"""
+        with self._host_slot(url):
+            return probe_domain(
+                url, session=self._session(), timeout=self.timeout,
+                keywords=keywords, max_bytes=self.max_bytes, validator=validator
+            )
+
+    def run(self, urls, keywords=None, validators=None):
+        """
+        并发检测，按完成顺序产出 (下标, ProbeResult)
+        keywords: 与 urls 一一对应的关键词元组列表 (None 表示全部使用默认关键词)
+        [新] validators: 与 urls 一一对应的上次的 Validator (或 None)
+        """
+        unresolved = {}
+        if self.resolver is not None:
+            # [新] 解析阶段: 所有主机名并发解析一次 (命中缓存的不发查询)
+            addresses = self.resolver.resolve_all(_hostname(url) for url in urls)
+            unresolved = {host: NXDOMAIN_RESULT if found is None else NO_ADDRESS_RESULT
+                          for host, found in addresses.items() if not found}
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            futures = {}
+            for i, url in enumerate(urls):
+                if unresolved and _hostname(url) in unresolved:
+                    # 域名不存在 / 没有地址: 直接判为 unsafe，不建立连接
+                    yield i, unresolved[_hostname(url)]
+                    continue
+                futures[pool.submit(self.check, url, keywords[i] if keywords else None,
+                                    validators[i] if validators else None)] = i
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # [新] 调用方提前停止迭代 (任务被取消) 时，丢弃还没开始的探测，只等正在进行的完成
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# [新] 进程内共享的 DNS 解析器 (缓存在多轮检测之间复用)
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver(config):
+    """CHECK_DNS_CACHE=0 时返回 None (由 requests 自己解析)"""
+    global _resolver
+    if not config['CHECK_DNS_CACHE']:
+        return None
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DnsResolver.from_config(config)
+        return _resolver
+
+
+def dns_stats_delta(before, after):
+    """本次检测期间的解析统计"""
+    delta = {key: after[key] - before[key]
+             for key in ('lookups', 'hits', 'resolutions', 'negative', 'fallbacks', 'resolve_seconds')}
+    delta['resolve_seconds'] = round(delta['resolve_seconds'], 4)
+    delta['cache_size'] = after['cache_size']
+    delta['hit_rate'] = round(delta['hits'] / delta['lookups'], 4) if delta['lookups'] else None
+    delta['avg_resolve_ms'] = round(delta['resolve_seconds'] / delta['resolutions'] * 1000, 2) \
+        if delta['resolutions'] else None
+    return delta
+
+
+def _flush_results(landing_batch, transit_batch, history=(), validators=()):
+    """
+    批量写入一批检测结果 (状态 + 下次检测时间)
+    提交后只把状态真正变化的域名更新到跳转路由表
+    [新] history: 同一批结果的检测历史行 (check_result)，在同一个事务中插入
+    [新] validators: 变化了的缓存验证信息 (check_validator)，同一个事务中写入
+    [新] 状态变化和计数增量作为一个变更事件推送给客户端 (change_feed.py)；状态没变的结果不产生事件
+    [新] 检测期间被删除的域名 (单个 / 批量删除、删除组) 直接跳过: 按 ID 的 UPDATE 匹配不到它们，
+         它们的检测历史、验证信息也不写入，其余域名的结果照常提交
+    [新] 计数增量、变更事件和路由更新按写入时数据库里的当前状态计算，而不是探测前读到的快照
+         (检测期间被编辑过状态的域名不会重复移动计数)
+    """
+    landing_batch = _current_rows(LandingDomain, landing_batch)
+    transit_batch = _current_rows(TransitDomain, transit_batch)
+    live = {('landing', row.id) for row, _ in landing_batch} | {('transit', row.id) for row, _ in transit_batch}
+    history = [item for item in history if (item['kind'], item['domain_id']) in live]
+    validators = [item for item in validators if (item['kind'], item['domain_id']) in live]
+
+    counters = CounterDeltas()
+    for row, values in landing_batch:
+        counters.move('landing', row.group_id, row.status, values['status'])
+    for row, values in transit_batch:
+        counters.move('transit', row.group_id, row.status, values['status'])
+    deltas = counters.apply()
+    changes = [
+        {'kind': kind, 'id': row.id, 'group_id': row.group_id, 'status': values['status']}
+        for kind, batch in (('landing', landing_batch), ('transit', transit_batch))
+        for row, values in batch if values['status'] != row.status
+    ]
+
+    for model, batch in ((LandingDomain, landing_batch), (TransitDomain, transit_batch)):
+        status_changed = [(row.id, {'status': values['status']}) for row, values in batch
+                          if values['status'] != row.status]
+        if status_changed:
+            _update_by_id(model, status_changed)
+    if history:
+        db.session.execute(db.insert(CheckResult), history)
+    if validators:
+        save_validators(validators)
+    if changes:
+        record('domains', changes=changes, deltas=deltas)
+    db.session.commit()
+
+    changed = False
+    for row, values in landing_batch:
+        if values['status'] != row.status:
+            routing_table.set_landing_status(row.group_id, row.id, row.url, values['status'], row.weight)
+            changed = True
+    for row, values in transit_batch:
+        if values['status'] != row.status:
+            routing_table.set_transit_status(row.id, row.url, row.path, row.group_id, values['status'])
+            changed = True
+    if changed:
+        routing_table.publish()
+
+
+def _update_by_id(model, batch):
+    """
+    按 ID 批量更新 (Core executemany)；已被删除的行匹配不到，直接忽略
+    (ORM 的按主键批量 UPDATE 在匹配行数不符时会抛出 StaleDataError，整批回滚)
+    """
+    table = model.__table__
+    rows = [{'b_id': row_id, **{k: v for k, v in values.items() if k != 'id'}}
+            for row_id, values in batch]
+    db.session.execute(db.update(table).where(table.c.id == bindparam('b_id')), rows)
+
+
+def _current_rows(model, batch):
+    """
+    先按 ID 写入检测时间和调度字段 (不含状态)，再在同一个事务中读回这些行的当前值
+    (先写后读: SQLite 上写入已拿到写锁，PostgreSQL 上已锁住这些行，读到的结果在提交前不会再变)
+    返回 [(当前行, values)]，已被删除的域名不在其中；状态由调用方按当前值比较后再写入
+    """
+    if not batch:
+        return batch
+    _update_by_id(model, [(row.id, {k: v for k, v in values.items() if k != 'status'}) for row, values in batch])
+    columns = [getattr(model, name) for name in batch[0][0]._fields]
+    ids = [row.id for row, _ in batch]
+    current = {row.id: row for row in db.session.query(*columns).filter(model.id.in_(ids))}
+    return [(current[row.id], values) for row, values in batch if row.id in current]
+
+
+def due_domains_query(model, columns, now, limit):
+    """next_check_at 已到期的域名，最早到期的优先 (走 next_check_at 索引)"""
+    return db.session.query(*columns).filter(
+        or_(model.next_check_at.is_(None), model.next_check_at <= now)
+    ).order_by(model.next_check_at.asc().nulls_first()).limit(limit)
+
+def _rows_to_check(model, columns, due_only, limit, now, group_id=None, ids=None):
+    """
+    due_only=True 时只取到期的域名；[新] group_id / ids 只取指定组 / 指定 ID 的域名；否则取全部域名
+    """
+    if due_only:
+        return due_domains_query(model, columns, now, limit).all()
+    query = db.session.query(*columns)
+    if ids is not None:
+        if not ids:
+            return []
+        query = query.filter(model.id.in_(ids))
+    if group_id is not None:
+        query = query.filter(model.group_id == group_id)
+    return query.all()
 
-def run_check_job(app):
+def run_check_job(app, due_only=False, group_id=None, landing_ids=None, transit_ids=None, progress=None):
     """
     APScheduler 执行的作业函数
-    [新] 现在会同时检测中转和落地
+    [新] 现在会同时检测中转和落地 (并发探测，分批提交)
+    [新] due_only=True: 只检测到期的域名 (定时任务)，否则检测全部域名 (手动触发)
+         unsafe 域名也会被检测 (恢复探测)
+    [新] group_id: 只检测这个组；landing_ids / transit_ids: 只检测这些域名 (有一个不为 None 时生效)
+    [新] progress: 检测任务队列的进度回调 (check_jobs.JobProgress)，返回 False 时停止检测
+    返回 (已检测数, 结果为 unsafe 的数量, 是否被取消)
     """
     print(f"[{datetime.now()}] Starting domain health check job...")
     with app.app_context():
-        
-        # 1. 检测所有需要检测的落地域名
-        landing_domains_to_check = LandingDomain.query.filter(
-            LandingDomain.status.in_(['pending', 'safe'])
-        ).all()
-        
+        config = app.config
+        policy = CheckSchedulePolicy.from_config(config)
+        now = datetime.utcnow()
+        limit = config['CHECK_MAX_PER_SWEEP']
+        if landing_ids is not None or transit_ids is not None:
+            landing_ids, transit_ids = landing_ids or [], transit_ids or []
+
+        # 1. 只取需要的列，不加载完整 ORM 对象
+        landing_rows = _rows_to_check(LandingDomain, (
+            LandingDomain.id, LandingDomain.group_id, LandingDomain.url, LandingDomain.status,
+            LandingDomain.check_streak, LandingDomain.flap_count, LandingDomain.weight
+        ), due_only, limit, now, group_id, landing_ids)
+
+        # 2. [新] 需要检测的中转域名
+        transit_rows = _rows_to_check(TransitDomain, (
+            TransitDomain.id, TransitDomain.url, TransitDomain.path, TransitDomain.group_id,
+            TransitDomain.status, TransitDomain.check_streak, TransitDomain.flap_count
+        ), due_only, limit, now, group_id, transit_ids)
+
+        # [新] 各组自定义的危险关键词 (没有自定义的组使用默认关键词)
+        group_keywords = {
+            group_id: parse_keywords(text)
+            for group_id, text in db.session.query(DomainGroup.id, DomainGroup.danger_keywords)
+            .filter(DomainGroup.danger_keywords.isnot(None))
+        }
+
+        # [新] 最近一小时的跳转流量，流量大的域名检测得更勤 (见 CheckSchedulePolicy)
+        hour_ago = now - timedelta(hours=1)
+        landing_hits = recent_hits(RedirectHit.landing_id, hour_ago) if landing_rows else {}
+        transit_hits = recent_hits(RedirectHit.transit_id, hour_ago) if transit_rows else {}
+
+        # 探测期间不持有数据库事务
+        db.session.commit()
+
+        if progress is not None:
+            progress.start(len(landing_rows) + len(transit_rows))
+        if not landing_rows and not transit_rows:
+            print("No domains due for checking.")
+            return 0, 0, False
+
+        urls = [row.url for row in landing_rows]
+        urls += [f"http://{row.url}{row.path}" for row in transit_rows]
+        keywords = [group_keywords.get(row.group_id) for row in landing_rows]
+        keywords += [group_keywords.get(row.group_id) for row in transit_rows]
+
+        # [新] 上次探测的缓存验证信息 (条件请求 / 页面摘要)，关键词变过的组不沿用旧结论
+        conditional = config['CHECK_CONDITIONAL']
+        validators = None
+        row_keys = []
+        if conditional:
+            group_keys = {gid: keywords_key(kws) for gid, kws in group_keywords.items()}
+            default_key = keywords_key(DANGER_KEYWORDS)
+            landing_keys = {row.id: group_keys.get(row.group_id, default_key) for row in landing_rows}
+            transit_keys = {row.id: group_keys.get(row.group_id, default_key) for row in transit_rows}
+            max_bytes = config['CHECK_MAX_BODY_BYTES']
+            known_landing = load_validators('landing', landing_keys, max_bytes)
+            known_transit = load_validators('transit', transit_keys, max_bytes)
+            db.session.commit()
+            validators = [known_landing.get(row.id) for row in landing_rows]
+            validators += [known_transit.get(row.id) for row in transit_rows]
+            row_keys = [landing_keys[row.id] for row in landing_rows]
+            row_keys += [transit_keys[row.id] for row in transit_rows]
+
+        resolver = get_resolver(config)
+        dns_before = resolver.stats() if resolver is not None else None
+        engine = CheckEngine(
+            concurrency=config['CHECK_CONCURRENCY'],
+            per_host_limit=config['CHECK_PER_HOST_LIMIT'],
+            timeout=config['CHECK_TIMEOUT'],
+            max_bytes=config['CHECK_MAX_BODY_BYTES'],
+            resolver=resolver,
+        )
+        batch_size = config['CHECK_COMMIT_BATCH']
+
+        # 3. 并发检测，每 batch_size 个结果提交一次
         checked_landing = 0
-        for domain in landing_domains_to_check:
-            new_status = check_domain_safety(domain.url)
-            domain.status = new_status
-            domain.last_checked_at = datetime.utcnow()
-            checked_landing += 1
-        
-        print(f"Checked {checked_landing} landing domains.")
-
-        # 2. [新] 检测所有需要检测的中转域名
-        transit_domains_to_check = TransitDomain.query.filter(
-            TransitDomain.status.in_(['pending', 'safe'])
-        ).all()
-        
         checked_transit = 0
-        for domain in transit_domains_to_check:
-            full_url = f"http://{domain.url}{domain.path}"
-            new_status = check_domain_safety(full_url)
-            domain.status = new_status
-            domain.last_checked_at = datetime.utcnow()
-            checked_transit += 1
-            
-        print(f"Checked {checked_transit} transit domains.")
-
-        # 3. 提交所有更改
-        if checked_landing > 0 or checked_transit > 0:
-            db.session.commit()
-            
-        print(f"Job finished. Checked {checked_landing} landing, {checked_transit} transit.")
\ No newline at end of file
+        unsafe = 0
+        cancelled = False
+        landing_batch = []
+        transit_batch = []
+        history = []
+        changed_validators = []
+        probe_stats = {'not_modified': 0, 'hash_reused': 0, 'bytes_read': 0}
+        record_history = config['CHECK_HISTORY']
+        for i, result in engine.run(urls, keywords, validators):
+            checked_at = datetime.utcnow()
+            new_status = result.status
+            if i < len(landing_rows):
+                row = landing_rows[i]
+                batch = landing_batch
+                hits = landing_hits.get(row.id, 0)
+                checked_landing += 1
+                kind = 'landing'
+            else:
+                row = transit_rows[i - len(landing_rows)]
+                batch = transit_batch
+                hits = transit_hits.get(row.id, 0)
+                checked_transit += 1
+                kind = 'transit'
+            if record_history:
+                history.append(history_row(kind, row.id, row.group_id, result, checked_at))
+            record_probe(kind, result)
+            probe_stats['bytes_read'] += result.bytes_read
+            if result.reused == '304':
+                probe_stats['not_modified'] += 1
+            elif result.reused == 'hash':
+                probe_stats['hash_reused'] += 1
+            if conditional and result.validator is not None and result.validator != validators[i]:
+                changed_validators.append(validator_row(kind, row.id, row.group_id, row_keys[i], result.validator))
+
+            next_check_at, streak, flaps = policy.next_check(
+                row.status, new_status, row.check_streak, row.flap_count, checked_at, hits
+            )
+            batch.append((row, {
+                'id': row.id,
+                'status': new_status,
+                'last_checked_at': checked_at,
+                'next_check_at': next_check_at,
+                'check_streak': streak,
+                'flap_count': flaps,
+            }))
+
+            if new_status == 'unsafe':
+                unsafe += 1
+
+            if len(landing_batch) + len(transit_batch) >= batch_size:
+                _flush_results(landing_batch, transit_batch, history, changed_validators)
+                landing_batch, transit_batch, history, changed_validators = [], [], [], []
+
+            if progress is not None and not progress.update(checked_landing + checked_transit, unsafe):
+                cancelled = True
+                break
+
+        if landing_batch or transit_batch:
+            _flush_results(landing_batch, transit_batch, history, changed_validators)
+
+        print(f"Job {'cancelled' if cancelled else 'finished'}. "
+              f"Checked {checked_landing} landing, {checked_transit} transit.")
+        print(f"Probes: {probe_stats['not_modified']} not modified, {probe_stats['hash_reused']} unchanged, "
+              f"{probe_stats['bytes_read']} bytes scanned.")
+        job_stats = {'probes': probe_stats}
+        if resolver is not None:
+            dns = dns_stats_delta(dns_before, resolver.stats())
+            print(f"DNS: {dns['lookups']} lookups, hit rate {dns['hit_rate']}, "
+                  f"{dns['negative']} not found, avg resolve {dns['avg_resolve_ms']} ms")
+            job_stats['dns'] = dns
+        if progress is not None:
+            progress.record_stats(job_stats)
+        return checked_landing + checked_transit, unsafe, cancelled
@@ -9,4 +9,129 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a-hard-to-guess-string'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # --- [新] 数据库连接 (database.py) ---
+    # SQLite: 每个连接的 PRAGMA (多个 gunicorn worker + 调度器线程并发读写同一个文件)
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') == '1'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()   # NORMAL / FULL
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 10000))
+    # 连接池 (每个进程一个池；PostgreSQL 的总连接数约为 进程数 x (POOL_SIZE + MAX_OVERFLOW))
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',       # 取出连接前先检查 (数据库重启后自动重连)
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),          # 连接最长使用多少秒后重建
+    }
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        )
+
+    # --- [新] 跳转路由表 (routing.py) ---
+    # 多个 worker 共享的路由版本号文件，放在数据卷上
+    ROUTING_VERSION_FILE = os.environ.get('ROUTING_VERSION_FILE') or \
+        os.path.join(basedir, 'routing.version')
+    # 每隔多少秒检查一次共享版本号 (其他 worker 的修改最多延迟这么久生效)
+    ROUTING_SYNC_INTERVAL = float(os.environ.get('ROUTING_SYNC_INTERVAL', 2))
+
+    # --- [新] 跳转过滤 (redirects.py) ---
+    # 逗号分隔，User-Agent 包含其中任意一个 (忽略大小写) 就返回 404
+    BLOCKED_USER_AGENTS = [ua.strip() for ua in os.environ.get(
+        'BLOCKED_USER_AGENTS',
+        'bot,spider,crawler,python-requests,curl,wget,httpclient,java,go-http-client'
+    ).split(',') if ua.strip()]
+    UA_CACHE_SIZE = int(os.environ.get('UA_CACHE_SIZE', 1024))   # 缓存最近多少个 UA 的判定结果
+    # 粘性模式: 同一访客 (Cookie 或 IP) 总是跳到组内同一个落地域名；关闭时按权重随机
+    REDIRECT_STICKY = os.environ.get('REDIRECT_STICKY', '0') == '1'
+    STICKY_COOKIE = os.environ.get('STICKY_COOKIE', 'vid')   # 有这个 Cookie 时用它识别访客，否则用 IP
+    # 独立跳转服务 (redirect_server.py) 每隔多少秒完整刷新一次路由表 (不依赖共享版本号文件)
+    REDIRECT_REFRESH_SECONDS = int(os.environ.get('REDIRECT_REFRESH_SECONDS', 30))
+
+    # --- [新] nginx 路由快照 (routing_export.py) ---
+    # 设置后，路由变化时把健康路由编译成 nginx include 写到这个目录 (与 nginx 容器共享的卷)
+    # 默认关闭，开启前注意这些取舍:
+    #   - nginx 直接返回的跳转不经过 hits.py，不计入 redirect_hit: 流量统计 (hits) 为空，
+    #     按流量调整检测频率 (CheckSchedulePolicy) 也拿不到流量
+    #   - 粘性模式变成 split_clients 按访客哈希分配: 落地域名集合变化时大部分访客会换到别的落地域名，
+    #     不再保证 "集合变化时访客保持原来的落地" (REDIRECT_STICKY 的粘性分配，见 redirects.py)
+    #   - 每次路由变化都重写整个快照 (每个落地域名一个预渲染页面) 并让 nginx 完整 reload，
+    #     域名多、状态变化频繁时开销较大
+    NGINX_SNAPSHOT_DIR = os.environ.get('NGINX_SNAPSHOT_DIR', '')
+    # 写完快照后执行的命令，nginx 与后端在同一台机器时使用，例如 "nginx -s reload"
+    # (docker-compose 部署由 nginx 容器内的 routing-reload.sh 监视版本号并自行 reload)
+    NGINX_RELOAD_COMMAND = os.environ.get('NGINX_RELOAD_COMMAND', '')
+
+    # --- [新] 跳转流量统计 (hits.py) ---
+    HIT_COUNTING = os.environ.get('HIT_COUNTING', '1') == '1'
+    HIT_FLUSH_SECONDS = int(os.environ.get('HIT_FLUSH_SECONDS', 10))           # 每个 worker 多久写一次数据库
+    HIT_MAX_PENDING_KEYS = int(os.environ.get('HIT_MAX_PENDING_KEYS', 100000))  # 未写入的 (分钟, 中转, 落地) 键上限
+    HIT_RETENTION_DAYS = int(os.environ.get('HIT_RETENTION_DAYS', 30))         # 明细保留天数
+
+    # --- [新] Prometheus 指标 (metrics.py) ---
+    # 多进程 (gunicorn / redirect_server --workers) 时还需要设置环境变量 PROMETHEUS_MULTIPROC_DIR (见 gunicorn.conf.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    REDIRECT_METRICS_PORT = int(os.environ.get('REDIRECT_METRICS_PORT', 0))   # redirect_server 的指标端口，0 = 不开启
+
+    # --- [新] 健康检测 (checker.py) ---
+    CHECK_CONCURRENCY = int(os.environ.get('CHECK_CONCURRENCY', 32))      # 全局并发探测数
+    CHECK_PER_HOST_LIMIT = int(os.environ.get('CHECK_PER_HOST_LIMIT', 4))  # 单个主机的并发上限
+    CHECK_TIMEOUT = float(os.environ.get('CHECK_TIMEOUT', 5))             # 单次请求超时 (秒)
+    CHECK_COMMIT_BATCH = int(os.environ.get('CHECK_COMMIT_BATCH', 200))    # 每多少条结果提交一次
+    CHECK_MAX_BODY_BYTES = int(os.environ.get('CHECK_MAX_BODY_BYTES', 1024 * 1024))  # 每个页面最多扫描的字节数
+    # [新] 条件请求 + 页面摘要: 页面没变时沿用上次的关键词结论 (check_validators.py)
+    CHECK_CONDITIONAL = os.environ.get('CHECK_CONDITIONAL', '1') == '1'
+    # [新] DNS 预解析 + 缓存 (dns_resolver.py)
+    CHECK_DNS_CACHE = os.environ.get('CHECK_DNS_CACHE', '1') == '1'
+    DNS_NAMESERVERS = os.environ.get('DNS_NAMESERVERS', '')       # 逗号分隔 "ip[:port]"，为空时读取 /etc/resolv.conf
+    DNS_TIMEOUT = float(os.environ.get('DNS_TIMEOUT', 2))         # 单次查询超时 (秒)
+    DNS_MIN_TTL = int(os.environ.get('DNS_MIN_TTL', 30))          # 缓存时间 = 记录 TTL，限制在 [MIN, MAX] 之间
+    DNS_MAX_TTL = int(os.environ.get('DNS_MAX_TTL', 3600))
+    DNS_NEGATIVE_TTL = int(os.environ.get('DNS_NEGATIVE_TTL', 300))   # NXDOMAIN 最多缓存多久
+    DNS_IPV6 = os.environ.get('DNS_IPV6', '1') == '1'             # 没有 A 记录时再查 AAAA (只有 IPv6 的主机)
+    DNS_CONCURRENCY = int(os.environ.get('DNS_CONCURRENCY', 64))  # 解析阶段的并发数
+
+    # --- [新] 自适应检测间隔 (check_schedule.py) ---
+    CHECK_INTERVAL_MINUTES = int(os.environ.get('CHECK_INTERVAL_MINUTES', 5))                     # 稳定域名的基础间隔
+    CHECK_MIN_INTERVAL_SECONDS = int(os.environ.get('CHECK_MIN_INTERVAL_SECONDS', 60))            # 刚翻转域名的复查间隔
+    CHECK_MAX_INTERVAL_SECONDS = int(os.environ.get('CHECK_MAX_INTERVAL_SECONDS', 3600))          # 长期稳定域名的最长间隔
+    CHECK_UNSAFE_RECOVERY_SECONDS = int(os.environ.get('CHECK_UNSAFE_RECOVERY_SECONDS', 900))     # unsafe 域名恢复探测间隔
+    CHECK_UNSAFE_MAX_INTERVAL_SECONDS = int(os.environ.get('CHECK_UNSAFE_MAX_INTERVAL_SECONDS', 6 * 3600))
+    CHECK_MAX_PER_SWEEP = int(os.environ.get('CHECK_MAX_PER_SWEEP', 5000))                         # 每轮最多检测多少个 (每类)
+
+    # --- [新] 仪表盘统计 (stats.py) ---
+    # 开启后检测器和管理 API 增量维护 domain_counter 表，统计接口不再扫描域名表
+    # 从关闭切换到开启时先执行一次 `flask rebuild-counters`
+    STATS_COUNTER_MODE = os.environ.get('STATS_COUNTER_MODE', '0') == '1'
+
+    # --- [新] 检测任务队列 (check_jobs.py) ---
+    CHECK_QUEUE_POLL_SECONDS = int(os.environ.get('CHECK_QUEUE_POLL_SECONDS', 2))       # leader 多久检查一次排队的任务
+    CHECK_JOB_STALE_SECONDS = int(os.environ.get('CHECK_JOB_STALE_SECONDS', 300))       # running 任务多久没有进度视为中断
+    CHECK_JOB_RETENTION_DAYS = int(os.environ.get('CHECK_JOB_RETENTION_DAYS', 7))       # 已结束任务保留天数
+
+    # --- [新] 分批删除 (deletions.py) ---
+    DELETE_CHUNK_SIZE = int(os.environ.get('DELETE_CHUNK_SIZE', 1000))                  # 每条 DELETE 删除多少行 (每批单独提交)
+    DELETE_BACKGROUND_THRESHOLD = int(os.environ.get('DELETE_BACKGROUND_THRESHOLD', 5000))  # 组内域名超过这么多时在后台删除
+    DELETE_BACKGROUND_PAUSE_MS = int(os.environ.get('DELETE_BACKGROUND_PAUSE_MS', 20))  # 后台删除每批之间暂停多久，让出写锁
+    DELETE_STALE_SECONDS = int(os.environ.get('DELETE_STALE_SECONDS', 300))             # 后台删除多久没有进展视为中断，由 leader 接着删
+
+    # --- [新] 变更推送 (change_feed.py) ---
+    # 共享的最新事件 id (多个 worker 的 ETag / 推送循环只读这个文件)，与路由版本号文件放在同一个卷上；为空时查询数据库
+    CHANGE_VERSION_FILE = os.environ.get('CHANGE_VERSION_FILE', os.path.join(basedir, 'changes.version'))
+    CHANGE_EVENT_RETENTION_HOURS = int(os.environ.get('CHANGE_EVENT_RETENTION_HOURS', 24))   # 事件保留多久 (离线更久的客户端重新加载)
+    CHANGE_POLL_SECONDS = float(os.environ.get('CHANGE_POLL_SECONDS', 1))                  # 推送循环多久读一次版本号
+    CHANGE_STREAM_MAX_SECONDS = int(os.environ.get('CHANGE_STREAM_MAX_SECONDS', 300))      # 一个 SSE 连接最长保持多久 (之后浏览器自动重连)
+    CHANGE_HEARTBEAT_SECONDS = int(os.environ.get('CHANGE_HEARTBEAT_SECONDS', 15))         # 空闲时多久发一次保活注释
+    CHANGE_LONG_POLL_SECONDS = int(os.environ.get('CHANGE_LONG_POLL_SECONDS', 25))         # 长轮询最多等待多久
+
+    # --- [新] 检测历史 (check_history.py) ---
+    CHECK_HISTORY = os.environ.get('CHECK_HISTORY', '1') == '1'
+    CHECK_HISTORY_RAW_HOURS = int(os.environ.get('CHECK_HISTORY_RAW_HOURS', 48))        # 明细保留多久后压缩成小时汇总
+    CHECK_HISTORY_HOURLY_DAYS = int(os.environ.get('CHECK_HISTORY_HOURLY_DAYS', 30))    # 小时汇总保留多久后压缩成天汇总
+    CHECK_HISTORY_DAILY_DAYS = int(os.environ.get('CHECK_HISTORY_DAILY_DAYS', 365))     # 天汇总保留天数
+
+    # --- [新] 定时任务 (leader.py) ---
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+    CHECK_SWEEP_SECONDS = int(os.environ.get('CHECK_SWEEP_SECONDS', 60))    # 多久检查一次到期的域名
+    SCHEDULER_TICK_SECONDS = int(os.environ.get('SCHEDULER_TICK_SECONDS', 15))    # 续约/检查到期的间隔
+    SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS', 60))  # leader 失联多久后被接管
@@ -0,0 +1,35 @@
+# backend/database.py
+"""
+[新] 数据库连接设置 (app.py / redirect_server.py 在 db.init_app() 之后调用 init_app)
+- SQLite: 每个新连接执行 PRAGMA (connect 事件)
+    busy_timeout        写锁被占用时最多等待多久才报 database is locked
+    journal_mode=WAL    读不阻塞写、写不阻塞读: 路由表重建、统计接口不再被检测结果 / 导入的提交卡住
+    synchronous=NORMAL  WAL 模式下只在检查点时 fsync，提交不再每次落盘 (断电最多丢最后几个事务，不会损坏数据库)
+  WAL 要求数据库文件所在的文件系统支持共享内存 (本地磁盘、Docker 卷可以，NFS 等网络文件系统不行)
+- PostgreSQL: 连接池大小、pre-ping、回收时间见 config.py 的 SQLALCHEMY_ENGINE_OPTIONS
+"""
+from sqlalchemy import event
+from models import db
+
+
+def sqlite_pragmas(config):
+    pragmas = [f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}"]
+    if config['SQLITE_WAL']:
+        pragmas.append("PRAGMA journal_mode = WAL")
+    pragmas.append(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    return pragmas
+
+
+def init_app(app):
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in pragmas:
+            cursor.execute(statement)
+        cursor.close()
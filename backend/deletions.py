@@ -0,0 +1,131 @@
+# backend/deletions.py
+"""
+[新] 集合式分批删除 (域名 / 组)
+- 不再通过 ORM 级联把组内域名全部加载进内存逐条删除: 每批一条 DELETE ... WHERE id IN (...)，每批单独提交，
+  SQLite 的写锁每次只持有一小段时间，检测结果、导入等其他写入可以穿插进来
+- 删除组: 先删中转链接 (跳转立即失效)，再删落地域名、验证信息、检测历史、跳转统计，最后删计数器和组本身；
+  PostgreSQL 上外键为 ON DELETE CASCADE (迁移 c5d7e9f1a3b4)，删除期间并发导入的域名随组一起被清理
+- 大组 (域名数超过 DELETE_BACKGROUND_THRESHOLD) 在后台线程中删除: 组先标记 deleting_at，立即从列表和路由中消失，
+  每批提交时刷新 deleting_at；执行的进程中途退出时，由检测队列的 leader 接着删完 (resume_group_deletions)
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import tuple_
+from models import (db, DomainGroup, TransitDomain, LandingDomain, RedirectHit, CheckResult, CheckRollup,
+                    CheckValidator)
+from stats import CounterDeltas, remove_group_counters
+from change_feed import record
+from check_validators import delete_validators
+
+DOMAIN_MODELS = {'landing': LandingDomain, 'transit': TransitDomain}
+
+
+def delete_domains(kind, ids, chunk_size):
+    """
+    按 ID 分批删除域名 (及其验证信息、计数器)，每批单独提交
+    返回被删除域名的路由键: 落地 [(group_id, url), ...] / 中转 [(url, path), ...]
+    """
+    model = DOMAIN_MODELS[kind]
+    route_keys = (model.group_id, model.url) if kind == 'landing' else (model.url, model.path)
+    ids = list(dict.fromkeys(ids))
+    removed = []
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        rows = db.session.query(model.id, model.group_id, model.status, *route_keys).filter(model.id.in_(chunk)).all()
+        if not rows:
+            continue
+        db.session.execute(db.delete(model).where(model.id.in_(chunk)))
+        delete_validators(kind, chunk)
+        counters = CounterDeltas()
+        for _, group_id, status, *_ in rows:
+            counters.add(kind, group_id, status, -1)
+        record('domains', kind=kind, deleted=[domain_id for domain_id, *_ in rows], deltas=counters.apply())
+        db.session.commit()
+        removed.extend(tuple(key) for _, _, _, *key in rows)
+    return removed
+
+
+def group_domain_total(group_id):
+    return sum(
+        db.session.query(db.func.count(model.id)).filter(model.group_id == group_id).scalar()
+        for model in (TransitDomain, LandingDomain)
+    )
+
+
+def group_delete_steps(group_id):
+    """删除一个组时依次清理的表: [(model, 主键列, 条件), ...] (先删中转链接，跳转立即失效)"""
+    return [
+        (TransitDomain, (TransitDomain.id,), TransitDomain.group_id == group_id),
+        (LandingDomain, (LandingDomain.id,), LandingDomain.group_id == group_id),
+        (CheckValidator, (CheckValidator.kind, CheckValidator.domain_id), CheckValidator.group_id == group_id),
+        (CheckResult, (CheckResult.id,), CheckResult.group_id == group_id),
+        (CheckRollup, (CheckRollup.period, CheckRollup.kind, CheckRollup.domain_id, CheckRollup.bucket),
+         db.and_(CheckRollup.period.in_(('hour', 'day')), CheckRollup.group_id == group_id)),
+        (RedirectHit, (RedirectHit.minute, RedirectHit.transit_id, RedirectHit.landing_id),
+         RedirectHit.group_id == group_id),
+    ]
+
+
+def batch_delete_statement(model, key_columns, condition, chunk_size):
+    """DELETE ... WHERE key IN (SELECT key ... WHERE condition LIMIT n)"""
+    key = tuple_(*key_columns) if len(key_columns) > 1 else key_columns[0]
+    batch = db.select(*key_columns).where(condition).limit(chunk_size).correlate(None)
+    return db.delete(model).where(key.in_(batch))
+
+
+def delete_group_rows(group_id, chunk_size, pause=0):
+    """
+    删除一个组的全部数据；可重复执行，中断后再次调用会接着删
+    pause: 每批提交后暂停的秒数，让其他写入者拿到写锁 (后台删除时使用)
+    """
+    for model, key_columns, condition in group_delete_steps(group_id):
+        statement = batch_delete_statement(model, key_columns, condition, chunk_size)
+        while True:
+            deleted = db.session.execute(statement).rowcount
+            # 后台删除的进度心跳 (没有标记 deleting_at 的同步删除不受影响)
+            db.session.execute(db.update(DomainGroup).where(
+                DomainGroup.id == group_id, DomainGroup.deleting_at.isnot(None)).values(deleting_at=datetime.utcnow()))
+            db.session.commit()
+            if deleted < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+    # 最后一个事务: 删除期间新加入的域名 (SQLite 不强制外键，显式删除)、计数器、组本身
+    db.session.execute(db.delete(TransitDomain).where(TransitDomain.group_id == group_id))
+    db.session.execute(db.delete(LandingDomain).where(LandingDomain.group_id == group_id))
+    remove_group_counters(group_id)
+    db.session.execute(db.delete(DomainGroup).where(DomainGroup.id == group_id))
+    record('group', group_id, action='deleted')
+    db.session.commit()
+
+
+def mark_group_deleting(group):
+    group.deleting_at = datetime.utcnow()
+    record('group', group.id, action='deleting')
+    db.session.commit()
+
+
+def delete_group_in_background(app, group_id):
+    """在后台线程中删除已标记 deleting_at 的组"""
+    def run():
+        with app.app_context():
+            try:
+                delete_group_rows(group_id, app.config['DELETE_CHUNK_SIZE'],
+                                  app.config['DELETE_BACKGROUND_PAUSE_MS'] / 1000)
+                print(f"[{datetime.now()}] Group {group_id} deleted in background.")
+            except Exception as e:
+                db.session.rollback()
+                print(f"[{datetime.now()}] Background deletion of group {group_id} failed: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def resume_group_deletions(config):
+    """[leader] 接着删完执行进程已退出 (超过 DELETE_STALE_SECONDS 没有进展) 的后台删除"""
+    cutoff = datetime.utcnow() - timedelta(seconds=config['DELETE_STALE_SECONDS'])
+    group_ids = [group_id for group_id, in db.session.query(DomainGroup.id).filter(DomainGroup.deleting_at < cutoff)]
+    db.session.commit()
+    for group_id in group_ids:
+        print(f"[{datetime.now()}] Resuming interrupted deletion of group {group_id}.")
+        delete_group_rows(group_id, config['DELETE_CHUNK_SIZE'], config['DELETE_BACKGROUND_PAUSE_MS'] / 1000)
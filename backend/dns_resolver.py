@@ -0,0 +1,386 @@
+# backend/dns_resolver.py
+"""
+[新] 检测器的 DNS 预解析 + 缓存
+- 检测前先并发解析所有主机名，NXDOMAIN / 没有地址的域名直接判为 unsafe，不再建立 HTTP 连接
+  (先查 A，没有 A 记录时再查 AAAA；两者都没有才算 "没有地址"，与 "域名不存在" 分开报告)
+- 按记录的 TTL 缓存结果 (NXDOMAIN 按 SOA 的否定缓存时间)，多轮检测之间复用
+- ResolvingAdapter 让 requests 直接连接缓存里的 IP (Host 头、TLS SNI 和证书校验仍然使用原主机名)
+只依赖标准库: 直接向 /etc/resolv.conf (或 DNS_NAMESERVERS) 中的服务器发 UDP 查询以拿到 TTL；
+服务器无响应 / SERVFAIL / 响应被截断时退回 socket.getaddrinfo (使用 fallback_ttl)。
+"""
+import ipaddress
+import random
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+
+TYPE_A = 1
+TYPE_SOA = 6
+TYPE_AAAA = 28
+RCODE_NXDOMAIN = 3
+
+
+class ResolveError(Exception):
+    """服务器无响应 / SERVFAIL 等 (不是 "域名不存在")"""
+
+
+class NoAddress(socket.gaierror):
+    """域名存在 (NOERROR) 但没有可用的地址记录；与 NXDOMAIN 的 socket.gaierror 区分开"""
+
+
+class TruncatedResponse(ResolveError):
+    """响应被截断 (TC): 换服务器 / 重试也一样，直接退回 getaddrinfo"""
+
+
+def system_nameservers(path='/etc/resolv.conf'):
+    servers = []
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver':
+                    servers.append((parts[1], 53))
+    except OSError:
+        pass
+    return servers
+
+
+def parse_nameservers(value):
+    """'1.1.1.1,127.0.0.1:5353' -> [('1.1.1.1', 53), ('127.0.0.1', 5353)]"""
+    servers = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(':') if item.count(':') == 1 else (item, '', '')
+        servers.append((host, int(port) if port else 53))
+    return servers
+
+
+def _hosts_file(path='/etc/hosts'):
+    entries = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split('#', 1)[0].split()
+                for name in parts[1:]:
+                    entries.setdefault(name.lower(), parts[0])
+    except OSError:
+        pass
+    return entries
+
+
+# --- DNS 报文 ---
+
+def build_query(query_id, name, qtype):
+    header = struct.pack('>HHHHHH', query_id, 0x0100, 1, 0, 0, 0)   # RD=1
+    labels = b''.join(bytes([len(part)]) + part for part in name.encode('idna').split(b'.') if part)
+    return header + labels + b'\x00' + struct.pack('>HH', qtype, 1)
+
+
+def _skip_name(data, offset):
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:   # 压缩指针
+            return offset + 2
+        offset += 1
+        if length == 0:
+            return offset
+        offset += length
+
+
+def parse_response(data, query_id, qtype):
+    """返回 (rcode, 地址列表, 最小 TTL)；NXDOMAIN / 无地址时 TTL 来自 SOA (没有 SOA 为 None)"""
+    response_id, flags, qdcount, ancount, nscount, _ = struct.unpack('>HHHHHH', data[:12])
+    if response_id != query_id:
+        raise ResolveError('mismatched response id')
+    if flags & 0x0200:
+        raise TruncatedResponse('truncated response')
+    rcode = flags & 0x000F
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    addresses, ttls = [], []
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, ttl, length = struct.unpack('>HHIH', data[offset:offset + 10])
+        offset += 10
+        if rtype == qtype == TYPE_A and length == 4:
+            addresses.append(socket.inet_ntop(socket.AF_INET, data[offset:offset + 4]))
+            ttls.append(ttl)
+        elif rtype == qtype == TYPE_AAAA and length == 16:
+            addresses.append(socket.inet_ntop(socket.AF_INET6, data[offset:offset + 16]))
+            ttls.append(ttl)
+        offset += length
+
+    if not addresses:
+        # 否定缓存时间 = min(SOA 记录的 TTL, SOA.minimum) (RFC 2308)
+        for _ in range(nscount):
+            offset = _skip_name(data, offset)
+            rtype, _, ttl, length = struct.unpack('>HHIH', data[offset:offset + 10])
+            offset += 10
+            if rtype == TYPE_SOA:
+                rdata = _skip_name(data, _skip_name(data, offset))
+                minimum = struct.unpack('>I', data[rdata + 16:rdata + 20])[0]
+                ttls.append(min(ttl, minimum))
+            offset += length
+    return rcode, addresses, min(ttls) if ttls else None
+
+
+# --- 解析器 ---
+
+class DnsResolver:
+    """
+    线程安全的带 TTL 缓存的解析器
+    resolve(host) 返回地址列表，域名不存在或没有地址时抛出 socket.gaierror (与 getaddrinfo 一致)
+    """
+
+    def __init__(self, nameservers=None, timeout=2.0, attempts=2, min_ttl=30, max_ttl=3600,
+                 negative_ttl=60, fallback_ttl=60, concurrency=64, ipv6=True):
+        self.nameservers = list(nameservers) if nameservers is not None else system_nameservers()
+        self.timeout = timeout
+        self.attempts = max(1, attempts)
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.fallback_ttl = fallback_ttl
+        self.concurrency = max(1, concurrency)
+        self.ipv6 = ipv6
+        self._hosts = _hosts_file()
+        self._cache = {}          # host -> (过期时间, 地址元组, 是否 NXDOMAIN)；地址为空表示不存在 / 没有地址
+        self._inflight = {}       # host -> Event，同一主机同时只发一次查询
+        self._lock = threading.Lock()
+        self._stats = {'lookups': 0, 'hits': 0, 'resolutions': 0, 'negative': 0,
+                       'fallbacks': 0, 'resolve_seconds': 0.0}
+
+    @classmethod
+    def from_config(cls, config):
+        servers = config['DNS_NAMESERVERS']
+        return cls(
+            nameservers=parse_nameservers(servers) if servers else None,
+            timeout=config['DNS_TIMEOUT'],
+            min_ttl=config['DNS_MIN_TTL'],
+            max_ttl=config['DNS_MAX_TTL'],
+            negative_ttl=config['DNS_NEGATIVE_TTL'],
+            concurrency=config['DNS_CONCURRENCY'],
+            ipv6=config['DNS_IPV6'],
+        )
+
+    # --- 对外接口 ---
+
+    def resolve(self, host):
+        host = host.lower().rstrip('.')
+        if _is_ip(host):
+            return [host]
+        while True:
+            with self._lock:
+                self._stats['lookups'] += 1
+                cached = self._cache.get(host)
+                if cached is not None and cached[0] > time.monotonic():
+                    self._stats['hits'] += 1
+                    return self._result(host, cached[1], cached[2])
+                waiter = self._inflight.get(host)
+                if waiter is None:
+                    waiter = self._inflight[host] = threading.Event()
+                    break
+                self._stats['lookups'] -= 1   # 等待后重新计数 (会命中缓存)
+            waiter.wait()
+
+        try:
+            addresses, ttl, nxdomain = self._lookup(host)
+            with self._lock:
+                self._cache[host] = (time.monotonic() + ttl, tuple(addresses), nxdomain)
+            return self._result(host, addresses, nxdomain)
+        finally:
+            with self._lock:
+                del self._inflight[host]
+            waiter.set()
+
+    def resolve_all(self, hosts):
+        """并发解析，返回 {host: 地址列表；[] 表示域名存在但没有地址，None 表示不存在}"""
+        hosts = list(dict.fromkeys(hosts))
+
+        def one(host):
+            try:
+                return self.resolve(host)
+            except NoAddress:
+                return []
+            except socket.gaierror:
+                return None
+
+        if len(hosts) <= 1:
+            return {host: one(host) for host in hosts}
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(hosts))) as pool:
+            return dict(zip(hosts, pool.map(one, hosts)))
+
+    def addresses_for(self, host):
+        """建立连接用的地址 (随机顺序，分散到各个地址；连接失败时调用方依次尝试下一个)"""
+        addresses = self.resolve(host)
+        random.shuffle(addresses)
+        return addresses
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cache_size'] = len(self._cache)
+        stats['hit_rate'] = round(stats['hits'] / stats['lookups'], 4) if stats['lookups'] else None
+        stats['avg_resolve_ms'] = round(stats['resolve_seconds'] / stats['resolutions'] * 1000, 2) \
+            if stats['resolutions'] else None
+        stats['resolve_seconds'] = round(stats['resolve_seconds'], 4)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    # --- 内部 ---
+
+    def _result(self, host, addresses, nxdomain):
+        if not addresses:
+            if nxdomain:
+                raise socket.gaierror(socket.EAI_NONAME, f'{host}: name does not exist')
+            raise NoAddress(socket.EAI_NONAME, f'{host}: no address')
+        return list(addresses)
+
+    def _lookup(self, host):
+        """返回 (地址列表, 缓存秒数, 是否 NXDOMAIN)"""
+        start = time.monotonic()
+        try:
+            if host in self._hosts:
+                return [self._hosts[host]], self.max_ttl, False
+            try:
+                if not self.nameservers:
+                    raise ResolveError('no nameservers configured')
+                addresses, ttl, nxdomain = self._query_servers(host, TYPE_A)
+                if not addresses and not nxdomain and self.ipv6:
+                    # 只有 AAAA 记录的主机 (NOERROR 但没有 A 记录)
+                    addresses, ttl, nxdomain = self._query_servers(host, TYPE_AAAA)
+            except ResolveError:
+                return self._fallback(host)
+            if not addresses:
+                self._count('negative')
+                return [], self.negative_ttl if ttl is None else min(ttl, self.negative_ttl), nxdomain
+            return addresses, min(max(ttl, self.min_ttl), self.max_ttl), False
+        finally:
+            with self._lock:
+                self._stats['resolutions'] += 1
+                self._stats['resolve_seconds'] += time.monotonic() - start
+
+    def _query_servers(self, host, qtype):
+        """返回 (地址列表, TTL, 是否 NXDOMAIN)；NXDOMAIN / 没有该类型的记录时地址列表为空，TTL 为否定 TTL"""
+        last_error = None
+        for _ in range(self.attempts):
+            for server in self.nameservers:
+                try:
+                    rcode, addresses, ttl = self._query(server, host, qtype)
+                except TruncatedResponse:
+                    raise
+                except (OSError, ResolveError, struct.error, IndexError) as e:
+                    last_error = e
+                    continue
+                if rcode == RCODE_NXDOMAIN:
+                    return [], ttl, True
+                if rcode != 0:
+                    last_error = ResolveError(f'rcode {rcode}')
+                    continue
+                return addresses, ttl if ttl is not None else self.negative_ttl, False
+        raise ResolveError(str(last_error))
+
+    def _query(self, server, host, qtype):
+        query_id = random.getrandbits(16)
+        family = socket.AF_INET6 if ':' in server[0] else socket.AF_INET
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(server)
+            sock.send(build_query(query_id, host, qtype))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                data = sock.recv(4096)
+                try:
+                    return parse_response(data, query_id, qtype)
+                except TruncatedResponse:
+                    raise
+                except ResolveError:
+                    if time.monotonic() >= deadline:
+                        raise
+                    # 迟到的旧响应 (id 不同)，继续等
+
+    def _fallback(self, host):
+        self._count('fallbacks')
+        try:
+            infos = socket.getaddrinfo(host, None, socket.AF_UNSPEC if self.ipv6 else socket.AF_INET,
+                                       socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            self._count('negative')
+            return [], self.negative_ttl, e.errno == socket.EAI_NONAME
+        return list(dict.fromkeys(info[4][0] for info in infos)), self.fallback_ttl, False
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+# --- requests 集成 ---
+
+class _ResolvedConnectionMixin:
+    """
+    连接时用解析器缓存里的地址代替系统 DNS；self.host 不变，SNI 和证书校验不受影响
+    一个地址连不上时依次尝试其余地址 (与 getaddrinfo + create_connection 的行为一致)
+    """
+    resolver = None
+
+    def _new_conn(self):
+        original = self._dns_host
+        try:
+            addresses = self.resolver.addresses_for(original)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        last_error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    last_error = e
+            raise last_error
+        finally:
+            self._dns_host = original
+
+
+class ResolvingAdapter(HTTPAdapter):
+    """[新] 使用 DnsResolver 的 HTTPAdapter (域名不存在时抛出 requests.exceptions.ConnectionError)"""
+
+    def __init__(self, resolver, **kwargs):
+        self.resolver = resolver
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        attrs = {'resolver': self.resolver}
+        http_conn = type('ResolvedHTTPConnection', (_ResolvedConnectionMixin, HTTPConnection), attrs)
+        https_conn = type('ResolvedHTTPSConnection', (_ResolvedConnectionMixin, HTTPSConnection), attrs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('ResolvedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_conn}),
+            'https': type('ResolvedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_conn}),
+        }
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['resolver'] = self.resolver
+        return state
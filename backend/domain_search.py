@@ -0,0 +1,165 @@
+# backend/domain_search.py
+"""
+[新] 落地域名列表: 键集 (keyset) 分页 + 基于索引的子串搜索
+- 分页按 (created_at, id) 倒序，游标就是上一页最后一行的这两个值，翻到多深都只走索引
+- 子串搜索: SQLite 使用 FTS5 trigram 虚拟表，PostgreSQL 使用 pg_trgm GIN 索引
+  (迁移 b3e8d5f1c724 创建；少于 3 个字符的搜索词无法用 trigram，退回 LIKE)
+- 总数可选: exact 精确 COUNT / estimate 估算 / none 不统计
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.exc import DBAPIError
+from models import db, DomainGroup, LandingDomain
+from stats import counters_enabled, domain_counts
+
+MAX_PER_PAGE = 200
+TRIGRAM_MIN_LENGTH = 3
+FTS_TABLE = 'landing_domain_fts'
+
+# create_all() 不会创建虚拟表/扩展索引，用于没有跑迁移的库 (query_audit、基准脚本)
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "url, content='landing_domain', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON landing_domain BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, url) VALUES (new.id, new.url); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON landing_domain BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, url) VALUES ('delete', old.id, old.url); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF url ON landing_domain BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, url) VALUES ('delete', old.id, old.url); "
+    f"INSERT INTO {FTS_TABLE}(rowid, url) VALUES (new.id, new.url); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+_POSTGRESQL_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_landing_domain_url_trgm ON landing_domain USING gin (url gin_trgm_ops)",
+)
+
+_fts_available = {}   # engine url -> bool，每个进程只检查一次
+
+
+def ensure_search_index():
+    """为 create_all() 建出来的库补上搜索索引 (已存在时什么都不做)"""
+    dialect = db.session.get_bind().dialect.name
+    statements = {'sqlite': _SQLITE_DDL, 'postgresql': _POSTGRESQL_DDL}.get(dialect, ())
+    for statement in statements:
+        db.session.execute(db.text(statement))
+    db.session.commit()
+    _fts_available.clear()
+
+
+def _sqlite_fts_available():
+    bind = db.session.get_bind()
+    key = str(bind.url)
+    if key not in _fts_available:
+        _fts_available[key] = db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+        ).first() is not None
+    return _fts_available[key]
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_filter(term):
+    """url 包含 term 的过滤条件 (大小写不敏感，与原来 SQLite 上的 LIKE 行为一致)"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite' and len(term) >= TRIGRAM_MIN_LENGTH and _sqlite_fts_available():
+        # trigram 分词器下，带引号的短语就是子串匹配
+        phrase = '"' + term.replace('"', '""') + '"'
+        matches = db.select(db.column('rowid')).select_from(db.table(FTS_TABLE)).where(
+            db.text(f"{FTS_TABLE} MATCH :phrase").bindparams(phrase=phrase))
+        return LandingDomain.id.in_(matches)
+    # PostgreSQL: pg_trgm GIN 索引同时支持 LIKE/ILIKE '%...%'
+    pattern = f'%{_escape_like(term)}%'
+    return LandingDomain.url.ilike(pattern, escape='\\')
+
+
+def encode_cursor(created_at, domain_id):
+    raw = json.dumps([created_at.isoformat() if created_at else None, domain_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """返回 (created_at, id)，格式错误时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, domain_id = json.loads(raw)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(domain_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+def landing_list_query(status=None, search=None):
+    """列表查询: 只取需要的列，并直接 JOIN 组名 (不再逐行懒加载 d.group)"""
+    query = db.session.query(
+        LandingDomain.id, LandingDomain.url, LandingDomain.status,
+        LandingDomain.last_checked_at, LandingDomain.created_at, DomainGroup.name.label('group_name'),
+    ).outerjoin(DomainGroup, DomainGroup.id == LandingDomain.group_id)
+    if status:
+        query = query.filter(LandingDomain.status == status)
+    if search:
+        query = query.filter(search_filter(search))
+    return query
+
+
+def newest_first(query):
+    return query.order_by(LandingDomain.created_at.desc(), LandingDomain.id.desc())
+
+
+def after_cursor(query, cursor):
+    created_at, domain_id = cursor
+    if created_at is None:
+        # created_at 一直有默认值，正常不会是 NULL；万一出现，只在 NULL 行之间按 id 继续
+        return query.filter(LandingDomain.created_at.is_(None), LandingDomain.id < domain_id)
+    return query.filter(tuple_(LandingDomain.created_at, LandingDomain.id) < (created_at, domain_id))
+
+
+def count_rows(query, mode, status=None, search=None):
+    """
+    mode: exact / estimate / none
+    estimate: 计数器模式下用 domain_counter (无搜索时是精确值)，PostgreSQL 用执行计划的行数估计，
+    其他情况退回精确 COUNT
+    """
+    if mode == 'none':
+        return None
+    if mode == 'estimate':
+        if not search:
+            if counters_enabled():
+                return sum(
+                    n for kinds in domain_counts().values()
+                    for s, n in kinds.get('landing', {}).items() if not status or s == status
+                )
+        estimate = _planner_estimate(query)
+        if estimate is not None:
+            return estimate
+    return query.order_by(None).count()
+
+
+def _planner_estimate(query):
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return None
+    stmt = query.order_by(None).statement
+    compiled = stmt.compile(dialect=db.session.get_bind().dialect, compile_kwargs={'literal_binds': True})
+    try:
+        raw = db.session.execute(db.text('EXPLAIN (FORMAT JSON) ' + str(compiled))).scalar()
+    except DBAPIError:
+        db.session.rollback()
+        return None
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def row_to_dict(row):
+    last_checked = row.last_checked_at.isoformat() if row.last_checked_at else None
+    return {
+        'id': row.id,
+        'url': row.url,
+        'status': row.status,
+        'last_checked': last_checked,
+        'last_checked_at': last_checked,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'group': {'name': row.group_name or 'N/A'},
+    }
@@ -0,0 +1,61 @@
+# backend/group_domains.py
+"""
+[新] 组详情页的域名列表
+- 中转 / 落地域名分开分页: 按 id 升序的键集分页 (游标 = 上一页最后一个 id)，可按状态过滤，
+  走 (group_id, id) / (group_id, status) 索引，翻到多深都只读一页的行
+- 整组导出 (NDJSON): 一行一个域名，yield_per 分批读取 (PostgreSQL 上是服务端游标)、逐行序列化，
+  不在内存中构造完整列表
+"""
+import json
+from models import db, TransitDomain, LandingDomain
+
+DOMAIN_MODELS = {'transit': TransitDomain, 'landing': LandingDomain}
+DEFAULT_PER_PAGE = 50
+EXPORT_BATCH = 1000        # 导出时每次从数据库取多少行
+EXPORT_CHUNK_LINES = 500   # 每次向客户端写出多少行
+
+
+def parse_cursor(value):
+    """空字符串 / None 表示第一页；格式错误时抛出 ValueError"""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError as e:
+        raise ValueError(f'Invalid cursor: {value}') from e
+
+
+def group_domains_query(kind, group_id, status=None):
+    model = DOMAIN_MODELS[kind]
+    query = model.query.filter(model.group_id == group_id)
+    if status:
+        query = query.filter(model.status == status)
+    return query.order_by(model.id)
+
+
+def domains_page(kind, group_id, status=None, cursor=None, per_page=DEFAULT_PER_PAGE):
+    """返回 (域名 dict 列表, next_cursor)"""
+    model = DOMAIN_MODELS[kind]
+    query = group_domains_query(kind, group_id, status)
+    if cursor is not None:
+        query = query.filter(model.id > cursor)
+    # 多取一行用来判断是否还有下一页
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    return [row.to_dict() for row in rows], (str(rows[-1].id) if has_more else None)
+
+
+def export_lines(group, kinds, status=None):
+    """NDJSON 导出 (生成器): 第一行是组信息，之后每行一个域名 ({"type": "transit" / "landing", ...})"""
+    yield json.dumps({'type': 'group', **group.to_dict()}, ensure_ascii=False) + '\n'
+    for kind in kinds:
+        lines = []
+        for domain in group_domains_query(kind, group.id, status).yield_per(EXPORT_BATCH):
+            lines.append(json.dumps({'type': kind, **domain.to_dict()}, ensure_ascii=False))
+            if len(lines) >= EXPORT_CHUNK_LINES:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+    db.session.commit()
@@ -0,0 +1,26 @@
+# backend/gunicorn.conf.py
+"""
+[新] Gunicorn 配置 (Dockerfile: gunicorn -c gunicorn.conf.py app:app)
+Prometheus multiprocess 模式: 在 worker 导入 app (以及 prometheus_client) 之前设置 PROMETHEUS_MULTIPROC_DIR，
+启动时清空目录，worker 退出时清理它的 gauge 文件，/metrics 汇总所有 worker 的数值 (见 metrics.py)
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+# [新] 多线程 worker: SSE / 长轮询连接 (/api/changes，见 change_feed.py) 各占一个线程，
+# 同步 worker 会被一个打开的仪表盘整个占住，而且超过 timeout 的请求会被杀掉
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+
+
+def on_starting(server):
+    from metrics import reset_multiprocess_dir
+    reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,152 @@
+# backend/hits.py
+"""
+[新] 跳转流量统计
+- 跳转请求只在进程内的计数字典里 +1 (微秒级，不访问数据库)
+- 每个 worker 的后台任务定期把计数按分钟批量累加进 redirect_hit 表
+- 统计接口按组 / 中转链接 / 落地域名返回时间序列
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from models import db, RedirectHit, LandingDomain, TransitDomain, upsert_increment
+
+_EPOCH = datetime(1970, 1, 1)
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class HitCounter:
+    """
+    进程内的跳转计数: (分钟, (transit_id, group_id), landing_id) -> 次数
+    数据库不可用时计数保留到下一次刷新；待写入的键超过 max_keys 时丢弃新键并计数
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.dropped = 0
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def record(self, route, landing_id):
+        """route: 路由表中的 (transit_id, group_id)"""
+        key = (int(time.time()) // 60, route, landing_id)
+        with self._lock:
+            counts = self._counts
+            n = counts.get(key)
+            if n is not None:
+                counts[key] = n + 1
+            elif len(counts) < self.max_keys:
+                counts[key] = 1
+            else:
+                self.dropped += 1
+
+    def pending(self):
+        return len(self._counts)
+
+    def _drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+    def _restore(self, counts):
+        with self._lock:
+            for key, n in counts.items():
+                if key in self._counts or len(self._counts) < self.max_keys:
+                    self._counts[key] = self._counts.get(key, 0) + n
+                else:
+                    self.dropped += n
+
+    def flush(self, app, retention_days=None):
+        """把累积的计数写入数据库，返回写入的行数"""
+        counts = self._drain()
+        with app.app_context():
+            written = 0
+            if counts:
+                rows = [
+                    {'minute': _EPOCH + timedelta(minutes=minute), 'transit_id': transit_id,
+                     'landing_id': landing_id, 'group_id': group_id, 'hits': n}
+                    for (minute, (transit_id, group_id), landing_id), n in counts.items()
+                ]
+                try:
+                    upsert_increment(RedirectHit, ('minute', 'transit_id', 'landing_id'), 'hits', rows)
+                    db.session.commit()
+                    written = len(rows)
+                except Exception as e:
+                    db.session.rollback()
+                    self._restore(counts)
+                    print(f"[{datetime.now()}] Failed to flush {len(rows)} redirect hit rows: {e}")
+                    return 0
+
+            if retention_days and time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                purge_hits_before(datetime.utcnow() - timedelta(days=retention_days))
+            return written
+
+
+def purge_hits_before(cutoff):
+    deleted = db.session.execute(db.delete(RedirectHit).where(RedirectHit.minute < cutoff)).rowcount
+    db.session.commit()
+    return deleted
+
+
+# --- 查询 ---
+
+def traffic_series_query(column, value, since):
+    return db.session.query(RedirectHit.minute, db.func.sum(RedirectHit.hits)).filter(
+        column == value, RedirectHit.minute >= since
+    ).group_by(RedirectHit.minute).order_by(RedirectHit.minute)
+
+
+def traffic_series(column, value, since, bucket_minutes=1):
+    """
+    column 为 RedirectHit.group_id / transit_id / landing_id 之一
+    返回 ([{'t': 桶起始时间, 'hits': n}, ...], 总次数)，只包含有流量的桶
+    """
+    buckets = {}
+    bucket = timedelta(minutes=bucket_minutes)
+    for minute, hits in traffic_series_query(column, value, since):
+        start = _EPOCH + (minute - _EPOCH) // bucket * bucket
+        buckets[start] = buckets.get(start, 0) + int(hits)
+    series = [{'t': start.isoformat(), 'hits': hits} for start, hits in sorted(buckets.items())]
+    return series, sum(buckets.values())
+
+
+def group_traffic_breakdown(group_id, since):
+    """组内各落地域名 / 中转链接在时间窗口内的总流量 (降序)"""
+    landing = db.session.query(
+        RedirectHit.landing_id, LandingDomain.url, db.func.sum(RedirectHit.hits).label('hits')
+    ).outerjoin(LandingDomain, LandingDomain.id == RedirectHit.landing_id).filter(
+        RedirectHit.group_id == group_id, RedirectHit.minute >= since
+    ).group_by(RedirectHit.landing_id, LandingDomain.url).order_by(db.desc('hits'))
+
+    transit = db.session.query(
+        RedirectHit.transit_id, TransitDomain.url, TransitDomain.path, db.func.sum(RedirectHit.hits).label('hits')
+    ).outerjoin(TransitDomain, TransitDomain.id == RedirectHit.transit_id).filter(
+        RedirectHit.group_id == group_id, RedirectHit.minute >= since
+    ).group_by(RedirectHit.transit_id, TransitDomain.url, TransitDomain.path).order_by(db.desc('hits'))
+
+    return {
+        # url 为 None 表示域名已被删除 (历史流量仍然保留)
+        'landing_domains': [{'id': i, 'url': url, 'hits': int(n)} for i, url, n in landing],
+        'transit_domains': [
+            {'id': i, 'full_url': f"http://{url}{path}" if url else None, 'hits': int(n)} for i, url, path, n in transit
+        ],
+    }
+
+
+def recent_hits_query(column, since):
+    # 不在 SQL 里 GROUP BY: 那样规划器会选 (landing_id, minute) 索引扫完整个保留期，
+    # 这里按主键 (minute 开头) 只读最近的行，再在内存里汇总
+    return db.session.query(column, RedirectHit.hits).filter(RedirectHit.minute >= since)
+
+
+def recent_hits(column, since):
+    """{id: 次数}，column 为 RedirectHit.landing_id 或 transit_id (给检测调度使用)"""
+    totals = {}
+    for domain_id, n in recent_hits_query(column, since):
+        totals[domain_id] = totals.get(domain_id, 0) + n
+    return totals
+
+
+# 每个进程一个实例
+hit_counter = HitCounter()
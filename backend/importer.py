@@ -0,0 +1,151 @@
+# backend/importer.py
+import csv
+import io
+import random
+import re
+import string
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, TransitDomain, LandingDomain
+from stats import CounterDeltas
+from change_feed import record
+
+IMPORT_CHUNK_SIZE = 500   # 每次 IN 查询 / 批量插入的行数
+
+_SPLIT_URLS = re.compile(r'[\s,;\n]+')
+
+
+def split_urls(urls_input):
+    """把文本 (任意空白/逗号/分号分隔) 或列表解析成 URL 列表"""
+    if isinstance(urls_input, str):
+        return [url.strip() for url in _SPLIT_URLS.split(urls_input)]
+    if isinstance(urls_input, list):
+        return [str(url).strip() for url in urls_input]
+    return []
+
+
+def generate_random_path(length=6):
+    """生成一个 5-8 位的随机字母和数字路径"""
+    if length < 5: length = 5
+    if length > 8: length = 8
+    chars = string.ascii_letters + string.digits
+    path = ''.join(random.choice(chars) for _ in range(length))
+    # 以 / 开头
+    return f"/{path}"
+
+
+def iter_uploaded_urls(binary_stream, is_csv=False):
+    """
+    [新] 逐行读取上传的文件/请求体，不把整个文件读进内存
+    CSV 取每行第一列 (自动跳过 url/domain 表头)，普通文本按原来的分隔规则拆分
+    """
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', errors='replace')
+    if is_csv:
+        for row in csv.reader(text):
+            if not row:
+                continue
+            value = row[0].strip()
+            if value.lower() in ('url', 'domain'):
+                continue
+            yield value
+    else:
+        for line in text:
+            yield from split_urls(line)
+
+
+def _insert_ignoring_conflicts(model, rows):
+    """批量插入，唯一约束冲突的行直接跳过 (ON CONFLICT DO NOTHING)，返回实际插入行数"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(model).values(rows).on_conflict_do_nothing()
+    elif dialect == 'postgresql':
+        stmt = postgresql.insert(model).values(rows).on_conflict_do_nothing()
+    else:
+        # 其他数据库: 行已经在内存中和数据库去重过，直接插入
+        stmt = db.insert(model).values(rows)
+    return db.session.execute(stmt).rowcount
+
+
+class BulkImporter:
+    """
+    [新] 批量导入落地/中转域名
+    - 输入在内存中去重
+    - 每 IMPORT_CHUNK_SIZE 个用一次 IN 查询找出已存在的行
+    - 剩下的一次性批量插入 (ON CONFLICT DO NOTHING 兜底并发导入)
+    - 每块单独提交，保持写事务短小
+    用法: importer.add(url) ... importer.finish() -> (added, skipped)
+    """
+
+    def __init__(self, model, group_id, path_type='default', custom_path=''):
+        self.model = model
+        self.group_id = group_id
+        self.path_type = path_type
+        self.custom_path = custom_path
+        self.added = 0
+        self.skipped = 0
+        self._seen = set()
+        self._pending = []
+
+    def _path_for(self):
+        path = "/go" # 默认路径
+        if self.path_type == 'custom':
+            custom_path = self.custom_path or "/custom" # 备用自定义路径
+            path = custom_path if custom_path.startswith('/') else f"/{custom_path}"
+        elif self.path_type == 'random':
+            path = generate_random_path(random.randint(5, 8))
+        return path
+
+    def add(self, url):
+        if not url:
+            return
+        key = (url, self._path_for()) if self.model is TransitDomain else url
+        if key in self._seen:
+            self.skipped += 1
+            return
+        self._seen.add(key)
+        self._pending.append(key)
+        if len(self._pending) >= IMPORT_CHUNK_SIZE:
+            self._flush()
+
+    def add_all(self, urls):
+        for url in urls:
+            self.add(url)
+        return self.finish()
+
+    def finish(self):
+        self._flush()
+        return self.added, self.skipped
+
+    def _flush(self):
+        if not self._pending:
+            return
+        chunk, self._pending = self._pending, []
+        now = datetime.utcnow()
+
+        if self.model is TransitDomain:
+            urls = {url for url, _ in chunk}
+            existing = set(db.session.query(TransitDomain.url, TransitDomain.path).filter(
+                TransitDomain.url.in_(urls)
+            ))
+            rows = [
+                {'url': url, 'path': path, 'group_id': self.group_id, 'status': 'pending', 'created_at': now}
+                for url, path in chunk if (url, path) not in existing
+            ]
+        else:
+            existing = {url for (url,) in db.session.query(LandingDomain.url).filter(
+                LandingDomain.url.in_(chunk)
+            )}
+            rows = [
+                {'url': url, 'group_id': self.group_id, 'status': 'pending', 'created_at': now}
+                for url in chunk if url not in existing
+            ]
+
+        inserted = _insert_ignoring_conflicts(self.model, rows) if rows else 0
+        counters = CounterDeltas()
+        counters.add('transit' if self.model is TransitDomain else 'landing', self.group_id, 'pending', inserted)
+        deltas = counters.apply()
+        if inserted:
+            record('domains', self.group_id, added=inserted, deltas=deltas)
+        db.session.commit()
+        self.added += inserted
+        self.skipped += len(chunk) - inserted
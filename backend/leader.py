@@ -0,0 +1,134 @@
+# backend/leader.py
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+from models import db, SchedulerState
+from change_feed import record
+
+
+def worker_id():
+    """当前进程的唯一标识 (Gunicorn 每个 worker 的 pid 不同)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderJob:
+    """
+    [新] 只在一个进程中运行的定时任务
+    每个 Gunicorn worker 都注册同样的两个 APScheduler 任务:
+    - heartbeat(): 通过数据库行租约选主，并定期续约
+    - tick(): 只有租约持有者在任务到期、且未暂停时才真正执行 func
+    暂停/恢复/下次运行时间都保存在数据库中，所以任何 worker 返回的状态都是一致的。
+    """
+
+    def __init__(self, job_id, func, interval_seconds, lease_seconds):
+        self.job_id = job_id
+        self.func = func
+        self.interval = timedelta(seconds=interval_seconds)
+        self.lease = timedelta(seconds=lease_seconds)
+        self._lease_until = None   # 本进程认为自己持有租约的截止时间
+
+    def is_leader(self):
+        return self._lease_until is not None and datetime.utcnow() < self._lease_until
+
+    # --- APScheduler 调用 ---
+
+    def heartbeat(self, app):
+        with app.app_context():
+            try:
+                self._ensure_state()
+                self._lease_until = self._acquire_lease()
+            except Exception as e:
+                db.session.rollback()
+                self._lease_until = None
+                print(f"[{self.job_id}] Leader heartbeat failed: {e}")
+
+    def tick(self, app):
+        if not self.is_leader():
+            return
+        with app.app_context():
+            if not self._claim_run():
+                return
+            try:
+                self.func(app)
+            finally:
+                self._finish_run()
+
+    # --- 数据库状态 ---
+
+    def _ensure_state(self):
+        if db.session.get(SchedulerState, self.job_id) is None:
+            try:
+                db.session.add(SchedulerState(job_id=self.job_id))
+                db.session.commit()
+            except IntegrityError:
+                # 其他 worker 同时插入了
+                db.session.rollback()
+
+    def _acquire_lease(self):
+        """获取或续约租约，成功返回租约截止时间，否则返回 None"""
+        me = worker_id()
+        now = datetime.utcnow()
+        expires = now + self.lease
+        result = db.session.execute(
+            db.update(SchedulerState)
+            .where(
+                SchedulerState.job_id == self.job_id,
+                or_(
+                    SchedulerState.leader == me,
+                    SchedulerState.leader.is_(None),
+                    SchedulerState.lease_expires_at.is_(None),
+                    SchedulerState.lease_expires_at < now,
+                ),
+            )
+            .values(
+                leader=me,
+                lease_expires_at=expires,
+                # 接管了失效 leader 的租约时，清除它遗留的 running 标记
+                running=case((SchedulerState.leader == me, SchedulerState.running), else_=False),
+            )
+        )
+        db.session.commit()
+        return expires if result.rowcount == 1 else None
+
+    def _claim_run(self):
+        """原子地占用一次到期的运行，同时排定下一次运行时间"""
+        now = datetime.utcnow()
+        result = db.session.execute(
+            db.update(SchedulerState)
+            .where(
+                SchedulerState.job_id == self.job_id,
+                SchedulerState.leader == worker_id(),
+                SchedulerState.paused.is_(False),
+                SchedulerState.running.is_(False),
+                or_(SchedulerState.next_run_at.is_(None), SchedulerState.next_run_at <= now),
+            )
+            .values(running=True, last_started_at=now, next_run_at=now + self.interval)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _finish_run(self):
+        db.session.rollback()
+        db.session.execute(
+            db.update(SchedulerState)
+            .where(SchedulerState.job_id == self.job_id)
+            .values(running=False, last_finished_at=datetime.utcnow())
+        )
+        db.session.commit()
+
+    # --- 管理 API ---
+
+    def state(self):
+        return db.session.get(SchedulerState, self.job_id)
+
+    def set_paused(self, paused):
+        self._ensure_state()
+        db.session.execute(
+            db.update(SchedulerState)
+            .where(SchedulerState.job_id == self.job_id)
+            .values(paused=paused)
+        )
+        record('scheduler', job_id=self.job_id, paused=paused)   # [新] 推送给仪表盘 (change_feed.py)
+        db.session.commit()
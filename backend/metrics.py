@@ -0,0 +1,215 @@
+# backend/metrics.py
+"""
+[新] Prometheus 指标 (GET /metrics)
+- 跳转: 按结果 (success / bot_blocked / invalid_link / no_healthy_landing / admin_path / bad_request)
+  分开的延迟直方图，Flask 路由和 redirect_server 用 server 标签区分
+- 管理 API: 每个请求的耗时和其中数据库查询的耗时 (按 endpoint)
+- 检测器: 探测次数 / 失败原因 / 探测延迟 / 每轮检测耗时
+- 域名数量 (按类型、状态) 和检测队列长度: 抓取时从数据库读取 (DatabaseCollector)，不需要各进程维护
+多进程 (gunicorn 4 个 worker、redirect_server --workers N):
+  设置 PROMETHEUS_MULTIPROC_DIR 后 prometheus_client 使用 multiprocess 模式，每个进程把数值写进该目录下的
+  mmap 文件，/metrics 汇总所有进程。该变量必须在导入 prometheus_client 之前设置 (见 gunicorn.conf.py)。
+  没有设置时 (flask run、单进程) 使用进程内的默认注册表。
+METRICS_ENABLED=0 时所有记录函数都是空操作，/metrics 返回 404。
+"""
+import os
+import shutil
+import time
+from prometheus_client import (CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func
+from models import db, CheckJob
+from stats import domain_counts
+
+# 跳转本身只是内存查表，桶从 50 微秒开始
+REDIRECT_BUCKETS = (.00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, 1)
+REQUEST_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+PROBE_BUCKETS = (.05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+SWEEP_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+REDIRECT_SECONDS = Histogram(
+    'redirect_request_seconds', 'Visitor redirect latency by outcome.', ['server', 'outcome'],
+    buckets=REDIRECT_BUCKETS)
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_seconds', 'Admin API request latency.', ['endpoint', 'method', 'status'],
+    buckets=REQUEST_BUCKETS)
+DB_REQUEST_SECONDS = Histogram(
+    'http_request_db_seconds', 'Time spent in database queries per admin API request.', ['endpoint'],
+    buckets=REQUEST_BUCKETS)
+CHECK_PROBES = Counter('check_probes_total', 'Health check probes by domain kind and verdict.', ['kind', 'status'])
+CHECK_FAILURES = Counter('check_probe_failures_total', 'Unsafe probe verdicts by reason.', ['kind', 'reason'])
+CHECK_PROBE_SECONDS = Histogram(
+    'check_probe_seconds', 'Time to response headers for probes that got a response.', ['kind'],
+    buckets=PROBE_BUCKETS)
+CHECK_SWEEP_SECONDS = Histogram(
+    'check_sweep_seconds', 'Duration of one check job.', ['mode', 'result'], buckets=SWEEP_BUCKETS)
+
+_enabled = True
+_redirect_children = {}
+
+
+def multiprocess_dir():
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir')
+
+
+def reset_multiprocess_dir():
+    """进程组启动时清空上一次运行留下的数值文件 (gunicorn on_starting / redirect_server 父进程)"""
+    directory = multiprocess_dir()
+    if not directory:
+        return
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def mark_process_dead(pid):
+    """子进程退出时清理它的 gauge 文件 (计数器 / 直方图的数值保留，继续计入总数)"""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(value):
+    global _enabled
+    _enabled = bool(value)
+
+
+# --- 记录 ---
+
+def observe_redirect(server, outcome, seconds):
+    if not _enabled:
+        return
+    child = _redirect_children.get((server, outcome))
+    if child is None:
+        child = _redirect_children[(server, outcome)] = REDIRECT_SECONDS.labels(server, outcome)
+    child.observe(seconds)
+
+
+def probe_failure_reason(result):
+    """unsafe 结果的原因: timeout / nxdomain / ConnectionError ... / http_4xx / http_5xx / keyword"""
+    if result.error:
+        return result.error
+    if result.http_code is not None and result.http_code >= 400:
+        return f'http_{result.http_code // 100}xx'
+    return 'keyword'
+
+
+def record_probe(kind, result):
+    if not _enabled:
+        return
+    CHECK_PROBES.labels(kind, result.status).inc()
+    if result.status == 'unsafe':
+        CHECK_FAILURES.labels(kind, probe_failure_reason(result)).inc()
+    if result.latency_ms is not None:
+        CHECK_PROBE_SECONDS.labels(kind).observe(result.latency_ms / 1000)
+
+
+def record_sweep(mode, result, seconds):
+    if _enabled:
+        CHECK_SWEEP_SECONDS.labels(mode, result).observe(seconds)
+
+
+# --- 抓取时从数据库读取的指标 ---
+
+class DatabaseCollector:
+    """域名数量和检测队列长度 (数据库里的当前值，所有进程看到的都一样，不需要 multiprocess gauge)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        from check_jobs import ACTIVE_STATUSES   # check_jobs -> checker -> metrics，只能在这里导入
+
+        domains = GaugeMetricFamily('domains', 'Domains by kind and check status.', labels=['kind', 'status'])
+        queue = GaugeMetricFamily('check_queue_jobs', 'Check jobs waiting or running.', labels=['status'])
+        with self.app.app_context():
+            totals = {}
+            for kinds in domain_counts().values():
+                for kind, statuses in kinds.items():
+                    for status, n in statuses.items():
+                        totals[(kind, status)] = totals.get((kind, status), 0) + n
+            jobs = dict(queue_depth_query().all())
+            db.session.commit()
+        for kind in ('landing', 'transit'):
+            for status in ('pending', 'safe', 'unsafe'):
+                domains.add_metric([kind, status], totals.get((kind, status), 0))
+        for status in ACTIVE_STATUSES:
+            queue.add_metric([status], jobs.get(status, 0))
+        yield domains
+        yield queue
+
+
+def queue_depth_query():
+    from check_jobs import ACTIVE_STATUSES
+    return db.session.query(CheckJob.status, func.count(CheckJob.id)).filter(
+        CheckJob.status.in_(ACTIVE_STATUSES)).group_by(CheckJob.status)
+
+
+def process_registry():
+    """各进程记录的指标: multiprocess 模式下汇总目录中所有进程的文件，否则为本进程的默认注册表"""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def start_metrics_server(port):
+    """[新] 没有 Flask 的进程 (redirect_server) 在单独的端口上提供 /metrics"""
+    from prometheus_client import start_http_server
+    start_http_server(port, registry=process_registry())
+
+
+def render(app=None):
+    """返回 (响应体, Content-Type)；app 不为空时附带数据库指标"""
+    output = generate_latest(process_registry())
+    if app is not None:
+        registry = CollectorRegistry()
+        registry.register(DatabaseCollector(app))
+        output += generate_latest(registry)
+    return output, CONTENT_TYPE_LATEST
+
+
+# --- Flask 集成 ---
+
+def init_app(app):
+    """注册请求计时和数据库查询计时 (跳转路由自己记录 redirect_request_seconds，这里跳过)"""
+    set_enabled(app.config['METRICS_ENABLED'])
+    if not _enabled:
+        return
+    from flask import g, request
+
+    untimed = ('dynamic_redirect_to_landing', 'get_metrics')
+
+    @app.before_request
+    def _start_timer():
+        if request.url_rule is not None and request.url_rule.endpoint not in untimed:
+            g.metrics_start = time.perf_counter()
+            g.metrics_db_seconds = 0.0
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        endpoint = request.url_rule.endpoint
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method, str(response.status_code)).observe(
+            time.perf_counter() - start)
+        DB_REQUEST_SECONDS.labels(endpoint).observe(g.pop('metrics_db_seconds', 0.0))
+        return response
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_query_start'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('metrics_query_start', None)
+        if started is not None and g and 'metrics_db_seconds' in g:
+            g.metrics_db_seconds += time.perf_counter() - started
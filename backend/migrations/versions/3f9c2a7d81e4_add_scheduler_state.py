@@ -0,0 +1,34 @@
+"""Add scheduler_state table for single-leader scheduling.
+
+Revision ID: 3f9c2a7d81e4
+Revises: bae6ea63f182
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d81e4'
+down_revision = 'bae6ea63f182'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduler_state',
+    sa.Column('job_id', sa.String(length=50), nullable=False),
+    sa.Column('paused', sa.Boolean(), nullable=False, server_default=sa.false()),
+    sa.Column('leader', sa.String(length=100), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('running', sa.Boolean(), nullable=False, server_default=sa.false()),
+    sa.Column('next_run_at', sa.DateTime(), nullable=True),
+    sa.Column('last_started_at', sa.DateTime(), nullable=True),
+    sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduler_state')
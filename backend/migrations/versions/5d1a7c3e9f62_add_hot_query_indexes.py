@@ -0,0 +1,46 @@
+"""Add composite indexes for the redirect, checker and listing queries.
+
+Revision ID: 5d1a7c3e9f62
+Revises: e6b3f0a9d214
+Create Date: 2026-10-17 13:05:47.093318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1a7c3e9f62'
+down_revision = 'e6b3f0a9d214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('landing_domain', schema=None) as batch_op:
+        # 组内健康落地域名 / 按组统计
+        batch_op.create_index('ix_landing_domain_group_status', ['group_id', 'status'], unique=False)
+        # 路由表重建 (status='safe') / 按状态筛选并按创建时间排序的列表
+        batch_op.create_index('ix_landing_domain_status_created', ['status', 'created_at'], unique=False)
+        # /api/domains 默认按创建时间倒序
+        batch_op.create_index('ix_landing_domain_created_at', ['created_at'], unique=False)
+        # 检测器按到期时间取任务
+        batch_op.create_index('ix_landing_domain_next_check_at', ['next_check_at'], unique=False)
+
+    with op.batch_alter_table('transit_domain', schema=None) as batch_op:
+        batch_op.create_index('ix_transit_domain_group_status', ['group_id', 'status'], unique=False)
+        batch_op.create_index('ix_transit_domain_status', ['status'], unique=False)
+        batch_op.create_index('ix_transit_domain_next_check_at', ['next_check_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transit_domain', schema=None) as batch_op:
+        batch_op.drop_index('ix_transit_domain_next_check_at')
+        batch_op.drop_index('ix_transit_domain_status')
+        batch_op.drop_index('ix_transit_domain_group_status')
+
+    with op.batch_alter_table('landing_domain', schema=None) as batch_op:
+        batch_op.drop_index('ix_landing_domain_next_check_at')
+        batch_op.drop_index('ix_landing_domain_created_at')
+        batch_op.drop_index('ix_landing_domain_status_created')
+        batch_op.drop_index('ix_landing_domain_group_status')
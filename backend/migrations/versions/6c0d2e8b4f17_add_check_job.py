@@ -0,0 +1,53 @@
+"""Add check_job table for the deduplicated health check queue.
+
+Revision ID: 6c0d2e8b4f17
+Revises: f51e0c8a7b29
+Create Date: 2026-10-17 19:52:31.406218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c0d2e8b4f17'
+down_revision = 'f51e0c8a7b29'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status IN ('queued', 'running')")
+
+
+def upgrade():
+    op.create_table('check_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('landing_ids', sa.Text(), nullable=True),
+    sa.Column('transit_ids', sa.Text(), nullable=True),
+    sa.Column('target_key', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('checked', sa.Integer(), nullable=False),
+    sa.Column('unsafe', sa.Integer(), nullable=False),
+    sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('check_job', schema=None) as batch_op:
+        batch_op.create_index('ix_check_job_status_created', ['status', 'created_at'], unique=False)
+        batch_op.create_index('uq_check_job_active_target', ['target_key'], unique=True,
+                              sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+
+
+def downgrade():
+    with op.batch_alter_table('check_job', schema=None) as batch_op:
+        batch_op.drop_index('uq_check_job_active_target')
+        batch_op.drop_index('ix_check_job_status_created')
+
+    op.drop_table('check_job')
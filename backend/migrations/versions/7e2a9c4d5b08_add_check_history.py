@@ -0,0 +1,67 @@
+"""Add check_result history and check_rollup tables.
+
+Revision ID: 7e2a9c4d5b08
+Revises: 6c0d2e8b4f17
+Create Date: 2026-10-17 20:21:47.930152
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2a9c4d5b08'
+down_revision = '6c0d2e8b4f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('check_result',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('domain_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('checked_at', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('http_code', sa.SmallInteger(), nullable=True),
+    sa.Column('latency_ms', sa.Integer(), nullable=True),
+    sa.Column('bytes_read', sa.Integer(), nullable=False),
+    sa.Column('keyword', sa.String(length=100), nullable=True),
+    sa.Column('error', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('check_result', schema=None) as batch_op:
+        batch_op.create_index('ix_check_result_domain_checked', ['kind', 'domain_id', 'checked_at'], unique=False)
+        batch_op.create_index('ix_check_result_group_checked', ['group_id', 'checked_at'], unique=False)
+        batch_op.create_index('ix_check_result_checked_at', ['checked_at'], unique=False)
+
+    op.create_table('check_rollup',
+    sa.Column('period', sa.String(length=4), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('domain_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('checks', sa.Integer(), nullable=False),
+    sa.Column('unsafe', sa.Integer(), nullable=False),
+    sa.Column('latency_ms_sum', sa.BigInteger(), nullable=False),
+    sa.Column('latency_samples', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('period', 'kind', 'domain_id', 'bucket')
+    )
+    with op.batch_alter_table('check_rollup', schema=None) as batch_op:
+        batch_op.create_index('ix_check_rollup_period_bucket', ['period', 'bucket'], unique=False)
+        batch_op.create_index('ix_check_rollup_group', ['period', 'group_id', 'bucket'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('check_rollup', schema=None) as batch_op:
+        batch_op.drop_index('ix_check_rollup_group')
+        batch_op.drop_index('ix_check_rollup_period_bucket')
+
+    op.drop_table('check_rollup')
+    with op.batch_alter_table('check_result', schema=None) as batch_op:
+        batch_op.drop_index('ix_check_result_checked_at')
+        batch_op.drop_index('ix_check_result_group_checked')
+        batch_op.drop_index('ix_check_result_domain_checked')
+
+    op.drop_table('check_result')
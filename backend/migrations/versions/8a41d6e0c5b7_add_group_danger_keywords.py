@@ -0,0 +1,26 @@
+"""Add per-group danger keywords.
+
+Revision ID: 8a41d6e0c5b7
+Revises: 3f9c2a7d81e4
+Create Date: 2026-10-17 10:03:55.402917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a41d6e0c5b7'
+down_revision = '3f9c2a7d81e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('domain_group', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('danger_keywords', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('domain_group', schema=None) as batch_op:
+        batch_op.drop_column('danger_keywords')
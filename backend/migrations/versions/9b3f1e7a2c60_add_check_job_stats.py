@@ -0,0 +1,25 @@
+"""Add check_job.stats (per-run statistics such as DNS cache hit rate).
+
+Revision ID: 9b3f1e7a2c60
+Revises: 7e2a9c4d5b08
+Create Date: 2026-10-17 21:05:12.418306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3f1e7a2c60'
+down_revision = '7e2a9c4d5b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('check_job', sa.Column('stats', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('check_job', schema=None) as batch_op:
+        batch_op.drop_column('stats')
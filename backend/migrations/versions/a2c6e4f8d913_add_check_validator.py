@@ -0,0 +1,42 @@
+"""Add check_validator (conditional request validators and page hashes).
+
+Revision ID: a2c6e4f8d913
+Revises: 9b3f1e7a2c60
+Create Date: 2026-10-17 21:48:35.602174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c6e4f8d913'
+down_revision = '9b3f1e7a2c60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('check_validator',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('domain_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('etag', sa.String(length=255), nullable=True),
+    sa.Column('last_modified', sa.String(length=64), nullable=True),
+    sa.Column('final_url', sa.Text(), nullable=True),
+    sa.Column('content_hash', sa.String(length=40), nullable=True),
+    sa.Column('hashed_bytes', sa.Integer(), nullable=False),
+    sa.Column('keyword', sa.String(length=100), nullable=True),
+    sa.Column('keywords_key', sa.String(length=40), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'domain_id')
+    )
+    with op.batch_alter_table('check_validator', schema=None) as batch_op:
+        batch_op.create_index('ix_check_validator_group', ['group_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('check_validator', schema=None) as batch_op:
+        batch_op.drop_index('ix_check_validator_group')
+
+    op.drop_table('check_validator')
@@ -0,0 +1,39 @@
+"""Add domain_counter table for maintained dashboard counters.
+
+Revision ID: a9f4b2d6e117
+Revises: 5d1a7c3e9f62
+Create Date: 2026-10-17 14:22:31.664105
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9f4b2d6e117'
+down_revision = '5d1a7c3e9f62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('domain_counter',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('group_id', 'kind', 'status')
+    )
+    # 用现有数据初始化计数器
+    op.execute(
+        "INSERT INTO domain_counter (group_id, kind, status, count) "
+        "SELECT group_id, 'landing', status, COUNT(*) FROM landing_domain GROUP BY group_id, status"
+    )
+    op.execute(
+        "INSERT INTO domain_counter (group_id, kind, status, count) "
+        "SELECT group_id, 'transit', status, COUNT(*) FROM transit_domain GROUP BY group_id, status"
+    )
+
+
+def downgrade():
+    op.drop_table('domain_counter')
@@ -0,0 +1,79 @@
+"""Add keyset pagination indexes and substring search index for landing domains.
+
+Revision ID: b3e8d5f1c724
+Revises: a9f4b2d6e117
+Create Date: 2026-10-17 15:10:42.518236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d5f1c724'
+down_revision = 'a9f4b2d6e117'
+branch_labels = None
+depends_on = None
+
+
+def _has_fts5(bind):
+    try:
+        bind.exec_driver_sql("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x, tokenize='trigram')")
+        bind.exec_driver_sql("DROP TABLE temp._fts5_probe")
+        return True
+    except sa.exc.OperationalError:
+        return False
+
+
+def upgrade():
+    # (created_at, id) / (status, created_at, id): 键集分页按索引顺序读取
+    with op.batch_alter_table('landing_domain', schema=None) as batch_op:
+        batch_op.drop_index('ix_landing_domain_status_created')
+        batch_op.drop_index('ix_landing_domain_created_at')
+        batch_op.create_index('ix_landing_domain_status_created', ['status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_landing_domain_created_at', ['created_at', 'id'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_landing_domain_url_trgm ON landing_domain USING gin (url gin_trgm_ops)')
+    elif bind.dialect.name == 'sqlite':
+        if not _has_fts5(bind):
+            print("SQLite FTS5 trigram tokenizer not available; /api/domains search falls back to LIKE.")
+            return
+        # 外部内容 FTS5 表，由触发器与 landing_domain 保持同步
+        op.execute(
+            "CREATE VIRTUAL TABLE landing_domain_fts USING fts5("
+            "url, content='landing_domain', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER landing_domain_fts_ai AFTER INSERT ON landing_domain BEGIN "
+            "INSERT INTO landing_domain_fts(rowid, url) VALUES (new.id, new.url); END"
+        )
+        op.execute(
+            "CREATE TRIGGER landing_domain_fts_ad AFTER DELETE ON landing_domain BEGIN "
+            "INSERT INTO landing_domain_fts(landing_domain_fts, rowid, url) VALUES ('delete', old.id, old.url); END"
+        )
+        op.execute(
+            "CREATE TRIGGER landing_domain_fts_au AFTER UPDATE OF url ON landing_domain BEGIN "
+            "INSERT INTO landing_domain_fts(landing_domain_fts, rowid, url) VALUES ('delete', old.id, old.url); "
+            "INSERT INTO landing_domain_fts(rowid, url) VALUES (new.id, new.url); END"
+        )
+        op.execute("INSERT INTO landing_domain_fts(landing_domain_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_landing_domain_url_trgm')
+    elif bind.dialect.name == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS landing_domain_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS landing_domain_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS landing_domain_fts_ai')
+        op.execute('DROP TABLE IF EXISTS landing_domain_fts')
+
+    with op.batch_alter_table('landing_domain', schema=None) as batch_op:
+        batch_op.drop_index('ix_landing_domain_created_at')
+        batch_op.drop_index('ix_landing_domain_status_created')
+        batch_op.create_index('ix_landing_domain_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_landing_domain_status_created', ['status', 'created_at'], unique=False)
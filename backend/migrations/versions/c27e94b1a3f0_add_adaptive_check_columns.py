@@ -0,0 +1,32 @@
+"""Add per-domain adaptive check scheduling columns.
+
+Revision ID: c27e94b1a3f0
+Revises: 8a41d6e0c5b7
+Create Date: 2026-10-17 11:20:08.731562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27e94b1a3f0'
+down_revision = '8a41d6e0c5b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('landing_domain', 'transit_domain'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('next_check_at', sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column('check_streak', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('flap_count', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    for table in ('transit_domain', 'landing_domain'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('flap_count')
+            batch_op.drop_column('check_streak')
+            batch_op.drop_column('next_check_at')
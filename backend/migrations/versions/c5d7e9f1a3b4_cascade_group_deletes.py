@@ -0,0 +1,48 @@
+"""ON DELETE CASCADE for domain -> group foreign keys; domain_group.deleting_at for background deletes.
+
+Revision ID: c5d7e9f1a3b4
+Revises: a2c6e4f8d913
+Create Date: 2026-10-17 23:12:40.226518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d7e9f1a3b4'
+down_revision = 'a2c6e4f8d913'
+branch_labels = None
+depends_on = None
+
+DOMAIN_TABLES = ('transit_domain', 'landing_domain')
+
+
+def _group_foreign_keys(bind, table):
+    return [
+        fk['name'] for fk in sa.inspect(bind).get_foreign_keys(table)
+        if fk['referred_table'] == 'domain_group' and fk['constrained_columns'] == ['group_id']
+    ]
+
+
+def _replace_foreign_keys(ondelete):
+    bind = op.get_bind()
+    # SQLite 默认不强制外键 (PRAGMA foreign_keys 关闭)，改约束需要重建表，会丢掉 landing_domain 上的 FTS5 触发器；
+    # 组内域名由 deletions.py 显式分批删除，所以 SQLite 上保持原样
+    if bind.dialect.name == 'sqlite':
+        return
+    for table in DOMAIN_TABLES:
+        for name in _group_foreign_keys(bind, table):
+            op.drop_constraint(name, table, type_='foreignkey')
+            op.create_foreign_key(name, table, 'domain_group', ['group_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    op.add_column('domain_group', sa.Column('deleting_at', sa.DateTime(), nullable=True))
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
+    with op.batch_alter_table('domain_group', schema=None) as batch_op:
+        batch_op.drop_column('deleting_at')
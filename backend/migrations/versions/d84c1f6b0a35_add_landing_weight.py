@@ -0,0 +1,26 @@
+"""Add weight column to landing_domain for weighted landing selection.
+
+Revision ID: d84c1f6b0a35
+Revises: b3e8d5f1c724
+Create Date: 2026-10-17 16:02:19.340871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd84c1f6b0a35'
+down_revision = 'b3e8d5f1c724'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ADD COLUMN 不会重建 landing_domain 表 (FTS5 触发器保持不变)
+    op.add_column('landing_domain', sa.Column('weight', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    # 直接 DROP COLUMN (SQLite >= 3.35)，同样避免重建表丢掉触发器
+    op.drop_column('landing_domain', 'weight')
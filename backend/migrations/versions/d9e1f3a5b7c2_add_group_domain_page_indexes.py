@@ -0,0 +1,33 @@
+"""Add (group_id, id) indexes for the paginated group details lists.
+
+Revision ID: d9e1f3a5b7c2
+Revises: c5d7e9f1a3b4
+Create Date: 2026-10-17 23:58:12.504217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e1f3a5b7c2'
+down_revision = 'c5d7e9f1a3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 组详情页按 id 升序的键集分页 (不按状态过滤时)，避免每页都对整组排序
+    with op.batch_alter_table('landing_domain', schema=None) as batch_op:
+        batch_op.create_index('ix_landing_domain_group_id', ['group_id', 'id'], unique=False)
+
+    with op.batch_alter_table('transit_domain', schema=None) as batch_op:
+        batch_op.create_index('ix_transit_domain_group_id', ['group_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transit_domain', schema=None) as batch_op:
+        batch_op.drop_index('ix_transit_domain_group_id')
+
+    with op.batch_alter_table('landing_domain', schema=None) as batch_op:
+        batch_op.drop_index('ix_landing_domain_group_id')
@@ -0,0 +1,37 @@
+"""Add change_event table for the live change feed.
+
+Revision ID: e3f5a7c9d1b6
+Revises: d9e1f3a5b7c2
+Create Date: 2026-10-18 00:41:09.318502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f5a7c9d1b6'
+down_revision = 'd9e1f3a5b7c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('change_event', schema=None) as batch_op:
+        batch_op.create_index('ix_change_event_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('change_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_event_created_at')
+
+    op.drop_table('change_event')
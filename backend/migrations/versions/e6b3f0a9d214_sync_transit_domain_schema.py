@@ -0,0 +1,61 @@
+"""Bring transit_domain in line with the model (path/status columns).
+
+The initial migration predates the per-path transit links: it created
+transit_domain with a UNIQUE(url) constraint and without the path,
+status and last_checked_at columns. Databases created with
+db.create_all() already have the right shape and are left untouched.
+
+Revision ID: e6b3f0a9d214
+Revises: c27e94b1a3f0
+Create Date: 2026-10-17 12:41:19.520733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3f0a9d214'
+down_revision = 'c27e94b1a3f0'
+branch_labels = None
+depends_on = None
+
+
+def _is_url_only_unique(constraint):
+    return isinstance(constraint, sa.UniqueConstraint) and [c.name for c in constraint.columns] == ['url']
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {c['name'] for c in inspector.get_columns('transit_domain')}
+    if 'path' in columns:
+        return
+
+    # SQLite 需要重建表才能去掉 UNIQUE(url)，用去掉该约束后的反射表作为模板
+    reflected = sa.Table('transit_domain', sa.MetaData(), autoload_with=bind)
+    for constraint in list(reflected.constraints):
+        if _is_url_only_unique(constraint):
+            reflected.constraints.remove(constraint)
+    url_uniques = [
+        uc['name'] for uc in inspector.get_unique_constraints('transit_domain')
+        if uc['column_names'] == ['url'] and uc['name']
+    ]
+
+    with op.batch_alter_table('transit_domain', schema=None, copy_from=reflected) as batch_op:
+        if bind.dialect.name != 'sqlite':
+            for name in url_uniques:
+                batch_op.drop_constraint(name, type_='unique')
+        batch_op.add_column(sa.Column('path', sa.String(length=100), nullable=False, server_default='/go'))
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'))
+        batch_op.add_column(sa.Column('last_checked_at', sa.DateTime(), nullable=True))
+        batch_op.create_unique_constraint('_url_path_uc', ['url', 'path'])
+
+
+def downgrade():
+    with op.batch_alter_table('transit_domain', schema=None) as batch_op:
+        batch_op.drop_constraint('_url_path_uc', type_='unique')
+        batch_op.drop_column('last_checked_at')
+        batch_op.drop_column('status')
+        batch_op.drop_column('path')
+        batch_op.create_unique_constraint('transit_domain_url_key', ['url'])
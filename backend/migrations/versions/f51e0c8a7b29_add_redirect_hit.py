@@ -0,0 +1,40 @@
+"""Add redirect_hit table for per-minute redirect traffic counters.
+
+Revision ID: f51e0c8a7b29
+Revises: d84c1f6b0a35
+Create Date: 2026-10-17 16:48:05.127734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f51e0c8a7b29'
+down_revision = 'd84c1f6b0a35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('redirect_hit',
+    sa.Column('minute', sa.DateTime(), nullable=False),
+    sa.Column('transit_id', sa.Integer(), nullable=False),
+    sa.Column('landing_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('hits', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('minute', 'transit_id', 'landing_id')
+    )
+    with op.batch_alter_table('redirect_hit', schema=None) as batch_op:
+        batch_op.create_index('ix_redirect_hit_group_minute', ['group_id', 'minute'], unique=False)
+        batch_op.create_index('ix_redirect_hit_transit_minute', ['transit_id', 'minute'], unique=False)
+        batch_op.create_index('ix_redirect_hit_landing_minute', ['landing_id', 'minute'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('redirect_hit', schema=None) as batch_op:
+        batch_op.drop_index('ix_redirect_hit_landing_minute')
+        batch_op.drop_index('ix_redirect_hit_transit_minute')
+        batch_op.drop_index('ix_redirect_hit_group_minute')
+
+    op.drop_table('redirect_hit')
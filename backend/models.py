@@ -1,40 +1,80 @@
 # backend/models.py
+import json
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime
 
 db = SQLAlchemy()
 
+
+def parse_keywords(text):
+    """[新] 把每行一个的关键词文本解析成去重后的元组 (保持顺序)"""
+    if not text:
+        return ()
+    return tuple(dict.fromkeys(k.strip().lower() for k in text.splitlines() if k.strip()))
+
+
 class DomainGroup(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # [新] 该组自定义的危险关键词 (每行一个)，为空时使用 checker.DANGER_KEYWORDS
+    danger_keywords = db.Column(db.Text)
+    # [新] 后台删除中的组: 设置后不再出现在列表中，执行删除的进程定期刷新 (见 deletions.py)
+    deleting_at = db.Column(db.DateTime)
     
     # 关系定义
-    transit_domains = db.relationship('TransitDomain', backref='group', lazy=True, cascade="all, delete-orphan")
-    landing_domains = db.relationship('LandingDomain', backref='group', lazy=True, cascade="all, delete-orphan")
+    # [新] passive_deletes: 删除组时不再把所有域名加载进内存逐条删除，由 deletions.py 分批删除 / 数据库 ON DELETE CASCADE
+    transit_domains = db.relationship('TransitDomain', backref='group', lazy=True, cascade="all, delete-orphan",
+                                      passive_deletes=True)
+    landing_domains = db.relationship('LandingDomain', backref='group', lazy=True, cascade="all, delete-orphan",
+                                      passive_deletes=True)
 
-    def to_dict(self):
+    def to_dict(self, counts=None):
+        """
+        counts: group_domain_counts() 中该组的条目；不传时单独查询一次
+        (不再通过 len(self.transit_domains) 加载全部子记录)
+        """
+        if counts is None:
+            counts = group_domain_counts([self.id]).get(self.id, {})
+        transit_counts = counts.get('transit', {})
+        landing_counts = counts.get('landing', {})
         return {
             'id': self.id,
             'name': self.name,
             'created_at': self.created_at.isoformat(),
-            'transit_domains_count': len(self.transit_domains),
-            'landing_domains_count': len(self.landing_domains)
+            'transit_domains_count': sum(transit_counts.values()),
+            'landing_domains_count': sum(landing_counts.values()),
+            'transit_status_counts': transit_counts, # [新] 按状态统计
+            'landing_status_counts': landing_counts,
+            'danger_keywords': parse_keywords(self.danger_keywords) or None
         }
 
+
 class TransitDomain(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     url = db.Column(db.String(255), nullable=False) # 例如 "go1.my-domain.com"
-    group_id = db.Column(db.Integer, db.ForeignKey('domain_group.id'), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey('domain_group.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # --- [新字段] ---
     path = db.Column(db.String(100), nullable=False, default='/go') 
     status = db.Column(db.String(20), default='pending', nullable=False)  # pending, safe, unsafe
     last_checked_at = db.Column(db.DateTime)
+    # [新] 自适应检测调度 (见 check_schedule.py)
+    next_check_at = db.Column(db.DateTime)
+    check_streak = db.Column(db.Integer, default=0, nullable=False)
+    flap_count = db.Column(db.Integer, default=0, nullable=False)
     
     # [新] 确保 "域名 + 路径" 的组合是唯一的
-    __table_args__ = (db.UniqueConstraint('url', 'path', name='_url_path_uc'),)
+    # [新] 热查询索引 (迁移 5d1a7c3e9f62，可用 query_audit.py 检查执行计划)
+    __table_args__ = (
+        db.UniqueConstraint('url', 'path', name='_url_path_uc'),
+        db.Index('ix_transit_domain_group_status', 'group_id', 'status'),
+        db.Index('ix_transit_domain_group_id', 'group_id', 'id'),   # [新] 组详情页分页
+        db.Index('ix_transit_domain_status', 'status'),
+        db.Index('ix_transit_domain_next_check_at', 'next_check_at'),
+    )
 
     def to_dict(self):
         return {
@@ -44,17 +84,36 @@ class TransitDomain(db.Model):
             'full_url': f"http://{self.url}{self.path}", # [新] 组合网址
             'status': self.status, # [新]
             'last_checked_at': self.last_checked_at.isoformat() if self.last_checked_at else None, # [新]
+            'next_check_at': self.next_check_at.isoformat() if self.next_check_at else None,
             'group_id': self.group_id,
             'created_at': self.created_at.isoformat()
         }
 
+
 class LandingDomain(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     url = db.Column(db.String(255), unique=True, nullable=False)
     status = db.Column(db.String(20), default='pending', nullable=False)  # pending, safe, unsafe
-    group_id = db.Column(db.Integer, db.ForeignKey('domain_group.id'), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey('domain_group.id', ondelete='CASCADE'), nullable=False)
     last_checked_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # [新] 自适应检测调度 (见 check_schedule.py)
+    next_check_at = db.Column(db.DateTime)
+    check_streak = db.Column(db.Integer, default=0, nullable=False)
+    flap_count = db.Column(db.Integer, default=0, nullable=False)
+    # [新] 组内流量权重 (0 = 不分配流量)，见 redirects.LandingPool
+    weight = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+
+    # [新] 热查询索引 (迁移 5d1a7c3e9f62，可用 query_audit.py 检查执行计划)
+    # created_at 索引带上 id，/api/domains 的键集分页 (created_at, id) 直接按索引顺序读取 (迁移 b3e8d5f1c724)
+    # url 子串搜索的 FTS5 / pg_trgm 索引见 domain_search.py
+    __table_args__ = (
+        db.Index('ix_landing_domain_group_status', 'group_id', 'status'),
+        db.Index('ix_landing_domain_group_id', 'group_id', 'id'),   # [新] 组详情页分页
+        db.Index('ix_landing_domain_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_landing_domain_created_at', 'created_at', 'id'),
+        db.Index('ix_landing_domain_next_check_at', 'next_check_at'),
+    )
 
     def to_dict(self):
         return {
@@ -62,6 +121,291 @@ class LandingDomain(db.Model):
             'url': self.url,
             'status': self.status,
             'group_id': self.group_id,
+            'weight': self.weight,
             'last_checked_at': self.last_checked_at.isoformat() if self.last_checked_at else None,
+            'next_check_at': self.next_check_at.isoformat() if self.next_check_at else None,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+class SchedulerState(db.Model):
+    """[新] 集群范围的定时任务状态 (每个任务一行)，同时作为选主租约"""
+    job_id = db.Column(db.String(50), primary_key=True)
+    paused = db.Column(db.Boolean, default=False, nullable=False)
+    leader = db.Column(db.String(100))                # 当前持有租约的进程
+    lease_expires_at = db.Column(db.DateTime)
+    running = db.Column(db.Boolean, default=False, nullable=False)
+    next_run_at = db.Column(db.DateTime)
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'paused': self.paused,
+            'leader': self.leader,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'running': self.running,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'last_finished_at': self.last_finished_at.isoformat() if self.last_finished_at else None
+        }
+
+
+def group_domain_counts_query(group_ids=None):
+    queries = []
+    for kind, model in (('transit', TransitDomain), ('landing', LandingDomain)):
+        query = db.select(
+            db.literal(kind).label('kind'), model.group_id, model.status, db.func.count().label('n')
+        )
+        if group_ids is not None:
+            query = query.where(model.group_id.in_(group_ids))
+        queries.append(query.group_by(model.group_id, model.status))
+    return db.union_all(*queries)
+
+
+def group_domain_counts(group_ids=None):
+    """
+    [新] 用一条分组聚合查询 (UNION ALL) 统计各组中转/落地域名数量
+    返回 {group_id: {'transit': {status: n}, 'landing': {status: n}}}
+    """
+    counts = {}
+    for kind, group_id, status, n in db.session.execute(group_domain_counts_query(group_ids)):
+        counts.setdefault(group_id, {}).setdefault(kind, {})[status] = n
+    return counts
+
+
+class DomainCounter(db.Model):
+    """
+    [新] 维护式计数器 (STATS_COUNTER_MODE 开启时由检测器和管理 API 增量更新)
+    每个 (组, 中转/落地, 状态) 一行，统计接口读取它就不需要扫描域名表
+    """
+    group_id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), primary_key=True)     # transit, landing
+    status = db.Column(db.String(20), primary_key=True)   # pending, safe, unsafe
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class RedirectHit(db.Model):
+    """
+    [新] 跳转次数统计: 每分钟每个 (中转链接, 落地域名) 一行
+    跳转请求只在进程内计数 (hits.py)，后台定期批量累加进来
+    """
+    minute = db.Column(db.DateTime, primary_key=True)       # 所在分钟 (UTC，秒为 0)
+    transit_id = db.Column(db.Integer, primary_key=True)
+    landing_id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, nullable=False)
+    hits = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_redirect_hit_group_minute', 'group_id', 'minute'),
+        db.Index('ix_redirect_hit_transit_minute', 'transit_id', 'minute'),
+        db.Index('ix_redirect_hit_landing_minute', 'landing_id', 'minute'),
+    )
+
+
+class CheckResult(db.Model):
+    """
+    [新] 检测历史 (只追加): 每次探测一行，由 run_check_job 随检测结果分批写入
+    超过 CHECK_HISTORY_RAW_HOURS 的行被压缩进 check_rollup (check_history.py)
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)           # 'landing' / 'transit'
+    domain_id = db.Column(db.Integer, nullable=False)
+    group_id = db.Column(db.Integer, nullable=False)
+    checked_at = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    http_code = db.Column(db.SmallInteger)                    # 没有拿到响应时为空
+    latency_ms = db.Column(db.Integer)                        # 收到响应头的耗时
+    bytes_read = db.Column(db.Integer, default=0, nullable=False)
+    keyword = db.Column(db.String(100))                       # 命中的危险关键词
+    error = db.Column(db.String(50))                          # 'timeout' / 异常类型
+
+    __table_args__ = (
+        db.Index('ix_check_result_domain_checked', 'kind', 'domain_id', 'checked_at'),
+        db.Index('ix_check_result_group_checked', 'group_id', 'checked_at'),
+        db.Index('ix_check_result_checked_at', 'checked_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'checked_at': self.checked_at.isoformat(),
+            'status': self.status,
+            'http_code': self.http_code,
+            'latency_ms': self.latency_ms,
+            'bytes_read': self.bytes_read,
+            'keyword': self.keyword,
+            'error': self.error
+        }
+
+
+class CheckRollup(db.Model):
+    """[新] 检测历史的小时 / 天汇总 (period = 'hour' / 'day'，bucket 为该小时 / 该天的起始时间)"""
+    period = db.Column(db.String(4), primary_key=True)
+    kind = db.Column(db.String(10), primary_key=True)
+    domain_id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)
+    group_id = db.Column(db.Integer, nullable=False)
+    checks = db.Column(db.Integer, default=0, nullable=False)
+    unsafe = db.Column(db.Integer, default=0, nullable=False)
+    latency_ms_sum = db.Column(db.BigInteger, default=0, nullable=False)
+    latency_samples = db.Column(db.Integer, default=0, nullable=False)   # 有延迟数据的次数
+
+    __table_args__ = (
+        db.Index('ix_check_rollup_period_bucket', 'period', 'bucket'),
+        db.Index('ix_check_rollup_group', 'period', 'group_id', 'bucket'),
+    )
+
+
+class CheckValidator(db.Model):
+    """
+    [新] 每个域名上一次完整探测的缓存验证信息 (checker.probe_domain 的条件请求)
+    下次探测带上 If-None-Match / If-Modified-Since；服务器返回 304，或页面开头 hashed_bytes 字节的
+    sha1 与 content_hash 相同时，沿用上次的关键词结论 (keyword 为空表示没有命中)
+    keywords_key 是当时使用的关键词集合的摘要，组的关键词改变后旧结论自动失效
+    """
+    kind = db.Column(db.String(10), primary_key=True)     # 'landing' / 'transit'
+    domain_id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, nullable=False)
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))
+    final_url = db.Column(db.Text)                          # 跟随跳转后的地址，304 只在最终地址相同时有效
+    content_hash = db.Column(db.String(40))
+    hashed_bytes = db.Column(db.Integer, default=0, nullable=False)
+    keyword = db.Column(db.String(100))
+    keywords_key = db.Column(db.String(40), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_check_validator_group', 'group_id'),
+    )
+
+
+class CheckJob(db.Model):
+    """
+    [新] 健康检测任务队列 (check_jobs.py)
+    手动触发和定时到期检测都在这里排队，由 leader 进程依次执行，不会重叠。
+    target_key 相同的任务同一时间只能有一个处于 queued/running (部分唯一索引)，重复触发会加入已有任务
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)          # 'due', 'all', 'group', 'domains'
+    group_id = db.Column(db.Integer)                         # kind='group'
+    landing_ids = db.Column(db.Text)                         # kind='domains': JSON 数组
+    transit_ids = db.Column(db.Text)
+    target_key = db.Column(db.String(100), nullable=False)   # 去重键: 'all', 'group:3', 'domains:<hash>' ...
+    status = db.Column(db.String(20), default='queued', nullable=False)   # queued / running / done / cancelled / failed
+    total = db.Column(db.Integer, default=0, nullable=False)
+    checked = db.Column(db.Integer, default=0, nullable=False)
+    unsafe = db.Column(db.Integer, default=0, nullable=False)
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+    error = db.Column(db.Text)
+    stats = db.Column(db.Text)                               # [新] 执行统计 JSON (DNS 解析命中率等)
+    worker = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)                    # 执行中定期更新，超时视为执行进程已退出
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_check_job_status_created', 'status', 'created_at'),
+        db.Index('uq_check_job_active_target', 'target_key', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    def to_dict(self):
+        eta_seconds = None
+        if self.status == 'running' and self.started_at and self.checked:
+            elapsed = (datetime.utcnow() - self.started_at).total_seconds()
+            eta_seconds = round(elapsed / self.checked * max(self.total - self.checked, 0), 1)
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'group_id': self.group_id,
+            'status': self.status,
+            'total': self.total,
+            'checked': self.checked,
+            'unsafe': self.unsafe,
+            'progress': round(self.checked / self.total, 4) if self.total else None,
+            'eta_seconds': eta_seconds,
+            'cancel_requested': self.cancel_requested,
+            'error': self.error,
+            'stats': json.loads(self.stats) if self.stats else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class ChangeEvent(db.Model):
+    """
+    [新] 变更事件 (change_feed.py)
+    检测结果、计数变化、组 / 检测任务 / 调度器的变化与数据修改在同一个事务中写入一行；
+    id 单调递增且按提交顺序分配 (SQLite 使用 AUTOINCREMENT，清理旧事件后也不会复用)，同时作为全局变更版本号
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    type = db.Column(db.String(20), nullable=False)   # 'domains', 'group', 'check_job', 'scheduler', 'reset'
+    group_id = db.Column(db.Integer)
+    payload = db.Column(db.Text)                      # JSON
+
+    __table_args__ = (
+        db.Index('ix_change_event_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'group_id': self.group_id,
+            'created_at': self.created_at.isoformat(),
+            **(json.loads(self.payload) if self.payload else {})
+        }
+
+
+def upsert_increment(model, key_columns, count_column, rows):
+    """
+    [新] 批量 "不存在就插入，存在就累加" (计数器类表共用)
+    rows: [{列名: 值, ...}, ...]，每行的 key_columns 唯一
+    count_column: 累加的列名，或多个列名的元组
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    count_columns = (count_column,) if isinstance(count_column, str) else tuple(count_column)
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in count_columns},
+        )
+        db.session.execute(stmt, rows)
+        return
+    for row in rows:
+        updated = db.session.execute(
+            db.update(model)
+            .where(*(getattr(model, key) == row[key] for key in key_columns))
+            .values({name: getattr(model, name) + row[name] for name in count_columns})
+        ).rowcount
+        if not updated:
+            db.session.add(model(**row))
+
+
+def upsert_replace(model, key_columns, rows):
+    """[新] 批量 "不存在就插入，存在就覆盖" (rows 的所有列都写入)"""
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: stmt.excluded[name] for name in rows[0] if name not in key_columns},
+        )
+        db.session.execute(stmt, rows)
+        return
+    for row in rows:
+        db.session.merge(model(**row))
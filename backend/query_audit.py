@@ -0,0 +1,178 @@
+# backend/query_audit.py
+"""
+[新] 热查询执行计划检查
+对 app.py / checker.py / routing.py 中的热查询执行 EXPLAIN，
+如果任何一个在 landing_domain / transit_domain 上做了全表扫描就以非零状态退出。
+
+用法:
+  python query_audit.py                                   # 临时 SQLite 数据库
+  python query_audit.py --database-url postgresql://...   # PostgreSQL (空库或已迁移的库)
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+
+HOT_TABLES = {'landing_domain', 'transit_domain', 'redirect_hit', 'check_job', 'check_result', 'check_rollup',
+              'check_validator', 'change_event'}
+_SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def hot_queries():
+    """(名称, SQL 语句)；尽量直接复用业务代码中构造查询的函数"""
+    from models import db, LandingDomain, TransitDomain, group_domain_counts_query
+    from routing import safe_transits_query, safe_landings_query
+    from checker import due_domains_query
+    from domain_search import landing_list_query, newest_first, after_cursor
+    from models import RedirectHit
+    from hits import recent_hits_query, traffic_series_query
+    from check_jobs import active_jobs_query, next_queued_query
+    from check_history import (domain_results_query, domain_rollups_query, group_raw_summary_query,
+                               group_rollup_summary_query, _raw_window_rows, _hourly_window_rows)
+    from check_validators import validators_query
+    from metrics import queue_depth_query
+    from models import CheckValidator
+    from deletions import group_delete_steps, batch_delete_statement
+    from group_domains import group_domains_query
+    from models import ChangeEvent
+
+    now = datetime.utcnow()
+    return [
+        ('routing: safe transit links', safe_transits_query().statement),
+        ('routing: safe landing urls', safe_landings_query().statement),
+        ('redirect: transit by url+path+status', TransitDomain.query.filter_by(
+            url='go.example.com', path='/go', status='safe').statement),
+        ('test_redirect: transit by url+path', TransitDomain.query.filter_by(
+            url='go.example.com', path='/go').statement),
+        ('test_redirect: safe landings of group', LandingDomain.query.filter_by(
+            group_id=1, status='safe').statement),
+        ('checker: due landing domains', due_domains_query(LandingDomain, (
+            LandingDomain.id, LandingDomain.url, LandingDomain.status), now, 1000).statement),
+        ('checker: due transit domains', due_domains_query(TransitDomain, (
+            TransitDomain.id, TransitDomain.url, TransitDomain.path, TransitDomain.status), now, 1000).statement),
+        ('groups: per-group domain counts', group_domain_counts_query()),
+        ('/api/domains: newest first', newest_first(landing_list_query()).limit(10).offset(20).statement),
+        ('/api/domains: keyset page', after_cursor(newest_first(landing_list_query()), (now, 1000)).limit(11).statement),
+        ('/api/domains: status filter keyset page', after_cursor(
+            newest_first(landing_list_query(status='unsafe')), (now, 1000)).limit(11).statement),
+        ('/api/domains: substring search', newest_first(landing_list_query(search='example')).limit(11).statement),
+        ('traffic: group series', traffic_series_query(RedirectHit.group_id, 1, now).statement),
+        ('traffic: landing series', traffic_series_query(RedirectHit.landing_id, 1, now).statement),
+        ('checker: recent landing hits', recent_hits_query(RedirectHit.landing_id, now).statement),
+        ('check queue: active job for target', active_jobs_query(['group:1', 'all']).statement),
+        ('check queue: next queued job', next_queued_query().statement),
+        ('metrics: check queue depth', queue_depth_query().statement),
+        ('checker: landing domains of group', db.session.query(LandingDomain.id, LandingDomain.url).filter(
+            LandingDomain.group_id == 1).statement),
+        ('history: domain checks', domain_results_query('landing', 1, now).statement),
+        ('history: domain rollups', domain_rollups_query('landing', 1, now).statement),
+        ('history: group raw summary', group_raw_summary_query(1, now).statement),
+        ('history: group rollup summary', group_rollup_summary_query(1, now).statement),
+        ('history: compact raw window', _raw_window_rows(now, now)[0].statement),
+        ('history: compact hourly window', _hourly_window_rows(now, now)[0].statement),
+        ('validators: load by ids', validators_query('landing', [1, 2, 3]).statement),
+        ('validators: delete group', db.delete(CheckValidator).where(CheckValidator.group_id == 1)),
+        ('group details: transit page', group_domains_query('transit', 1).filter(
+            TransitDomain.id > 1000).limit(51).statement),
+        ('group details: landing page', group_domains_query('landing', 1).filter(
+            LandingDomain.id > 1000).limit(51).statement),
+        ('group details: landing status page', group_domains_query('landing', 1, 'unsafe').filter(
+            LandingDomain.id > 1000).limit(51).statement),
+        ('change feed: events since', ChangeEvent.query.filter(ChangeEvent.id > 1000).order_by(
+            ChangeEvent.id).limit(500).statement),
+        ('change feed: prune', db.delete(ChangeEvent).where(ChangeEvent.created_at < now)),
+        ('delete: landing rows by ids', db.session.query(LandingDomain.group_id, LandingDomain.url).filter(
+            LandingDomain.id.in_([1, 2, 3])).statement),
+    ] + [
+        (f'delete group: {model.__tablename__} batch', batch_delete_statement(model, key_columns, condition, 1000))
+        for model, key_columns, condition in group_delete_steps(1)
+    ]
+
+
+def _execute_explain(conn, prefix, stmt):
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return conn.exec_driver_sql(prefix + compiled.string, params).fetchall()
+
+
+def explain_sqlite(conn, stmt):
+    """返回 (执行计划文本列表, 全表扫描的表)"""
+    rows = _execute_explain(conn, 'EXPLAIN QUERY PLAN ', stmt)
+    plan = [row[3] for row in rows]
+    scans = set()
+    for detail in plan:
+        match = _SQLITE_FULL_SCAN.match(detail)
+        if match and match.group(1) in HOT_TABLES:
+            scans.add(match.group(1))
+    return plan, scans
+
+
+def explain_postgresql(conn, stmt):
+    # 关闭顺序扫描，检查的是“有没有可用的索引”，而不受小表统计信息影响
+    conn.exec_driver_sql('SET enable_seqscan = off')
+    raw = _execute_explain(conn, 'EXPLAIN (FORMAT JSON) ', stmt)[0][0]
+    root = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+    plan, scans = [], set()
+
+    def walk(node, depth=0):
+        relation = node.get('Relation Name')
+        plan.append('  ' * depth + node['Node Type'] + (f' on {relation}' if relation else ''))
+        if node['Node Type'] == 'Seq Scan' and relation in HOT_TABLES:
+            scans.add(relation)
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(root)
+    return plan, scans
+
+
+def audit(app):
+    from models import db
+    from domain_search import ensure_search_index
+    with app.app_context():
+        db.create_all()
+        ensure_search_index()
+        conn = db.session.connection()
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            explain = explain_sqlite
+        elif dialect == 'postgresql':
+            explain = explain_postgresql
+        else:
+            raise SystemExit(f'Unsupported database: {dialect}')
+
+        failures = 0
+        for name, stmt in hot_queries():
+            plan, scans = explain(conn, stmt)
+            verdict = 'FULL SCAN ' + ','.join(sorted(scans)) if scans else 'ok'
+            failures += bool(scans)
+            print(f"[{verdict}] {name}")
+            for line in plan:
+                print(f"      {line}")
+        db.session.rollback()
+        return dialect, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='默认使用一个临时 SQLite 数据库')
+    args = parser.parse_args()
+
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    os.environ['DATABASE_URL'] = args.database_url or \
+        'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'query_audit.db')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app
+
+    dialect, failures = audit(app)
+    print(f"{dialect}: {failures} hot quer{'y' if failures == 1 else 'ies'} with full table scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
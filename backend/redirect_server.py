@@ -0,0 +1,263 @@
+# backend/redirect_server.py
+"""
+[新] 独立的异步跳转服务 (只处理访客跳转，不处理管理 API)
+与 app.py 中 dynamic_redirect_to_landing 行为一致:
+  后台路径过滤 -> UA 过滤 -> 内存路由表查找中转链接 -> 选择健康落地域名 -> 返回预渲染的跳转页面
+- 单线程 asyncio 事件循环 + HTTP/1.1 keep-alive，一个慢请求不会占住别的访客
+- 路由表与 Gunicorn worker 相同 (routing.py)，由后台线程按共享版本号同步，
+  并每 REDIRECT_REFRESH_SECONDS 秒完整刷新一次 (版本号文件不共享时兜底)
+- 跳转计数同样进入 redirect_hit 表 (hits.py)
+数据库访问复用 Flask-SQLAlchemy 的模型和会话，但这里的 Flask 实例不处理任何 HTTP 请求。
+
+用法: python redirect_server.py [--host 0.0.0.0 --port 5002 --workers 2]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import threading
+import time
+from urllib.parse import unquote
+from flask import Flask
+from config import Config
+from models import db
+from routing import routing_table
+from redirects import UserAgentFilter, is_admin_path
+from hits import hit_counter
+import metrics
+import database
+
+MAX_HEADER_BYTES = 16 * 1024
+
+_REASONS = {200: b'OK', 400: b'Bad Request', 404: b'Not Found', 405: b'Method Not Allowed',
+            431: b'Request Header Fields Too Large'}
+
+db_app = Flask(__name__)
+db_app.config.from_object(Config)
+db.init_app(db_app)
+database.init_app(db_app)
+routing_table.init_app(db_app)
+routing_table.auto_sync = False
+hit_counter.max_keys = db_app.config['HIT_MAX_PENDING_KEYS']
+ua_filter = UserAgentFilter(db_app.config['BLOCKED_USER_AGENTS'], db_app.config['UA_CACHE_SIZE'])
+
+_STICKY = db_app.config['REDIRECT_STICKY']
+_STICKY_COOKIE = db_app.config['STICKY_COOKIE'] + '='
+_HIT_COUNTING = db_app.config['HIT_COUNTING']
+metrics.set_enabled(db_app.config['METRICS_ENABLED'])
+
+
+def handle(method, target, headers, peer):
+    """返回 (状态码, 响应体)；headers 的键为小写。[新] 按结果记录跳转延迟"""
+    start = time.perf_counter()
+    outcome, status, body = _route(method, target, headers, peer)
+    metrics.observe_redirect('redirect_server', outcome, time.perf_counter() - start)
+    return status, body
+
+
+def _route(method, target, headers, peer):
+    """返回 (结果, 状态码, 响应体)，结果与 app.py 的 redirect_request_seconds outcome 标签一致"""
+    if method not in ('GET', 'HEAD'):
+        return 'bad_request', 405, b'Method Not Allowed'
+
+    path = unquote(target.split('?', 1)[0])
+    # 与 Flask 的 /<path:path> 一致: path 不含开头的 /
+    if path == '/' or is_admin_path(path[1:]):
+        return 'admin_path', 404, b'Not Found (Admin Endpoint)'
+    if ua_filter.is_blocked(headers.get('user-agent', '')):
+        return 'bot_blocked', 404, b'Not Found (Bot)'
+
+    host = headers.get('host', '').split(':', 1)[0]
+    found = routing_table.lookup(host, path)
+    if found is None:
+        return 'invalid_link', 404, b'Invalid or unhealthy transit link.'
+    transit_route, safe_landings = found
+    if not safe_landings:
+        return 'no_healthy_landing', 404, b'No healthy landing page available.'
+
+    if _STICKY:
+        chosen = safe_landings.pick_sticky(_visitor(headers, peer))
+    else:
+        chosen = safe_landings.pick()
+    if _HIT_COUNTING:
+        hit_counter.record(transit_route, chosen.id)
+    return 'success', 200, chosen.body
+
+
+def _visitor(headers, peer):
+    for part in headers.get('cookie', '').split(';'):
+        part = part.strip()
+        if part.startswith(_STICKY_COOKIE) and len(part) > len(_STICKY_COOKIE):
+            return part[len(_STICKY_COOKIE):]
+    return headers.get('x-real-ip') or peer or ''
+
+
+def _response(status, body, keep_alive, head_only=False):
+    head = b'HTTP/1.1 %d %s\r\nContent-Type: text/html; charset=utf-8\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n' % (
+        status, _REASONS.get(status, b'OK'), len(body), b'keep-alive' if keep_alive else b'close')
+    return head if head_only else head + body
+
+
+class RedirectProtocol(asyncio.Protocol):
+    """最小的 HTTP/1.1 实现: 只接受没有请求体的 GET/HEAD，支持 keep-alive 和管线化"""
+
+    def __init__(self):
+        self.transport = None
+        self.peer = None
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+        peername = transport.get_extra_info('peername')
+        self.peer = peername[0] if peername else None
+
+    def data_received(self, data):
+        self.buffer += data
+        while True:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER_BYTES:
+                    self._fail(431)
+                return
+            head, self.buffer = self.buffer[:end], self.buffer[end + 4:]
+            if not self._handle_head(head):
+                return
+
+    def _handle_head(self, head):
+        try:
+            lines = head.decode('latin-1').split('\r\n')
+            method, target, version = lines[0].split(' ')
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            self._fail(400)
+            return False
+
+        if headers.get('content-length', '0') != '0' or 'transfer-encoding' in headers:
+            # 跳转服务不接受请求体，直接关闭连接 (不用去解析/丢弃请求体)
+            self._fail(405)
+            return False
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        status, body = handle(method, target, headers, self.peer)
+        self.transport.write(_response(status, body, keep_alive, head_only=method == 'HEAD'))
+        if not keep_alive:
+            self.transport.close()
+            return False
+        return True
+
+    def _fail(self, status):
+        self.transport.write(_response(status, _REASONS[status], keep_alive=False))
+        self.transport.close()
+        self.buffer = b''
+
+
+# --- 后台线程: 路由表同步 / 计数写入 ---
+
+def _background_loop(stop):
+    config = db_app.config
+    sync_every = config['ROUTING_SYNC_INTERVAL']
+    next_full = time.monotonic() + config['REDIRECT_REFRESH_SECONDS']
+    next_flush = time.monotonic() + config['HIT_FLUSH_SECONDS']
+    while not stop.wait(sync_every):
+        now = time.monotonic()
+        try:
+            with db_app.app_context():
+                if now >= next_full:
+                    routing_table.rebuild()
+                    next_full = now + config['REDIRECT_REFRESH_SECONDS']
+                else:
+                    routing_table.sync()
+        except Exception as e:
+            print(f"[redirect_server] Routing refresh failed: {e}")
+        if _HIT_COUNTING and now >= next_flush:
+            hit_counter.flush(db_app, config['HIT_RETENTION_DAYS'])
+            next_flush = now + config['HIT_FLUSH_SECONDS']
+
+
+def serve(host, port, reuse_port=False):
+    with db_app.app_context():
+        routing_table.rebuild()
+    stop = threading.Event()
+    threading.Thread(target=_background_loop, args=(stop,), daemon=True).start()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = loop.run_until_complete(loop.create_server(
+        RedirectProtocol, host, port, reuse_port=reuse_port or None, backlog=1024))
+    print(f"[redirect_server] pid {os.getpid()} listening on {host}:{port}", flush=True)
+    serving = loop.create_task(server.serve_forever())
+    # docker stop 发送 SIGTERM: 停止接收连接，写完剩余的跳转计数再退出
+    loop.add_signal_handler(signal.SIGTERM, serving.cancel)
+    try:
+        loop.run_until_complete(serving)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        stop.set()
+        if _HIT_COUNTING:
+            hit_counter.flush(db_app)
+        server.close()
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Redirect-only asyncio server')
+    parser.add_argument('--host', default=os.environ.get('REDIRECT_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('REDIRECT_PORT', 5002)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('REDIRECT_WORKERS', 1)),
+                        help='进程数 (多进程通过 SO_REUSEPORT 共享端口)')
+    parser.add_argument('--metrics-port', type=int, default=db_app.config['REDIRECT_METRICS_PORT'],
+                        help='在这个端口提供 Prometheus /metrics (0 = 不开启)')
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        if args.metrics_port and metrics.enabled():
+            metrics.start_metrics_server(args.metrics_port)
+        serve(args.host, args.port)
+        return
+    supervise(args.host, args.port, args.workers, args.metrics_port)
+
+
+def supervise(host, port, workers, metrics_port=0):
+    """
+    多进程: 在连接数据库 / 启动线程之前 fork，每个子进程有自己的路由表和事件循环，
+    通过 SO_REUSEPORT 共享端口。父进程只负责把 SIGTERM/SIGINT 转发给子进程并等待它们退出
+    [新] metrics_port: 父进程汇总所有子进程的指标 (需要 PROMETHEUS_MULTIPROC_DIR)
+    """
+    serve_metrics = bool(metrics_port) and metrics.enabled()
+    if serve_metrics and not metrics.multiprocess_dir():
+        print("[redirect_server] PROMETHEUS_MULTIPROC_DIR is not set, metrics server disabled.", flush=True)
+        serve_metrics = False
+    if serve_metrics:
+        metrics.reset_multiprocess_dir()
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl+C 由父进程转发为 SIGTERM
+            serve(host, port, reuse_port=True)
+            os._exit(0)
+        children.append(pid)
+    if serve_metrics:
+        # fork 完再启动 HTTP 线程，子进程不继承它
+        metrics.start_metrics_server(metrics_port)
+
+    def stop_children(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
+    for pid in children:
+        os.waitpid(pid, 0)
+        metrics.mark_process_dead(pid)
+
+if __name__ == '__main__':
+    main()
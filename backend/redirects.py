@@ -0,0 +1,150 @@
+# backend/redirects.py
+"""
+[新] 跳转热路径的纯 CPU 部分
+- 跳转页面按落地 URL 预先渲染成 bytes (路由表重建/增量更新时生成，请求时直接返回)
+- 后台路径 / 爬虫 User-Agent 过滤各用一个预编译正则一次匹配，UA 判定结果带 LRU 缓存
+- 组内按权重选择落地域名 (别名表)，可选按访客粘性选择 (一致性哈希)
+"""
+import bisect
+import hashlib
+import html
+import json
+import random
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# 路由表里每个健康落地域名对应一项
+LandingPage = namedtuple('LandingPage', ['id', 'url', 'body'])
+
+ADMIN_PREFIXES = ('api', 'assets', 'all-domains', 'group', 'favicon.ico')
+
+_PAGE_TEMPLATE = """
+    <html>
+        <head>
+            <title>Loading...</title>
+            <meta http-equiv="refresh" content="0;url={attr_url}" />
+        </head>
+        <body>
+            <p>Loading, please wait...</p>
+            <script type="text/javascript">
+                window.location.href = {js_url};
+            </script>
+        </body>
+    </html>
+    """
+
+_ADMIN_PATH = re.compile('|'.join(re.escape(p) for p in ADMIN_PREFIXES))
+
+
+def render_redirect_page(url):
+    """
+    渲染一个落地 URL 的跳转页面
+    属性值用 HTML 转义；JS 字符串用 JSON 编码，并转义 < > & 防止提前闭合 </script>
+    """
+    js_url = json.dumps(url).replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+    page = _PAGE_TEMPLATE.format(attr_url=html.escape(url, quote=True), js_url=js_url)
+    return page.encode('utf-8')
+
+
+def landing_page(landing_id, url):
+    return LandingPage(landing_id, url, render_redirect_page(url))
+
+
+def is_admin_path(path):
+    """后台管理页面的路径 (原来的 any(path.startswith(p) ...))"""
+    return path == '/' or _ADMIN_PATH.match(path) is not None
+
+
+class UserAgentFilter:
+    """
+    爬虫/脚本 User-Agent 过滤
+    所有关键词编译成一个忽略大小写的正则，一次扫描完成；
+    同一个 UA 字符串会反复出现，最近的判定结果放在 LRU 缓存中
+    """
+
+    def __init__(self, patterns, cache_size=1024):
+        patterns = [p for p in patterns if p]
+        self.patterns = tuple(patterns)
+        self._regex = re.compile('|'.join(re.escape(p) for p in patterns), re.I) if patterns else None
+        self.is_blocked = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, user_agent):
+        return self._regex is not None and self._regex.search(user_agent) is not None
+
+
+# --- [新] 组内落地域名选择 ---
+
+VNODES_PER_WEIGHT = 32   # 粘性模式下每单位权重在哈希环上的虚拟节点数
+MAX_WEIGHT = 100
+
+
+def stable_hash(value):
+    """跨进程稳定的 64 位哈希 (内置 hash() 每个进程的种子不同)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class LandingPool:
+    """
+    一个组的健康落地域名 (不可变，路由表变化时整体替换)
+    - pick(): 按权重随机选择，Vose 别名表，O(1)
+    - pick_sticky(key): 一致性哈希环，同一访客总是落到同一个域名；
+      某个域名下线时只有原来落在它上面的访客被重新分配
+    weight 为 0 的域名不分配流量
+    """
+
+    __slots__ = ('pages', 'weights', '_n', '_prob', '_alias', '_ring')
+
+    def __init__(self, weighted_pages):
+        weighted_pages = [(page, weight) for page, weight in weighted_pages if weight > 0]
+        self.pages = tuple(page for page, _ in weighted_pages)
+        self.weights = tuple(weight for _, weight in weighted_pages)
+        self._n = len(self.pages)
+        self._prob, self._alias = self._build_alias(self.weights)
+        self._ring = None   # 哈希环在第一次粘性选择时才构建 (非粘性模式不付出这个成本)
+
+    def __bool__(self):
+        return self._n > 0
+
+    def __len__(self):
+        return self._n
+
+    def _build_alias(self, weights):
+        n = len(weights)
+        if not n:
+            return (), ()
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(self.pages)
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = self.pages[l]
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # 剩下的 (浮点误差) 概率都是 1
+        return tuple(prob), tuple(alias)
+
+    def _build_ring(self):
+        # 虚拟节点位置只取决于 URL，其他域名增减不会移动它们
+        points = sorted(
+            (stable_hash(f'{page.url}#{i}'), page.url, page)
+            for page, weight in zip(self.pages, self.weights)
+            for i in range(min(weight, MAX_WEIGHT) * VNODES_PER_WEIGHT)
+        )
+        return tuple(h for h, _, _ in points), tuple(page for _, _, page in points)
+
+    def pick(self):
+        u = random.random() * self._n
+        i = int(u)
+        return self.pages[i] if u - i < self._prob[i] else self._alias[i]
+
+    def pick_sticky(self, key):
+        if self._ring is None:
+            self._ring = self._build_ring()   # 并发时可能重复构建，结果相同，无需加锁
+        hashes, pages = self._ring
+        i = bisect.bisect_right(hashes, stable_hash(key))
+        return pages[i if i < len(pages) else 0]
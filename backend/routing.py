@@ -0,0 +1,188 @@
+# backend/routing.py
+import os
+import threading
+import time
+import fcntl
+from models import db, DomainGroup, TransitDomain, LandingDomain
+from redirects import landing_page, LandingPool
+
+
+def safe_transits_query():
+    """路由表重建: 所有健康的中转链接 (只取需要的列)；[新] 后台删除中的组不再参与跳转"""
+    deleting = db.select(DomainGroup.id).where(DomainGroup.deleting_at.isnot(None))
+    return db.session.query(
+        TransitDomain.id, TransitDomain.url, TransitDomain.path, TransitDomain.group_id
+    ).filter(TransitDomain.status == 'safe', TransitDomain.group_id.notin_(deleting))
+
+
+def safe_landings_query():
+    """路由表重建: 所有健康的落地域名 (只取需要的列)"""
+    return db.session.query(
+        LandingDomain.group_id, LandingDomain.id, LandingDomain.url, LandingDomain.weight
+    ).filter(LandingDomain.status == 'safe')
+
+
+class RoutingTable:
+    """
+    每个 worker 进程内的跳转路由表 (跳转热路径不访问数据库)
+    (host, path) -> (transit_id, group_id) 只包含 status='safe' 的中转链接
+    group_id     -> LandingPool           只包含 status='safe' 的落地域名，带预渲染的跳转页面和权重
+
+    多个 Gunicorn worker 之间通过一个共享的版本号文件同步:
+    任何进程修改了路由相关数据后递增版本号，
+    其他进程在下一次同步检查时发现版本变化，就从数据库重建路由表。
+    """
+
+    def __init__(self):
+        self._transits = {}
+        self._landings = {}    # group_id -> LandingPool (不可变，热路径只读)
+        self._members = {}     # group_id -> {url: (LandingPage, weight)}，增量更新时据此重建 LandingPool
+        self._lock = threading.Lock()
+        self._version = None   # None = 尚未加载
+        self._next_sync = 0.0
+        self.version_file = None
+        self.sync_interval = 2.0
+        self.auto_sync = True   # False: 由调用方在后台线程里调用 sync() (异步跳转服务，见 redirect_server.py)
+
+    def init_app(self, app):
+        self.version_file = app.config['ROUTING_VERSION_FILE']
+        self.sync_interval = app.config['ROUTING_SYNC_INTERVAL']
+
+    # --- 热路径 ---
+
+    def lookup(self, host, path):
+        """
+        返回 ((transit_id, group_id), 该组的 LandingPool (见 redirects.py))
+        None = 中转链接不存在或不健康, 空 pool = 组内没有健康落地域名
+        """
+        now = time.monotonic()
+        if now >= self._next_sync and self.auto_sync:
+            self._sync(now)
+        route = self._transits.get((host, path))
+        if route is None:
+            return None
+        return route, self._landings.get(route[1], _EMPTY_POOL)
+
+    # --- 同步与重建 ---
+
+    def sync(self):
+        """共享版本号变化时从数据库重建 (需要 app context)"""
+        self._sync(time.monotonic())
+
+    def _sync(self, now):
+        with self._lock:
+            if now < self._next_sync:
+                return
+            shared = self._read_version()
+            if shared != self._version:
+                self._rebuild_locked(shared)
+            self._next_sync = now + self.sync_interval
+
+    def rebuild(self):
+        """从数据库完整重建路由表 (只查询需要的列，不加载 ORM 对象)"""
+        with self._lock:
+            self._rebuild_locked(self._read_version())
+            self._next_sync = time.monotonic() + self.sync_interval
+
+    def _rebuild_locked(self, version):
+        transits = {
+            (url, path): (transit_id, group_id) for transit_id, url, path, group_id in safe_transits_query()
+        }
+        # 跳转页面只在落地域名集合变化时重新渲染；未变化的域名沿用已有页面
+        pages = {page.id: page for members in self._members.values() for page, _ in members.values()}
+        members = {}
+        for group_id, landing_id, url, weight in safe_landings_query():
+            page = pages.get(landing_id)
+            if page is None or page.url != url:
+                page = landing_page(landing_id, url)
+            members.setdefault(group_id, {})[url] = (page, weight)
+
+        self._transits = transits
+        self._members = members
+        self._landings = {group_id: LandingPool(group.values()) for group_id, group in members.items()}
+        self._version = version
+
+    # --- 增量更新 (在数据库提交之后调用) ---
+
+    def set_landing_status(self, group_id, landing_id, url, status, weight=1):
+        with self._lock:
+            members = self._members.setdefault(group_id, {})
+            if status == 'safe':
+                if url in members:
+                    return
+                members[url] = (landing_page(landing_id, url), weight)
+            elif members.pop(url, None) is None:
+                return
+            self._landings[group_id] = LandingPool(members.values())
+
+    def set_landing_weight(self, group_id, url, weight):
+        with self._lock:
+            members = self._members.get(group_id, {})
+            if url in members:
+                members[url] = (members[url][0], weight)
+                self._landings[group_id] = LandingPool(members.values())
+
+    def remove_landings(self, pairs):
+        """pairs: [(group_id, url), ...]"""
+        for group_id, url in pairs:
+            self.set_landing_status(group_id, None, url, 'deleted')
+
+    def set_transit_status(self, transit_id, url, path, group_id, status):
+        with self._lock:
+            if status == 'safe':
+                self._transits[(url, path)] = (transit_id, group_id)
+            else:
+                self._transits.pop((url, path), None)
+
+    def remove_transit(self, url, path):
+        with self._lock:
+            self._transits.pop((url, path), None)
+
+    def remove_group(self, group_id):
+        with self._lock:
+            self._landings.pop(group_id, None)
+            self._members.pop(group_id, None)
+            for key in [k for k, (_, gid) in self._transits.items() if gid == group_id]:
+                del self._transits[key]
+
+    def publish(self):
+        """
+        通知其他 worker 路由已变化 (递增共享版本号)
+        如果本进程在修改前已与共享版本一致，则本地增量更新后仍然是最新的，无需重建
+        """
+        if not self.version_file:
+            return
+        with self._lock:
+            fd = os.open(self.version_file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.read(fd, 32)
+                shared = int(raw) if raw.strip() else 0
+                new_version = shared + 1
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, str(new_version).encode())
+            finally:
+                os.close(fd)  # 关闭文件时自动释放 flock
+            if shared == self._version:
+                self._version = new_version
+
+    def _read_version(self):
+        if not self.version_file:
+            return 0
+        try:
+            fd = os.open(self.version_file, os.O_RDONLY)
+        except FileNotFoundError:
+            return 0
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            raw = os.read(fd, 32)
+        finally:
+            os.close(fd)
+        return int(raw) if raw.strip() else 0
+
+
+_EMPTY_POOL = LandingPool(())
+
+# 每个进程一个实例
+routing_table = RoutingTable()
@@ -0,0 +1,188 @@
+# backend/routing_export.py
+"""
+[新] 把健康的路由状态编译成 nginx 可直接使用的快照文件，让跳转在 nginx 内完成
+NGINX_SNAPSHOT_DIR 下生成:
+  routing.conf   nginx include: map (host+path -> 组) + 每组一个 split_clients (按权重选择预渲染页面)
+  routing.json   同样内容的紧凑 JSON (给 njs/lua 等其他处理程序使用)
+  version        快照对应的路由版本号 (nginx 容器里的 routing-reload.sh 看到变化就 reload)
+所有文件都先写临时文件再 os.replace，nginx 不会读到写了一半的文件。
+
+nginx 只处理 "中转链接健康、组内有健康落地域名、不是爬虫 UA" 的请求，
+其余请求照常转发到跳转服务 / Flask (它们返回 404 页面)。
+注意: nginx 直接返回的跳转不经过 hits.py，不计入 redirect_hit 流量统计。
+"""
+import fcntl
+import json
+import os
+import re
+import subprocess
+import time
+from datetime import datetime
+from routing import routing_table, safe_transits_query, safe_landings_query
+from redirects import render_redirect_page
+
+SNAPSHOT_CONF = 'routing.conf'
+SNAPSHOT_JSON = 'routing.json'
+SNAPSHOT_VERSION = 'version'
+LOCK_FILE = '.export.lock'
+
+
+def nginx_quote(value):
+    """nginx 配置中的双引号字符串 (nginx 会解析 \\" \\\\ \\n 等转义)"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _percentages(weights):
+    """把权重换算成 split_clients 的百分比 (最多两位小数)，最后一项用 * 兜底"""
+    total = sum(weights)
+    shares = [int(w * 10000 // total) for w in weights[:-1]]
+    return [f'{share // 100}.{share % 100:02d}%' for share in shares] + ['*']
+
+
+def load_routing_state():
+    """(routes, groups): routes {(host, path): group_id}，groups {group_id: [(url, weight), ...]} (只含 weight > 0)"""
+    routes = {(url.lower(), path): group_id for _, url, path, group_id in safe_transits_query()}
+    groups = {}
+    for group_id, _, url, weight in safe_landings_query():
+        if weight > 0:
+            groups.setdefault(group_id, []).append((url, weight))
+    for members in groups.values():
+        members.sort()   # 输出稳定，内容不变时文件也不变
+    return routes, groups
+
+
+def render_nginx_conf(routes, groups, version, blocked_user_agents, sticky=False, sticky_cookie='vid'):
+    lines = [
+        f'# routing snapshot version {version}, generated {datetime.utcnow().isoformat()}Z by routing_export.py',
+        '# 自动生成，请勿手动修改',
+        '',
+    ]
+    cookie = re.sub(r'[^A-Za-z0-9_]', '_', sticky_cookie)
+    if sticky:
+        lines += [f'map $cookie_{cookie} $rs_visitor {{', '    "" $remote_addr;', f'    default $cookie_{cookie};', '}', '']
+        split_key = '"${rs_visitor}"'
+    else:
+        split_key = '"${request_id}"'
+
+    served = []
+    for group_id, members in sorted(groups.items()):
+        lines.append(f'split_clients {split_key} $rs_page_g{group_id} {{')
+        for share, (url, _) in zip(_percentages([w for _, w in members]), members):
+            if share == '0.00%':
+                continue   # 权重占比不到 0.01%，nginx 无法表示
+            page = render_redirect_page(url).decode('utf-8')
+            lines.append(f'    {share} {nginx_quote(page)};')
+        lines += ['}', '']
+        served.append(group_id)
+
+    served = set(served)
+    entries = sorted((host + path, group_id) for (host, path), group_id in routes.items() if group_id in served)
+    max_key = max((len(key) for key, _ in entries), default=0)
+    lines += [
+        f'map_hash_max_size {max(1024, 1 << (2 * len(entries)).bit_length())};',
+        f'map_hash_bucket_size {max(64, 1 << (max_key + 16).bit_length())};',
+        '',
+        'map "$host$uri" $rs_route_page {',
+        '    default "";',
+    ]
+    lines += [f'    {nginx_quote(key)} $rs_page_g{group_id};' for key, group_id in entries]
+    lines += ['}', '']
+
+    # 爬虫 UA 不在 nginx 里跳转 (转发给后端，返回 404)
+    lines += ['map $http_user_agent $rs_page {', '    default $rs_route_page;']
+    if blocked_user_agents:
+        pattern = '|'.join(re.escape(ua) for ua in blocked_user_agents)
+        lines.append(f'    {nginx_quote("~*(?:" + pattern + ")")} "";')
+    lines += ['}', '']
+    return '\n'.join(lines)
+
+
+def render_json(routes, groups, version):
+    return json.dumps({
+        'version': version,
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'routes': {host + path: group_id for (host, path), group_id in sorted(routes.items())},
+        'groups': {str(group_id): members for group_id, members in sorted(groups.items())},
+    }, separators=(',', ':'))
+
+
+def _atomic_write(path, data):
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot_version(directory):
+    try:
+        with open(os.path.join(directory, SNAPSHOT_VERSION)) as f:
+            return int(f.read().strip() or -1)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class SnapshotExporter:
+    """
+    每个 worker 定期调用 export_if_stale(app):
+    共享路由版本号 (routing.version) 比快照新时重新生成快照。
+    用文件锁保证同一时间只有一个进程在写；写完后执行 NGINX_RELOAD_COMMAND (同一台机器上部署时)
+    """
+
+    def __init__(self):
+        self.exports = 0
+        self.last_duration = None
+
+    def export_if_stale(self, app):
+        directory = app.config['NGINX_SNAPSHOT_DIR']
+        if not directory:
+            return False
+        shared = routing_table._read_version()
+        if read_snapshot_version(directory) == shared:
+            return False
+
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(os.path.join(directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False   # 其他进程正在导出
+            # 拿到锁后重新读取: 可能刚被别的进程导出过
+            shared = routing_table._read_version()
+            if read_snapshot_version(directory) == shared:
+                return False
+            with app.app_context():
+                self.export(app, directory, shared)
+            return True
+        finally:
+            os.close(fd)
+
+    def export(self, app, directory, version):
+        """在 app context 中调用；version 必须在读取数据库之前取得 (之后的变化会触发下一次导出)"""
+        start = time.monotonic()
+        config = app.config
+        os.makedirs(directory, exist_ok=True)
+        routes, groups = load_routing_state()
+        conf = render_nginx_conf(routes, groups, version, config['BLOCKED_USER_AGENTS'],
+                                 config['REDIRECT_STICKY'], config['STICKY_COOKIE'])
+        _atomic_write(os.path.join(directory, SNAPSHOT_CONF), conf)
+        _atomic_write(os.path.join(directory, SNAPSHOT_JSON), render_json(routes, groups, version))
+        # 版本号最后写: 看到新版本号时，快照文件一定已经是完整的
+        _atomic_write(os.path.join(directory, SNAPSHOT_VERSION), str(version))
+
+        self.exports += 1
+        self.last_duration = time.monotonic() - start
+        print(f"[{datetime.now()}] Exported routing snapshot v{version}: "
+              f"{len(routes)} transit links, {len(groups)} groups in {self.last_duration:.3f}s")
+
+        command = config['NGINX_RELOAD_COMMAND']
+        if command:
+            result = subprocess.run(command, shell=True, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"[{datetime.now()}] nginx reload failed: {result.stderr.strip()}")
+
+
+# 每个进程一个实例
+snapshot_exporter = SnapshotExporter()
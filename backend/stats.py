@@ -0,0 +1,122 @@
+# backend/stats.py
+from collections import defaultdict
+from flask import current_app
+from models import db, DomainCounter, group_domain_counts, group_domain_counts_query, upsert_increment
+from change_feed import record
+
+STATUSES = ('pending', 'safe', 'unsafe')
+
+
+def counters_enabled():
+    return current_app.config['STATS_COUNTER_MODE']
+
+
+def domain_counts(group_ids=None):
+    """
+    各组按状态的域名数量 {group_id: {'transit': {status: n}, 'landing': {status: n}}}
+    计数器模式下读取 domain_counter 表 (行数只和组数有关)，否则做一次分组聚合查询
+    """
+    if not counters_enabled():
+        return group_domain_counts(group_ids)
+
+    query = db.session.query(DomainCounter.group_id, DomainCounter.kind, DomainCounter.status, DomainCounter.count)
+    if group_ids is not None:
+        query = query.filter(DomainCounter.group_id.in_(group_ids))
+    counts = {}
+    for group_id, kind, status, n in query.filter(DomainCounter.count != 0):
+        counts.setdefault(group_id, {}).setdefault(kind, {})[status] = n
+    return counts
+
+
+def build_stats(by_group=False):
+    """仪表盘统计: 落地域名的 total/safe/unsafe (保持原有字段)，加上中转域名与各组明细"""
+    totals = {kind: dict.fromkeys(STATUSES, 0) for kind in ('landing', 'transit')}
+    groups = []
+    for group_id, kinds in domain_counts().items():
+        for kind, statuses in kinds.items():
+            for status, n in statuses.items():
+                totals[kind][status] = totals[kind].get(status, 0) + n
+        if by_group:
+            groups.append({'group_id': group_id, 'landing': kinds.get('landing', {}), 'transit': kinds.get('transit', {})})
+
+    landing = totals['landing']
+    transit = totals['transit']
+    result = {
+        'total': sum(landing.values()),
+        'safe': landing['safe'],
+        'unsafe': landing['unsafe'],
+        'pending': landing['pending'],
+        'transit': {
+            'total': sum(transit.values()),
+            'safe': transit['safe'],
+            'unsafe': transit['unsafe'],
+            'pending': transit['pending'],
+        },
+    }
+    if by_group:
+        result['groups'] = sorted(groups, key=lambda g: g['group_id'])
+    return result
+
+
+class CounterDeltas:
+    """
+    [新] 在一个事务里累积计数器变化，提交前调用 apply() 一次性写入
+    计数器模式关闭时什么都不做
+    """
+
+    def __init__(self):
+        self._deltas = defaultdict(int)
+
+    def add(self, kind, group_id, status, n=1):
+        if n:
+            self._deltas[(group_id, kind, status)] += n
+
+    def move(self, kind, group_id, old_status, new_status, n=1):
+        if old_status != new_status:
+            self.add(kind, group_id, old_status, -n)
+            self.add(kind, group_id, new_status, n)
+
+    def remove_grouped(self, kind, rows):
+        """rows: [(group_id, status, n), ...] (删除前按组/状态聚合的结果)"""
+        for group_id, status, n in rows:
+            self.add(kind, group_id, status, -n)
+
+    def apply(self):
+        """
+        [新] 返回非零的增量 [{'group_id', 'kind', 'status', 'n'}, ...] (计数器模式关闭时也返回)，
+        调用方把它写进变更事件 (change_feed.record)，客户端据此更新计数
+        """
+        deltas = {key: n for key, n in self._deltas.items() if n}
+        self._deltas.clear()
+        changes = [
+            {'group_id': group_id, 'kind': kind, 'status': status, 'n': n}
+            for (group_id, kind, status), n in deltas.items()
+        ]
+        if not deltas or not counters_enabled():
+            return changes
+        rows = [
+            {'group_id': group_id, 'kind': kind, 'status': status, 'count': n}
+            for (group_id, kind, status), n in deltas.items()
+        ]
+        upsert_increment(DomainCounter, ('group_id', 'kind', 'status'), 'count', rows)
+        return changes
+
+
+def remove_group_counters(group_id):
+    if counters_enabled():
+        db.session.execute(db.delete(DomainCounter).where(DomainCounter.group_id == group_id))
+
+
+def rebuild_counters():
+    """从域名表重新计算全部计数器 (开启计数器模式时或怀疑计数漂移时执行)"""
+    db.session.execute(db.delete(DomainCounter))
+    rows = [
+        {'group_id': group_id, 'kind': kind, 'status': status, 'count': n}
+        for kind, group_id, status, n in db.session.execute(group_domain_counts_query())
+    ]
+    if rows:
+        db.session.execute(db.insert(DomainCounter), rows)
+    # [新] 计数可能与客户端手里的不一致，通知客户端重新加载
+    record('reset')
+    db.session.commit()
+    return len(rows)
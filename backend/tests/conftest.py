@@ -0,0 +1,32 @@
+# backend/tests/conftest.py
+"""测试使用临时目录里的 SQLite 数据库和版本号文件，不启动调度器 (必须在导入 app 之前设置)"""
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp()
+os.environ.update(
+    DATABASE_URL=f'sqlite:///{_tmp}/test.db',
+    SCHEDULER_ENABLED='0',
+    STATS_COUNTER_MODE='1',
+    ROUTING_VERSION_FILE=f'{_tmp}/routing.version',
+    CHANGE_VERSION_FILE=f'{_tmp}/changes.version',
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def fresh_db():
+    """空数据库 (每个测试重新建表，包括搜索索引)，在 app context 中运行"""
+    from app import app
+    from models import db
+    from domain_search import ensure_search_index
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ensure_search_index()
+        yield db
+        db.session.remove()
@@ -0,0 +1,41 @@
+# backend/tests/test_change_feed.py
+"""变更事件 (change_feed.py): 事件 id 按提交顺序分配"""
+import threading
+
+from app import app
+from models import db, ChangeEvent
+from change_feed import record, events_since, change_version
+
+
+def test_event_ids_follow_commit_order():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        record('group', 1, action='updated')   # 先记录、后提交
+
+        def other():
+            with app.app_context():
+                record('group', 2, action='updated')
+                db.session.commit()
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join()
+        db.session.commit()
+
+        events, version, reset = events_since(0)
+        assert [e['group_id'] for e in events] == [2, 1]
+        assert version == events[-1]['id'] == change_version.read()
+        assert not reset
+
+
+def test_rolled_back_event_is_not_written():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        before = change_version.read()
+        record('group', 1, action='updated')
+        db.session.rollback()
+        db.session.commit()
+        assert ChangeEvent.query.count() == 0
+        assert change_version.read() == before
@@ -0,0 +1,88 @@
+# backend/tests/test_check_history.py
+"""检测历史压缩 (check_history.py): 明细 -> 小时汇总 -> 天汇总 -> 过期删除，查询时三者合并"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import check_history
+from check_history import compact_check_history, domain_history, group_check_summary
+from models import db, CheckResult, CheckRollup
+
+NOW = datetime(2026, 3, 10, 12, 30)
+RETENTION = dict(raw_hours=24, hourly_days=7, daily_days=30)
+
+
+def _result(domain_id, checked_at, status='safe', latency_ms=100, kind='landing'):
+    return CheckResult(kind=kind, domain_id=domain_id, group_id=1, checked_at=checked_at,
+                       status=status, latency_ms=latency_ms, bytes_read=0)
+
+
+def _rollups():
+    return {(r.period, r.domain_id, r.bucket): (r.checks, r.unsafe, r.latency_ms_sum, r.latency_samples)
+            for r in CheckRollup.query}
+
+
+@pytest.fixture
+def history(fresh_db):
+    hour = datetime(2026, 3, 8, 5)
+    db.session.add_all([
+        _result(1, NOW - timedelta(hours=2)),                      # 24 小时内: 保留明细
+        _result(1, NOW - timedelta(hours=1), 'unsafe', None),
+        _result(1, hour + timedelta(minutes=1), latency_ms=100),   # 同一小时的 3 条 -> 一行小时汇总
+        _result(1, hour + timedelta(minutes=20), 'unsafe', 200),
+        _result(1, hour + timedelta(minutes=59), latency_ms=None),
+        _result(2, hour + timedelta(minutes=30)),
+        _result(1, hour + timedelta(hours=2, minutes=15)),
+        _result(1, datetime(2026, 2, 25, 3, 10), 'unsafe', 50),    # 超过 7 天: 压缩成小时汇总后再压缩成天汇总
+        _result(1, datetime(2026, 2, 25, 9, 0), latency_ms=150),
+    ])
+    db.session.add(CheckRollup(period='day', kind='landing', domain_id=1, bucket=datetime(2026, 1, 1), group_id=1,
+                               checks=5, unsafe=0, latency_ms_sum=0, latency_samples=0))   # 超过 30 天: 删除
+    db.session.commit()
+    return hour
+
+
+def test_compaction_rolls_up_hours_then_days(history):
+    hour = history
+    assert compact_check_history(now=NOW, **RETENTION) == 5   # 4 个小时窗口 + 1 个天窗口
+
+    assert _rollups() == {
+        ('hour', 1, hour): (3, 1, 300, 2),
+        ('hour', 2, hour): (1, 0, 100, 1),
+        ('hour', 1, hour + timedelta(hours=2)): (1, 0, 100, 1),
+        ('day', 1, datetime(2026, 2, 25)): (2, 1, 200, 2),
+    }
+    assert CheckResult.query.count() == 2
+
+    # 再执行一次什么都不变
+    assert compact_check_history(now=NOW, **RETENTION) == 0
+    assert len(_rollups()) == 4
+
+
+def test_late_rows_are_added_to_existing_rollup(history):
+    hour = history
+    compact_check_history(now=NOW, **RETENTION)
+    db.session.add(_result(1, hour + timedelta(minutes=45), 'unsafe', 400))
+    db.session.commit()
+    compact_check_history(now=NOW, **RETENTION)
+    assert _rollups()[('hour', 1, hour)] == (4, 2, 700, 3)
+
+
+def test_backlog_is_processed_in_batches(history, monkeypatch):
+    monkeypatch.setattr(check_history, 'MAX_WINDOWS_PER_RUN', 2)
+    assert compact_check_history(now=NOW, **RETENTION) == 2
+    assert compact_check_history(now=NOW, **RETENTION) == 2
+    assert compact_check_history(now=NOW, **RETENTION) == 1
+    assert compact_check_history(now=NOW, **RETENTION) == 0
+    assert CheckResult.query.count() == 2
+
+
+def test_queries_merge_raw_and_rollups(history):
+    since = NOW - timedelta(days=30)
+    before = domain_history('landing', 1, since, 24)[0], group_check_summary(1, since)
+    compact_check_history(now=NOW, **RETENTION)
+    summary, series, recent = domain_history('landing', 1, since, 24)
+    assert (summary, group_check_summary(1, since)) == before   # 压缩不改变汇总结果
+    assert summary == {'checks': 8, 'unsafe': 3, 'uptime': 0.625, 'avg_latency_ms': 117}
+    assert [point['t'][:10] for point in series] == ['2026-02-25', '2026-03-08', '2026-03-10']
+    assert len(recent) == 2
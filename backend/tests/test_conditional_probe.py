@@ -0,0 +1,118 @@
+# backend/tests/test_conditional_probe.py
+"""条件探测 (checker.probe_domain / _scan_body): 304 沿用上次结论、页面开头摘要相同时只扫描新增内容"""
+import hashlib
+
+from requests.structures import CaseInsensitiveDict
+
+from checker import _scan_body, probe_domain, DANGER_KEYWORDS, SCAN_CHUNK_SIZE
+from check_validators import Validator
+
+KEYWORDS = tuple(DANGER_KEYWORDS)
+URL = 'https://lp.example/'
+
+
+class FakeResponse:
+    def __init__(self, chunks, status_code=200, url=URL, headers=None):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.url = url
+        self.headers = CaseInsensitiveDict({'Content-Type': 'text/html', **(headers or {})})
+        self.consumed = 0
+
+    def iter_content(self, chunk_size=None):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """按顺序返回预先准备的响应，记录每次请求带的头"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers))
+        return self.responses.pop(0)
+
+
+def _known(prefix, keyword=None, **kwargs):
+    return Validator(kwargs.get('etag'), None, URL, hashlib.sha1(prefix).hexdigest(), len(prefix), keyword)
+
+
+# --- 页面开头摘要 ---
+
+def test_unchanged_prefix_with_keyword_stops_reading():
+    prefix = b'<p>phishing</p>' + b'x' * 50
+    response = FakeResponse([prefix[:20], prefix[20:] + b'more', b'never read'])
+    scan = _scan_body(response, KEYWORDS, 10_000, _known(prefix, 'phishing'))
+    assert (scan.keyword, scan.reused) == ('phishing', True)
+    assert response.consumed == 2
+
+
+def test_unchanged_prefix_only_new_content_is_scanned():
+    prefix = b'<p>hello</p>' + b'y' * 40
+    scan = _scan_body(FakeResponse([prefix + b'<p>ok</p>']), KEYWORDS, 10_000, _known(prefix))
+    assert (scan.keyword, scan.reused) == (None, True)
+    assert scan.hashed_bytes == len(prefix) + 9
+
+    # 新增内容里的关键词仍然会被发现，包括跨越摘要边界的关键词
+    scan = _scan_body(FakeResponse([prefix + b'mal', b'ware']), KEYWORDS, 10_000, _known(prefix + b'mal'))
+    assert (scan.keyword, scan.reused) == ('malware', True)
+
+
+def test_changed_prefix_is_rescanned():
+    old = b'<p>hello</p>' + b'y' * 40
+    new = b'<p>phishing</p>' + b'y' * 37
+    scan = _scan_body(FakeResponse([new, b'tail']), KEYWORDS, 10_000, _known(old))
+    assert (scan.keyword, scan.reused) == ('phishing', False)
+
+    # 比上次摘要覆盖的部分还短: 内容肯定变了，扫描已读取的全部内容
+    scan = _scan_body(FakeResponse([b'<p>malware</p>']), KEYWORDS, 10_000, _known(old))
+    assert (scan.keyword, scan.reused) == ('malware', False)
+
+
+def test_prefix_spanning_many_chunks():
+    prefix = b'z' * (SCAN_CHUNK_SIZE * 2 + 100)
+    chunks = [prefix[i:i + SCAN_CHUNK_SIZE] for i in range(0, len(prefix), SCAN_CHUNK_SIZE)] + [b'<p>ok</p>']
+    scan = _scan_body(FakeResponse(chunks), KEYWORDS, 1 << 20, _known(prefix))
+    assert (scan.keyword, scan.reused, scan.read) == (None, True, len(prefix) + 9)
+
+
+# --- 304 ---
+
+def test_304_reuses_previous_verdict():
+    known = _known(b'page', 'phishing', etag='"v1"')
+    session = FakeSession(FakeResponse([], status_code=304, headers={'ETag': '"v2"'}))
+    result = probe_domain(URL, session, validator=known)
+    assert session.requests[0]['If-None-Match'] == '"v1"'
+    assert (result.status, result.http_code, result.keyword, result.reused) == ('unsafe', 304, 'phishing', '304')
+    assert result.validator == known._replace(etag='"v2"')
+    assert result.bytes_read == 0
+
+
+def test_304_for_a_different_final_url_refetches_without_conditions():
+    known = _known(b'page', None, etag='"v1"')
+    session = FakeSession(
+        FakeResponse([], status_code=304, url='https://other.example/'),
+        FakeResponse([b'<p>malware</p>']),
+    )
+    result = probe_domain(URL, session, validator=known)
+    assert 'If-None-Match' not in session.requests[1]
+    assert (result.status, result.http_code, result.keyword, result.reused) == ('unsafe', 200, 'malware', None)
+
+
+def test_without_validator_no_conditional_headers():
+    session = FakeSession(FakeResponse([b'<p>fine</p>'], headers={'ETag': '"v1"'}))
+    result = probe_domain(URL, session)
+    assert 'If-None-Match' not in session.requests[0]
+    assert result.status == 'safe'
+    assert result.validator.etag == '"v1"'
+    assert result.validator.content_hash == hashlib.sha1(b'<p>fine</p>').hexdigest()
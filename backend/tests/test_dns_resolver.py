@@ -0,0 +1,148 @@
+# backend/tests/test_dns_resolver.py
+"""DNS 预解析缓存 (dns_resolver.py)，对着本地的 UDP 桩服务器 (benchmarks/stub_dns.py) 测试"""
+import http.server
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import dns_resolver
+from benchmarks.stub_dns import StubDns
+from checker import CheckEngine
+from dns_resolver import DnsResolver, NoAddress
+
+RECORDS = {
+    'a.test': '127.0.0.2',
+    'multi.test': ['127.0.0.4', '127.0.0.5'],
+    'v6.test': '::1',
+    'empty.test': [],
+}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """只拨动解析器看到的时钟，用来让缓存过期"""
+    offset = [0.0]
+    monkeypatch.setattr(dns_resolver, 'time', SimpleNamespace(monotonic=lambda: time.monotonic() + offset[0]))
+    return offset
+
+
+@pytest.fixture
+def dns():
+    with StubDns(RECORDS, ttl=120, negative_ttl=40, truncated={'big.test'}) as server:
+        yield server
+
+
+def _resolver(server, **kwargs):
+    resolver = DnsResolver(nameservers=[server.address], timeout=0.5, **kwargs)
+    resolver._hosts = {}   # 不受本机 /etc/hosts 影响
+    return resolver
+
+
+def test_positive_answers_are_cached_for_their_ttl(dns, clock):
+    resolver = _resolver(dns, min_ttl=30, max_ttl=3600)
+    assert resolver.resolve('A.test.') == ['127.0.0.2']
+    assert resolver.resolve('a.test') == ['127.0.0.2']
+    assert dns.queries == 1
+    clock[0] += 119
+    resolver.resolve('a.test')
+    assert dns.queries == 1
+    clock[0] += 2   # 超过记录的 TTL
+    resolver.resolve('a.test')
+    assert dns.queries == 2
+
+    capped = _resolver(dns, max_ttl=60)   # TTL 限制在 [min_ttl, max_ttl]
+    capped.resolve('a.test')
+    clock[0] += 61
+    capped.resolve('a.test')
+    assert dns.queries == 4
+
+
+def test_nxdomain_is_cached_for_negative_ttl(dns, clock):
+    resolver = _resolver(dns, negative_ttl=300)
+    for _ in range(2):
+        with pytest.raises(socket.gaierror) as error:
+            resolver.resolve('nope.test')
+        assert not isinstance(error.value, NoAddress)
+    assert dns.queries == 1
+    clock[0] += 41   # SOA 的否定 TTL (40) 比 negative_ttl 短
+    with pytest.raises(socket.gaierror):
+        resolver.resolve('nope.test')
+    assert dns.queries == 2
+    assert resolver.stats()['negative'] == 2
+
+
+def test_ipv6_only_and_addressless_hosts(dns):
+    resolver = _resolver(dns)
+    assert resolver.resolve('v6.test') == ['::1']
+    assert sorted(resolver.resolve('multi.test')) == ['127.0.0.4', '127.0.0.5']
+    with pytest.raises(NoAddress):
+        resolver.resolve('empty.test')
+    assert resolver.resolve_all(['v6.test', 'empty.test', 'nope.test']) == {
+        'v6.test': ['::1'], 'empty.test': [], 'nope.test': None}
+    # 关闭 IPv6 时只查 A: 只有 AAAA 的主机算 "没有地址"，不是 "不存在"
+    assert _resolver(dns, ipv6=False).resolve_all(['v6.test']) == {'v6.test': []}
+
+
+def test_fallback_when_nameserver_is_dead_or_truncates(dns, clock, monkeypatch):
+    calls = []
+
+    def getaddrinfo(host, *args):
+        calls.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.9', 0))]
+
+    monkeypatch.setattr(dns_resolver.socket, 'getaddrinfo', getaddrinfo)
+    dead = DnsResolver(nameservers=[('127.0.0.1', 9)], timeout=0.2, attempts=1, fallback_ttl=60)
+    dead._hosts = {}
+    assert dead.resolve('x.test') == ['127.0.0.9']
+    dead.resolve('x.test')
+    assert calls == ['x.test']   # 退回 getaddrinfo 的结果按 fallback_ttl 缓存
+    clock[0] += 61
+    dead.resolve('x.test')
+    assert calls == ['x.test', 'x.test']
+    assert dead.stats()['fallbacks'] == 2
+
+    # 被截断的应答直接退回，不等待超时、不重试其他服务器
+    resolver = DnsResolver(nameservers=[dns.address, dns.address], timeout=1, attempts=2)
+    resolver._hosts = {}
+    start = time.monotonic()
+    assert resolver.resolve('big.test') == ['127.0.0.9']
+    assert time.monotonic() - start < 0.5
+    assert dns.queries == 1
+
+
+def test_concurrent_lookups_share_one_query():
+    with StubDns(RECORDS, delay=0.2) as slow:
+        resolver = _resolver(slow)
+        results = resolver.resolve_all(['a.test', 'multi.test'])
+        threads = [threading.Thread(target=resolver.resolve, args=('v6.test',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results['a.test'] == ['127.0.0.2']
+        assert slow.queries == 2 + 2   # v6.test: 一次 A + 一次 AAAA，8 个线程共用
+
+
+def test_checker_skips_unresolvable_hosts_and_tries_every_address(dns):
+    server = http.server.ThreadingHTTPServer(('127.0.0.5', 0), http.server.BaseHTTPRequestHandler)
+    server.RequestHandlerClass = type('Handler', (http.server.BaseHTTPRequestHandler,), {
+        'do_GET': lambda self: (self.send_response(200), self.send_header('Content-Length', '2'),
+                                self.end_headers(), self.wfile.write(b'ok')),
+        'log_message': lambda self, *args: None,
+    })
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        resolver = _resolver(dns)
+        urls = [f'http://multi.test:{port}/', 'http://nope.test/', 'http://empty.test/']
+        for _ in range(6):   # 127.0.0.4 上没有服务: 每个新连接都要换到 127.0.0.5，不能随机失败
+            results = dict(CheckEngine(4, 2, 2, resolver=resolver).run(urls))
+            assert (results[0].status, results[0].http_code) == ('safe', 200)
+            assert results[1].error == 'nxdomain'
+            assert results[2].error == 'no address'
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,93 @@
+# backend/tests/test_domain_search.py
+"""/api/domains 的键集分页和子串搜索 (domain_search.py: SQLite 上走 FTS5 trigram 索引)"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import app
+from models import db, DomainGroup, LandingDomain
+from domain_search import search_filter
+
+
+@pytest.fixture
+def client(fresh_db):
+    group = DomainGroup(name='g1')
+    db.session.add(group)
+    db.session.flush()
+    now = datetime(2026, 1, 1)
+    # 每 3 个域名共用一个 created_at: 翻页必须按 id 区分同一时刻创建的行
+    db.session.add_all([
+        LandingDomain(url=f'https://lp{i:02d}.Shop-Example.com', group_id=group.id,
+                      status='safe' if i % 2 else 'unsafe', created_at=now + timedelta(seconds=i // 3))
+        for i in range(25)
+    ])
+    db.session.add_all([
+        LandingDomain(url='https://promo_100%.example.net', group_id=group.id, status='safe', created_at=now),
+        LandingDomain(url='https://promoX100X.example.net', group_id=group.id, status='safe', created_at=now),
+    ])
+    db.session.commit()
+    return app.test_client()
+
+
+def _all_pages(client, **params):
+    ids, cursor, pages = [], '', 0
+    while cursor is not None:
+        body = client.get('/api/domains', query_string={**params, 'cursor': cursor}).get_json()
+        ids += [d['id'] for d in body['domains']]
+        cursor = body['next_cursor']
+        pages += 1
+    return ids, pages
+
+
+def test_cursor_pages_cover_every_row_once_newest_first(client):
+    ids, pages = _all_pages(client, per_page=4)
+    expected = [d.id for d in LandingDomain.query.order_by(LandingDomain.created_at.desc(), LandingDomain.id.desc())]
+    assert ids == expected
+    assert pages == 7   # 27 行，每页 4 行
+
+
+def test_cursor_pages_with_status_and_search(client):
+    ids, _ = _all_pages(client, per_page=5, status='safe', search='shop-example')
+    assert len(ids) == len(set(ids)) == 12
+    assert all(db.session.get(LandingDomain, i).status == 'safe' for i in ids)
+
+
+def test_invalid_cursor_and_count_modes(client):
+    assert client.get('/api/domains?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/domains?cursor=&count=bogus').status_code == 400
+    body = client.get('/api/domains?cursor=&count=exact&status=unsafe').get_json()
+    assert body['total'] == 13
+    assert client.get('/api/domains?cursor=').get_json()['total'] is None
+    body = client.get('/api/domains?page=2&per_page=10').get_json()
+    assert (body['total'], body['pages'], len(body['domains'])) == (27, 3, 10)
+
+
+def _search(term):
+    return sorted(url for url, in db.session.query(LandingDomain.url).filter(search_filter(term)))
+
+
+def test_fts_substring_search_is_case_insensitive(client):
+    assert len(_search('SHOP-example')) == 25
+    assert _search('lp07') == ['https://lp07.Shop-Example.com']
+    assert _search('zzz') == []
+    query = db.session.query(LandingDomain.url).filter(search_filter('lp07'))
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    plan = [row[-1] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql))]
+    assert any('VIRTUAL TABLE INDEX' in step for step in plan), plan
+    assert ['SCAN', 'landing_domain'] not in [step.split()[:2] for step in plan], plan
+
+
+def test_short_and_special_terms_fall_back_to_escaped_like(client):
+    assert len(_search('p0')) == 10   # 少于 3 个字符: trigram 索引不可用，走 LIKE
+    assert _search('_100%') == ['https://promo_100%.example.net']   # % 和 _ 按字面匹配
+
+
+def test_fts_index_follows_updates_and_deletes(client):
+    domain = LandingDomain.query.filter_by(url='https://lp07.Shop-Example.com').one()
+    domain.url = 'https://renamed.example.org'
+    db.session.commit()
+    assert _search('lp07') == []
+    assert _search('renamed') == ['https://renamed.example.org']
+    db.session.delete(domain)
+    db.session.commit()
+    assert _search('renamed') == []
@@ -0,0 +1,99 @@
+# backend/tests/test_flush_results.py
+"""
+检测结果批量提交 (checker._flush_results): 检测期间被删除的域名不影响同一批次里其余域名的结果
+运行: cd backend && python -m pytest -q tests
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import app
+from models import db, DomainGroup, LandingDomain, TransitDomain, CheckResult, DomainCounter, ChangeEvent
+from stats import rebuild_counters
+from checker import _flush_results, ProbeResult
+from check_history import history_row
+
+
+@pytest.fixture
+def ctx():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        group = DomainGroup(name='g1')
+        db.session.add(group)
+        db.session.flush()
+        db.session.add_all([LandingDomain(url=f'https://lp{i}.example', group_id=group.id, status='safe')
+                            for i in range(3)])
+        db.session.add_all([TransitDomain(url=f'https://t{i}.example', group_id=group.id, status='safe')
+                            for i in range(2)])
+        db.session.commit()
+        rebuild_counters()
+        yield group.id
+        db.session.remove()
+
+
+def _probe(model):
+    """模拟 run_check_job: 先读出要检测的行，结果统一为 unsafe"""
+    columns = [model.id, model.url, model.group_id, model.status, model.check_streak, model.flap_count]
+    columns.append(model.weight if model is LandingDomain else model.path)
+    rows = db.session.query(*columns).order_by(model.id).all()
+    db.session.commit()
+    now = datetime.utcnow()
+    result = ProbeResult('unsafe', 500, 10, 0, None, 'http 500', None, None)
+    kind = 'landing' if model is LandingDomain else 'transit'
+    batch = [(row, {'id': row.id, 'status': 'unsafe', 'last_checked_at': now,
+                    'next_check_at': now + timedelta(minutes=5), 'check_streak': 1, 'flap_count': 1})
+             for row in rows]
+    history = [history_row(kind, row.id, row.group_id, result, now) for row in rows]
+    return batch, history
+
+
+def _counters(group_id):
+    return {(r.kind, r.status): r.count for r in DomainCounter.query.filter_by(group_id=group_id) if r.count}
+
+
+def test_domain_deleted_between_probe_and_flush(ctx):
+    group_id = ctx
+    landing_batch, landing_history = _probe(LandingDomain)
+    transit_batch, transit_history = _probe(TransitDomain)
+
+    # 检测进行中删除一个落地域名和一个中转域名 (接口删除时已扣减计数)
+    client = app.test_client()
+    deleted_landing = landing_batch[1][0].id
+    deleted_transit = transit_batch[0][0].id
+    assert client.delete('/api/domains', json={'ids': [deleted_landing]}).status_code == 200
+    assert client.delete(f'/api/transit_domains/{deleted_transit}').status_code == 200
+
+    _flush_results(landing_batch, transit_batch, landing_history + transit_history)
+
+    survivors = LandingDomain.query.order_by(LandingDomain.id).all()
+    assert [d.id for d in survivors] == [landing_batch[0][0].id, landing_batch[2][0].id]
+    assert all(d.status == 'unsafe' and d.next_check_at is not None for d in survivors)
+    assert [d.status for d in TransitDomain.query] == ['unsafe']
+
+    recorded = {(r.kind, r.domain_id) for r in CheckResult.query}
+    assert ('landing', deleted_landing) not in recorded
+    assert ('transit', deleted_transit) not in recorded
+    assert len(recorded) == 3
+
+    assert _counters(group_id) == {('landing', 'unsafe'): 2, ('transit', 'unsafe'): 1}
+    events = [e.to_dict() for e in ChangeEvent.query.filter_by(type='domains')]
+    changes = [e['changes'] for e in events if 'changes' in e]
+    assert len(changes) == 1
+    assert {c['id'] for c in changes[0]} == {
+        landing_batch[0][0].id, landing_batch[2][0].id, transit_batch[1][0].id}
+
+
+def test_overlapping_sweeps_move_counters_once(ctx):
+    group_id = ctx
+    # 定时检测和手动检测同时读到了相同的旧状态 (safe)
+    first, _ = _probe(LandingDomain)
+    second, _ = _probe(LandingDomain)
+
+    _flush_results(second, [])
+    _flush_results(first, [])
+
+    assert [d.status for d in LandingDomain.query] == ['unsafe'] * 3
+    assert _counters(group_id) == {('landing', 'unsafe'): 3, ('transit', 'safe'): 2}
+    events = [e.to_dict() for e in ChangeEvent.query.filter_by(type='domains')]
+    assert len(events) == 1   # 后提交的一批状态没有变化，不产生事件
@@ -0,0 +1,100 @@
+# backend/tests/test_hits.py
+"""跳转流量统计 (hits.py): 进程内计数、按分钟批量写入 redirect_hit、写入失败时保留计数"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import hits
+from app import app
+from hits import HitCounter, traffic_series, recent_hits, purge_hits_before
+from models import db, RedirectHit
+
+MINUTE = 29_000_000   # 分钟序号 (2025 年前后)
+ROUTE_A = (1, 10)     # (transit_id, group_id)
+ROUTE_B = (2, 10)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [MINUTE * 60 + 5.0]
+    monkeypatch.setattr(hits.time, 'time', lambda: now[0])
+    return now
+
+
+def _rows():
+    return sorted((r.minute, r.transit_id, r.landing_id, r.group_id, r.hits) for r in RedirectHit.query)
+
+
+def test_flush_aggregates_per_minute_and_increments(fresh_db, clock):
+    counter = HitCounter()
+    for _ in range(3):
+        counter.record(ROUTE_A, 100)
+    counter.record(ROUTE_B, 100)
+    clock[0] += 60
+    counter.record(ROUTE_A, 100)
+    assert counter.pending() == 3
+
+    assert counter.flush(app) == 3
+    assert counter.pending() == 0
+    minute = hits._EPOCH + timedelta(minutes=MINUTE)
+    assert _rows() == [
+        (minute, 1, 100, 10, 3),
+        (minute, 2, 100, 10, 1),
+        (minute + timedelta(minutes=1), 1, 100, 10, 1),
+    ]
+
+    # 同一分钟的计数分几次写入时累加到同一行 (多个 worker 的情况相同)
+    other = HitCounter()
+    counter.record(ROUTE_A, 100)
+    other.record(ROUTE_A, 100)
+    counter.flush(app)
+    other.flush(app)
+    assert _rows()[-1] == (minute + timedelta(minutes=1), 1, 100, 10, 3)
+    assert counter.flush(app) == 0   # 没有待写入的计数
+
+
+def test_failed_flush_keeps_counts(fresh_db, clock, monkeypatch):
+    counter = HitCounter()
+    counter.record(ROUTE_A, 100)
+    counter.record(ROUTE_A, 100)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(hits, 'upsert_increment', broken)
+    assert counter.flush(app) == 0
+    counter.record(ROUTE_A, 100)   # 失败期间继续计数，合并到保留的键上
+    assert counter.pending() == 1
+
+    monkeypatch.undo()
+    monkeypatch.setattr(hits.time, 'time', lambda: clock[0])
+    assert counter.flush(app) == 1
+    assert [row[-1] for row in _rows()] == [3]
+
+
+def test_max_keys_drops_new_keys_only(clock):
+    counter = HitCounter(max_keys=2)
+    counter.record(ROUTE_A, 1)
+    counter.record(ROUTE_A, 2)
+    counter.record(ROUTE_A, 3)   # 新键: 丢弃
+    counter.record(ROUTE_A, 1)   # 已有的键照常累加
+    assert counter.pending() == 2
+    assert counter.dropped == 1
+
+
+def test_series_recent_hits_and_purge(fresh_db):
+    base = datetime(2026, 1, 1, 12, 0)
+    db.session.add_all([
+        RedirectHit(minute=base + timedelta(minutes=m), transit_id=1, landing_id=100 + m % 2, group_id=10, hits=m + 1)
+        for m in range(6)
+    ])
+    db.session.commit()
+
+    series, total = traffic_series(RedirectHit.group_id, 10, base, bucket_minutes=5)
+    assert total == 21
+    assert series == [{'t': base.isoformat(), 'hits': 15},
+                      {'t': (base + timedelta(minutes=5)).isoformat(), 'hits': 6}]
+    assert recent_hits(RedirectHit.landing_id, base + timedelta(minutes=3)) == {101: 4 + 6, 100: 5}
+
+    assert purge_hits_before(base + timedelta(minutes=4)) == 4
+    assert RedirectHit.query.count() == 2
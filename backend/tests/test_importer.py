@@ -0,0 +1,58 @@
+# backend/tests/test_importer.py
+"""批量导入 (importer.py): 输入去重、跳过已存在的域名、分块提交、CSV / 文本上传的解析"""
+import io
+
+import pytest
+
+import importer
+from importer import BulkImporter, iter_uploaded_urls, split_urls
+from models import db, DomainGroup, LandingDomain, TransitDomain, DomainCounter
+
+
+@pytest.fixture
+def group_id(fresh_db):
+    group = DomainGroup(name='g1')
+    db.session.add(group)
+    db.session.commit()
+    return group.id
+
+
+def test_split_urls():
+    assert split_urls('a.com, b.com;c.com\n d.com') == ['a.com', 'b.com', 'c.com', 'd.com']
+    assert split_urls([' a.com ', 7]) == ['a.com', '7']
+    assert split_urls(None) == []
+
+
+def test_iter_uploaded_urls():
+    csv_body = '﻿url,note\na.com,x\n\nb.com,y\n'.encode('utf-8')
+    assert list(iter_uploaded_urls(io.BytesIO(csv_body), is_csv=True)) == ['a.com', 'b.com']
+    text_body = b'a.com b.com\nc.com\n'
+    assert [u for u in iter_uploaded_urls(io.BytesIO(text_body)) if u] == ['a.com', 'b.com', 'c.com']
+
+
+def test_landing_import_dedupes_and_skips_existing(group_id, monkeypatch):
+    monkeypatch.setattr(importer, 'IMPORT_CHUNK_SIZE', 3)   # 多块: 每块一次 IN 查询 + 一次插入
+    db.session.add(LandingDomain(url='old.com', group_id=group_id, status='safe'))
+    db.session.commit()
+
+    urls = ['a.com', 'b.com', 'a.com', '', 'old.com', 'c.com', 'd.com', 'b.com']
+    added, skipped = BulkImporter(LandingDomain, group_id).add_all(urls)
+
+    assert (added, skipped) == (4, 3)
+    assert sorted(d.url for d in LandingDomain.query) == ['a.com', 'b.com', 'c.com', 'd.com', 'old.com']
+    assert all(d.status == 'pending' for d in LandingDomain.query.filter(LandingDomain.url != 'old.com'))
+    counter = db.session.get(DomainCounter, (group_id, 'landing', 'pending'))
+    assert counter.count == 4
+
+
+def test_transit_import_uses_path(group_id):
+    db.session.add(TransitDomain(url='t.com', path='/in', group_id=group_id, status='safe'))
+    db.session.commit()
+
+    added, skipped = BulkImporter(TransitDomain, group_id, 'custom', 'in').add_all(['t.com', 'u.com', 'u.com'])
+    assert (added, skipped) == (1, 2)
+    assert db.session.query(TransitDomain.url, TransitDomain.path).filter_by(url='u.com').one() == ('u.com', '/in')
+
+    added, _ = BulkImporter(TransitDomain, group_id).add_all(['t.com'])   # 同一 URL、不同路径
+    assert added == 1
+    assert TransitDomain.query.filter_by(url='t.com').count() == 2
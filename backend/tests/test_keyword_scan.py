@@ -0,0 +1,62 @@
+# backend/tests/test_keyword_scan.py
+"""流式关键词扫描 (checker._scan_body): 跨块匹配、读取上限、响应头 / 页面内 <meta charset> 声明的编码"""
+from requests.structures import CaseInsensitiveDict
+
+from checker import _scan_body, scan_response_body, DANGER_KEYWORDS
+
+KEYWORDS = tuple(DANGER_KEYWORDS)
+
+
+class FakeResponse:
+    """只实现 _scan_body 用到的部分；记录实际被读取了几块"""
+
+    def __init__(self, chunks, content_type='text/html'):
+        self.headers = CaseInsensitiveDict({'Content-Type': content_type})
+        self.chunks = chunks
+        self.consumed = 0
+
+    def iter_content(self, chunk_size=None):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+
+def test_keyword_split_across_chunks():
+    response = FakeResponse([b'<p>this site is PHISH', b'ing, leave</p>', b'x' * 100])
+    scan = _scan_body(response, KEYWORDS, 1024)
+    assert scan.keyword == 'phishing'
+    assert response.consumed == 2   # 命中即停止读取
+    assert scan.read == len(b'<p>this site is PHISH' + b'ing, leave</p>')
+
+
+def test_utf8_chinese_split_inside_character():
+    data = '<p>该网站存在欺诈风险</p>'.encode('utf-8')
+    cut = data.index('诈'.encode('utf-8')) + 1   # 切在一个汉字的字节中间
+    assert scan_response_body(FakeResponse([data[:cut], data[cut:]]), KEYWORDS) == '欺诈'
+
+
+def test_clean_page_and_byte_cap():
+    assert scan_response_body(FakeResponse([b'<p>hello</p>'] * 3), KEYWORDS) is None
+    response = FakeResponse([b'a' * 600, b'b' * 600 + b'malware', b'c' * 10])
+    scan = _scan_body(response, KEYWORDS, 1000)
+    assert scan.keyword is None and scan.read == 1000
+    assert response.consumed == 2   # 到达上限后不再读取
+
+
+def test_charset_from_header():
+    body = '<p>钓鱼网站</p>'.encode('gbk')
+    assert scan_response_body(FakeResponse([body], 'text/html; charset=gbk'), KEYWORDS) == '钓鱼'
+    assert scan_response_body(FakeResponse([body]), KEYWORDS) is None   # 按 UTF-8 匹配不到 GBK 字节
+
+
+def test_late_meta_charset_rescans_head():
+    # GBK 编码的关键词出现在 <meta charset> 之前，而且 meta 标签被切在两块之间
+    first = b'<html><head><title>' + '恶意软件'.encode('gbk') + b'</title><meta char'
+    second = b'set="gb2312"></head><body>ok</body></html>'
+    assert scan_response_body(FakeResponse([first, second]), KEYWORDS) == '恶意软件'
+
+
+def test_group_keywords():
+    response = FakeResponse([b'<p>Casino bonus</p>'])
+    assert scan_response_body(response, ('casino',)) == 'casino'
+    assert scan_response_body(FakeResponse([b'<p>phishing</p>']), ('casino',)) is None
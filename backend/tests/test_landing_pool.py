@@ -0,0 +1,76 @@
+# backend/tests/test_landing_pool.py
+"""组内落地域名选择 (redirects.LandingPool): 别名表按权重分配、粘性模式的一致性哈希环"""
+import random
+
+import pytest
+
+from redirects import LandingPool, landing_page
+
+
+def _pages(n):
+    return [landing_page(i, f'https://lp{i}.example') for i in range(n)]
+
+
+def _alias_probabilities(pool):
+    """由别名表精确算出每个页面被选中的概率"""
+    n = len(pool)
+    shares = {}
+    for i, page in enumerate(pool.pages):
+        shares[page.url] = shares.get(page.url, 0) + pool._prob[i] / n
+        alias = pool._alias[i].url
+        shares[alias] = shares.get(alias, 0) + (1 - pool._prob[i]) / n
+    return shares
+
+
+def test_alias_table_matches_weights():
+    pages = _pages(4)
+    pool = LandingPool(zip(pages, [1, 3, 0, 6]))
+    assert len(pool) == 3   # 权重 0 的域名不分配流量
+    shares = _alias_probabilities(pool)
+    assert shares == pytest.approx({pages[0].url: 0.1, pages[1].url: 0.3, pages[3].url: 0.6})
+
+    random.seed(7)
+    counts = {}
+    for _ in range(20000):
+        url = pool.pick().url
+        counts[url] = counts.get(url, 0) + 1
+    assert counts[pages[3].url] / 20000 == pytest.approx(0.6, abs=0.02)
+    assert counts[pages[0].url] / 20000 == pytest.approx(0.1, abs=0.02)
+
+
+def test_empty_pool():
+    pool = LandingPool(zip(_pages(2), [0, 0]))
+    assert not pool and len(pool) == 0
+
+
+def test_sticky_pick_is_stable():
+    pages = _pages(5)
+    pool = LandingPool((page, 1) for page in pages)
+    again = LandingPool((page, 1) for page in reversed(pages))   # 成员顺序不影响结果 (跨进程 / 重建后一致)
+    for key in ('visitor-1', '10.0.0.1', 'abc'):
+        assert pool.pick_sticky(key) == again.pick_sticky(key)
+    picked = {pool.pick_sticky(f'visitor-{i}').url for i in range(500)}
+    assert picked == {page.url for page in pages}
+
+
+def test_sticky_only_remaps_visitors_of_removed_or_added_landing():
+    pages = _pages(5)
+    before = LandingPool((page, 1) for page in pages)
+    after = LandingPool((page, 1) for page in pages[1:])   # lp0 下线
+    keys = [f'visitor-{i}' for i in range(2000)]
+    for key in keys:
+        old = before.pick_sticky(key)
+        if old.url != pages[0].url:
+            assert after.pick_sticky(key) == old
+
+    grown = LandingPool((page, 1) for page in _pages(6))   # 新增 lp5
+    moved = [key for key in keys if grown.pick_sticky(key) != before.pick_sticky(key)]
+    assert all(grown.pick_sticky(key).url == 'https://lp5.example' for key in moved)
+    assert 0.08 < len(moved) / len(keys) < 0.28   # 约 1/6 的访客转到新域名
+
+
+def test_sticky_respects_weights():
+    pages = _pages(2)
+    pool = LandingPool(zip(pages, [1, 4]))
+    heavy = sum(pool.pick_sticky(f'v{i}').url == pages[1].url for i in range(5000)) / 5000
+    assert heavy == pytest.approx(0.8, abs=0.05)
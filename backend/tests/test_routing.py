@@ -0,0 +1,81 @@
+# backend/tests/test_routing.py
+"""跳转路由表 (routing.py): 从数据库重建、提交后的增量更新、多个 worker 之间通过版本号文件同步"""
+import pytest
+
+from models import db, DomainGroup, TransitDomain, LandingDomain
+from routing import RoutingTable
+
+
+@pytest.fixture
+def fleet(fresh_db, tmp_path):
+    group = DomainGroup(name='g1')
+    db.session.add(group)
+    db.session.flush()
+    transit = TransitDomain(url='t.example', path='/go', group_id=group.id, status='safe')
+    landings = [LandingDomain(url=f'https://lp{i}.example', group_id=group.id, status='safe') for i in range(2)]
+    db.session.add_all([transit, *landings])
+    db.session.add(LandingDomain(url='https://down.example', group_id=group.id, status='unsafe'))
+    db.session.commit()
+    return group, transit, landings, str(tmp_path / 'routing.version')
+
+
+def _table(version_file):
+    table = RoutingTable()
+    table.version_file = version_file
+    table.sync_interval = 0
+    table.rebuild()
+    return table
+
+
+def _urls(pool):
+    return sorted(page.url for page in pool.pages)
+
+
+def test_rebuild_only_routes_safe_domains(fleet):
+    group, transit, _, version_file = fleet
+    route, pool = _table(version_file).lookup('t.example', '/go')
+    assert route == (transit.id, group.id)
+    assert _urls(pool) == ['https://lp0.example', 'https://lp1.example']
+    assert pool.pages[0].body.startswith(b'\n    <html>')
+
+
+def test_incremental_updates(fleet):
+    group, transit, landings, version_file = fleet
+    table = _table(version_file)
+
+    table.set_landing_status(group.id, landings[0].id, landings[0].url, 'unsafe')
+    assert _urls(table.lookup('t.example', '/go')[1]) == ['https://lp1.example']
+    table.set_landing_status(group.id, landings[0].id, landings[0].url, 'safe', weight=3)
+    pool = table.lookup('t.example', '/go')[1]
+    assert dict(zip((p.url for p in pool.pages), pool.weights))['https://lp0.example'] == 3
+
+    table.set_landing_weight(group.id, landings[1].url, 0)   # 权重 0: 不分配流量
+    assert _urls(table.lookup('t.example', '/go')[1]) == ['https://lp0.example']
+
+    table.set_transit_status(transit.id, 't.example', '/go', group.id, 'unsafe')
+    assert table.lookup('t.example', '/go') is None
+    table.set_transit_status(transit.id, 't.example', '/go', group.id, 'safe')
+    table.remove_group(group.id)
+    assert table.lookup('t.example', '/go') is None
+
+
+def test_publish_syncs_other_workers(fleet, monkeypatch):
+    group, _, landings, version_file = fleet
+    writer = _table(version_file)
+    reader = _table(version_file)
+
+    # writer 提交修改后增量更新自己的路由表并递增共享版本号
+    landings[0].status = 'unsafe'
+    db.session.commit()
+    rebuilds = []
+    original = RoutingTable._rebuild_locked
+    monkeypatch.setattr(RoutingTable, '_rebuild_locked',
+                        lambda self, version: (rebuilds.append(self), original(self, version))[1])
+    writer.set_landing_status(group.id, landings[0].id, landings[0].url, 'unsafe')
+    writer.publish()
+
+    # reader 在下一次查询时发现版本变化，从数据库重建；writer 已是最新，不需要重建
+    assert _urls(reader.lookup('t.example', '/go')[1]) == ['https://lp1.example']
+    assert _urls(writer.lookup('t.example', '/go')[1]) == ['https://lp1.example']
+    assert rebuilds == [reader]
+    assert reader._version == writer._version == 1
@@ -0,0 +1,34 @@
+#!/bin/sh
+# frontend/routing-reload.sh
+# [新] nginx 容器入口: 准备路由快照目录，后台监视快照版本号，变化时检查配置并 reload nginx
+# ROUTING_SNAPSHOT 不为 1 时 (默认) 始终使用空快照，所有跳转请求都转发给跳转服务
+SNAPSHOT_DIR=/etc/nginx/routing
+POLL_SECONDS=${ROUTING_RELOAD_SECONDS:-2}
+
+mkdir -p "$SNAPSHOT_DIR"
+if [ "$ROUTING_SNAPSHOT" != "1" ]; then
+    # 覆盖之前开启时留在共享卷上的旧快照，避免 nginx 继续按过期的路由跳转
+    cp /etc/nginx/routing-empty.conf "$SNAPSHOT_DIR/routing.conf"
+    exec nginx -g 'daemon off;'
+fi
+if [ ! -f "$SNAPSHOT_DIR/routing.conf" ]; then
+    cp /etc/nginx/routing-empty.conf "$SNAPSHOT_DIR/routing.conf"
+fi
+
+watch_snapshot() {
+    loaded=""
+    while true; do
+        sleep "$POLL_SECONDS"
+        version=$(cat "$SNAPSHOT_DIR/version" 2>/dev/null)
+        if [ -n "$version" ] && [ "$version" != "$loaded" ]; then
+            # 配置有误时不 reload，nginx 继续使用旧快照
+            if nginx -t -q && nginx -s reload; then
+                echo "routing snapshot v$version loaded"
+                loaded="$version"
+            fi
+        fi
+    done
+}
+
+watch_snapshot &
+exec nginx -g 'daemon off;'
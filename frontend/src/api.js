@@ -25,14 +25,46 @@ export default {
         });
     },
 
+    // [新] 键集分页: cursor 为空字符串表示第一页，返回 next_cursor
+    getDomainsPage(cursor, perPage, status, search, count = 'estimate') {
+        return apiClient.get('/domains', {
+            params: {
+                cursor: cursor || '',
+                per_page: perPage,
+                status,
+                search,
+                count
+            }
+        });
+    },
+
     getGroups() {
         return apiClient.get('/groups');
     },
 
+    // [新] 只返回中转 / 落地域名各自的第一页和 transit_next_cursor / landing_next_cursor
     getGroupDetails(groupId) {
         return apiClient.get(`/groups/${groupId}`);
     },
 
+    // [新] 组内域名的键集分页: cursor 为空表示第一页，返回 { domains, next_cursor, total }
+    getGroupTransitDomains(groupId, cursor, perPage, status) {
+        return apiClient.get(`/groups/${groupId}/transit_domains`, {
+            params: { cursor: cursor || '', per_page: perPage, status: status || undefined }
+        });
+    },
+
+    getGroupLandingDomains(groupId, cursor, perPage, status) {
+        return apiClient.get(`/groups/${groupId}/landing_domains`, {
+            params: { cursor: cursor || '', per_page: perPage, status: status || undefined }
+        });
+    },
+
+    // [新] 整组导出 (NDJSON，浏览器直接下载)
+    groupExportUrl(groupId, kind = 'all') {
+        return `${apiClient.defaults.baseURL}/groups/${groupId}/export?kind=${kind}`;
+    },
+
     createGroup(name) {
         return apiClient.post('/groups', { name: name });
     },
@@ -41,6 +73,43 @@ export default {
         return apiClient.delete(`/groups/${groupId}`);
     },
 
+    // [新] 修改组设置 (例如 { danger_keywords: ['关键词1', '关键词2'] })
+    updateGroup(groupId, data) {
+        return apiClient.patch(`/groups/${groupId}`, data);
+    },
+
+    // [新] 跳转流量时间序列 params: { minutes, bucket }
+    getGroupTraffic(groupId, params) {
+        return apiClient.get(`/groups/${groupId}/traffic`, { params });
+    },
+
+    getLandingTraffic(domainId, params) {
+        return apiClient.get(`/landing_domains/${domainId}/traffic`, { params });
+    },
+
+    getTransitTraffic(domainId, params) {
+        return apiClient.get(`/transit_domains/${domainId}/traffic`, { params });
+    },
+
+    // [新] 检测历史 params: { hours, bucket }，返回 { summary, series, recent }
+    getLandingChecks(domainId, params) {
+        return apiClient.get(`/landing_domains/${domainId}/checks`, { params });
+    },
+
+    getTransitChecks(domainId, params) {
+        return apiClient.get(`/transit_domains/${domainId}/checks`, { params });
+    },
+
+    // [新] 组内每个域名的可用率 / 平均延迟 { landing: {id: {...}}, transit: {id: {...}} }
+    getGroupCheckSummary(groupId, hours = 24) {
+        return apiClient.get(`/groups/${groupId}/check_summary`, { params: { hours } });
+    },
+
+    // [新] 修改落地域名权重 { weight: 0-100 }
+    updateLandingDomain(domainId, data) {
+        return apiClient.patch(`/landing_domains/${domainId}`, data);
+    },
+
     addLandingDomains(groupId, urls) {
         return apiClient.post(`/groups/${groupId}/landing_domains`, { urls: urls });
     },
@@ -54,17 +123,52 @@ export default {
         });
     },
 
+    // [新] 上传文件批量导入 (CSV 或每行一个域名的文本文件)
+    importLandingDomains(groupId, file) {
+        const form = new FormData();
+        form.append('file', file);
+        return apiClient.post(`/groups/${groupId}/landing_domains/import`, form, {
+            headers: { 'Content-Type': 'multipart/form-data' },
+            timeout: 0
+        });
+    },
+
+    importTransitDomains(groupId, file, { path_type, custom_path } = {}) {
+        const form = new FormData();
+        form.append('file', file);
+        return apiClient.post(`/groups/${groupId}/transit_domains/import`, form, {
+            params: { path_type, custom_path },
+            headers: { 'Content-Type': 'multipart/form-data' },
+            timeout: 0
+        });
+    },
+
     // [新] 删除中转域名
     deleteTransitDomain(domainId) {
         return apiClient.delete(`/transit_domains/${domainId}`);
     },
 
+    // [新] 批量删除中转域名
+    deleteTransitDomains(domainIds) {
+        return apiClient.delete('/transit_domains', { data: { ids: domainIds } });
+    },
+
     deleteLandingDomains(domainIds) {
         return apiClient.delete('/domains', { data: { ids: domainIds } });
     },
 
-    triggerCheck() {
-        return apiClient.post('/tasks/run_check');
+    // [新] target 可选: { group_id } 或 { landing_ids, transit_ids }，不传则检测全部
+    // 返回 { job, joined }，joined 表示加入了已在排队/执行的相同任务
+    triggerCheck(target = {}) {
+        return apiClient.post('/tasks/run_check', target);
+    },
+
+    // --- [新] 检测任务进度 / 取消 ---
+    getCheckJob(jobId) {
+        return apiClient.get(`/tasks/check_jobs/${jobId}`);
+    },
+    cancelCheckJob(jobId) {
+        return apiClient.post(`/tasks/check_jobs/${jobId}/cancel`);
     },
 
     // --- [新] 调度器 API ---
@@ -78,6 +182,15 @@ export default {
         return apiClient.post('/scheduler/resume');
     },
 
+    // --- [新] 变更推送 (SSE) ---
+    // onChange(change): 每个变更事件 { id, type, group_id, ... }；type 为 'reset' 时需要重新加载全部数据
+    // 返回取消订阅的函数；断线后浏览器自动重连，并带上 Last-Event-ID 从断点继续
+    subscribeChanges(onChange) {
+        const source = new EventSource(`${apiClient.defaults.baseURL}/changes/stream`);
+        source.onmessage = (message) => onChange(JSON.parse(message.data));
+        return () => source.close();
+    },
+
     // --- [新] 跳转测试 API ---
     testRedirect(url, path) {
         return apiClient.post('/test_redirect', { url, path });